@@ -9,6 +9,9 @@ import { RegisterForm } from './components/auth/register-form'
 import { Separator } from './components/ui/separator'
 import { Breadcrumb, BreadcrumbItem, BreadcrumbLink, BreadcrumbList, BreadcrumbPage, BreadcrumbSeparator } from './components/ui/breadcrumb'
 import { Toaster } from './components/ui/sonner'
+import { authToken } from './lib/http'
+import { getSession } from './lib/api.users'
+import { connectLiveUpdates, disconnectLiveUpdates } from './lib/live'
 
 export default function App() {
   const [activeSection, setActiveSection] = useState('dashboard')
@@ -27,8 +30,17 @@ export default function App() {
   useEffect(() => {
     const user = localStorage.getItem('gomis_current_user')
     setIsAuthenticated(!!user)
+    // An expired session token makes this 401, which logs the user out
+    if (user && authToken()) getSession().catch(() => {})
   }, [])
 
+  // Live change notifications from the server while signed in
+  useEffect(() => {
+    if (!isAuthenticated) return
+    connectLiveUpdates()
+    return () => disconnectLiveUpdates()
+  }, [isAuthenticated])
+
   // Hash-based routing support
   useEffect(() => {
     // Initialize from hash if present
@@ -10,7 +10,7 @@ import { Popover, PopoverContent, PopoverTrigger } from './ui/popover'
 import { Command, CommandEmpty, CommandGroup, CommandInput, CommandItem, CommandList } from './ui/command'
 import { CalendarIcon, Plus, User, Check, ChevronsUpDown } from 'lucide-react'
 import { cn } from './ui/utils'
-import { createAppointment } from '../lib/api.appointments'
+import { createAppointment, getFreeSlots, isBookingConflict, FreeSlotsDTO } from '../lib/api.appointments'
 import { listStudents, StudentDTO } from '../lib/api.students'
 import { toast } from 'sonner'
 
@@ -31,6 +31,15 @@ const formatDate = (date: Date, formatStr: string) => {
   return date.toLocaleDateString()
 }
 
+// 'HH:mm' plus minutes, as 'HH:mm'
+const addMinutes = (time: string, minutes: number) => {
+  const [h, m] = time.split(':').map(Number)
+  const total = h * 60 + m + minutes
+  return `${String(Math.floor(total / 60)).padStart(2, '0')}:${String(total % 60).padStart(2, '0')}`
+}
+
+const SLOT_MINUTES = 30
+
 interface AddAppointmentDialogProps {
   onAppointmentAdd: (appointment: any) => void
 }
@@ -49,6 +58,7 @@ export function AddAppointmentDialog({ onAppointmentAdd }: AddAppointmentDialogP
   const [students, setStudents] = useState<StudentDTO[]>([])
   const [studentSearchOpen, setStudentSearchOpen] = useState(false)
   const [selectedStudent, setSelectedStudent] = useState<StudentDTO | null>(null)
+  const [freeSlots, setFreeSlots] = useState<FreeSlotsDTO['slots'] | null>(null)
   const [formData, setFormData] = useState({
     title: '',
     consultationType: '',
@@ -71,6 +81,22 @@ export function AddAppointmentDialog({ onAppointmentAdd }: AddAppointmentDialogP
     }
   }, [isOpen])
 
+  // Look up which half-hour slots are still free on the chosen day
+  useEffect(() => {
+    if (!isOpen || !date) {
+      setFreeSlots(null)
+      return
+    }
+    let cancelled = false
+    getFreeSlots(formatDate(date, 'yyyy-MM-dd'), SLOT_MINUTES)
+      .then(res => { if (!cancelled) setFreeSlots(res.slots) })
+      .catch(() => { if (!cancelled) setFreeSlots(null) })
+    return () => { cancelled = true }
+  }, [isOpen, date])
+
+  const isSlotFree = (time: string) =>
+    !freeSlots || freeSlots.some(s => s.start <= time && addMinutes(time, SLOT_MINUTES) <= s.end)
+
   const consultationTypes = [
     'Academic Counseling',
     'Career Guidance', 
@@ -116,8 +142,10 @@ export function AddAppointmentDialog({ onAppointmentAdd }: AddAppointmentDialogP
       const created = await createAppointment(payload)
       onAppointmentAdd(created)
       toast.success('Appointment scheduled and saved to database')
-    } catch {
-      toast.error('Failed to create appointment')
+    } catch (error) {
+      toast.error(isBookingConflict(error)
+        ? 'That time overlaps another appointment'
+        : 'Failed to create appointment')
       return
     }
     
@@ -244,7 +272,9 @@ export function AddAppointmentDialog({ onAppointmentAdd }: AddAppointmentDialogP
                 </SelectTrigger>
                 <SelectContent>
                   {timeSlots.map((time) => (
-                    <SelectItem key={time} value={time}>{time}</SelectItem>
+                    <SelectItem key={time} value={time} disabled={!isSlotFree(time)}>
+                      {isSlotFree(time) ? time : `${time} (booked)`}
+                    </SelectItem>
                   ))}
                 </SelectContent>
               </Select>
@@ -5,7 +5,7 @@ import { Label } from '../ui/label'
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '../ui/card'
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../ui/select'
 import { Eye, EyeOff } from 'lucide-react'
-import { register } from '../../lib/api.users'
+import { authenticate, register } from '../../lib/api.users'
 import { toast } from 'sonner'
 import logo from '../../assets/logo.png'
 
@@ -87,7 +87,9 @@ export function RegisterForm({ onRegister, onSwitchToLogin }: RegisterFormProps)
         workPosition: finalWorkPosition || undefined,
         contactNo: formData.contactNo || undefined,
       })
-      localStorage.setItem('gomis_current_user', JSON.stringify(created))
+      // Sign in right away to get a session token
+      const session = await authenticate(created.email, formData.password).catch(() => created)
+      localStorage.setItem('gomis_current_user', JSON.stringify(session))
       setErrors({})
       onRegister()
     } catch (err: any) {
@@ -1,9 +1,10 @@
-import React, { useState } from 'react'
+import React, { useEffect, useState } from 'react'
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card'
 import { Button } from './ui/button'
 import { Badge } from './ui/badge'
 import { ChevronLeft, ChevronRight, Circle } from 'lucide-react'
 import { cn } from './ui/utils'
+import { listAppointmentsInRange } from '../lib/api.appointments'
 
 interface CalendarEvent {
   id: string | number
@@ -30,6 +31,23 @@ export function CalendarView({ appointments, sessions, incidents }: CalendarView
   const lastDayOfMonth = new Date(year, month + 1, 0)
   const daysInMonth = lastDayOfMonth.getDate()
   const firstDayOfWeek = firstDayOfMonth.getDay() // 0 = Sunday
+
+  // Only the shown month's appointments are fetched (a range query on the server); until
+  // they arrive, or if the request fails, the appointments passed in are used
+  const [monthAppointments, setMonthAppointments] = useState<any[] | null>(null)
+  useEffect(() => {
+    const pad = (n: number) => String(n).padStart(2, '0')
+    const from = `${year}-${pad(month + 1)}-01`
+    const to = `${year}-${pad(month + 1)}-${pad(daysInMonth)}`
+    let cancelled = false
+    setMonthAppointments(null)
+    listAppointmentsInRange(from, to)
+      .then(res => { if (!cancelled) setMonthAppointments(res) })
+      .catch(() => {})
+    return () => { cancelled = true }
+    // Refetch when the parent's list changes too (an appointment was added or edited)
+  }, [year, month, daysInMonth, appointments])
+  const visibleAppointments = monthAppointments ?? appointments
   
   const monthNames = [
     'January', 'February', 'March', 'April', 'May', 'June',
@@ -56,7 +74,7 @@ export function CalendarView({ appointments, sessions, incidents }: CalendarView
     const events: CalendarEvent[] = []
 
     // Add appointments
-    appointments.forEach(apt => {
+    visibleAppointments.forEach(apt => {
       if (apt.date === dateStr) {
         events.push({
           id: apt.id,
@@ -23,7 +23,7 @@ import {
   Plus
 } from 'lucide-react'
 import { toast } from 'sonner@2.0.3'
-import { listStudents, StudentDTO, getStudentsMeta, createStudent } from '../lib/api.students'
+import { listStudents, StudentDTO, getStudentsMeta, importStudents } from '../lib/api.students'
 import { listAppointments, AppointmentDTO } from '../lib/api.appointments'
 import { listViolationsByStudent, ViolationDTO, listStudentsWithViolations } from '../lib/api.violations'
 import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle } from './ui/dialog'
@@ -33,6 +33,7 @@ import { Label } from './ui/label'
 import { Textarea } from './ui/textarea'
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from './ui/select'
 import { on, emit } from '../lib/events'
+import { getDashboardSummary, DashboardSummaryDTO } from '../lib/api.dashboard'
 
 interface DashboardContentProps {
   activeSection: string
@@ -78,8 +79,21 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
   const [violationsForDroppedStudent, setViolationsForDroppedStudent] = useState<ViolationDTO[] | null>(null)
   const [droppedStudentDialogOpen, setDroppedStudentDialogOpen] = useState(false)
 
-  // Load data from backend on component mount
+  const [summary, setSummary] = useState<DashboardSummaryDTO | null>(null)
+  // Full lists are only needed outside the overview; fetch them on first use
+  const listsLoaded = React.useRef(false)
+  const isOverview = activeSection === 'dashboard' || activeSection === 'dashboard-overview'
+
+  const refreshSummary = React.useCallback(async () => {
+    try { setSummary(await getDashboardSummary(new Date().toISOString().split('T')[0])) } catch {}
+  }, [])
+
+  useEffect(() => { refreshSummary() }, [refreshSummary])
+
+  // Load list data from backend the first time a section that shows it is opened
   useEffect(() => {
+    if (isOverview || listsLoaded.current) return
+    listsLoaded.current = true
     ;(async () => {
       try {
         const [studentsRes, appointmentsRes, meta, incidentsRes, sessionsRes] = await Promise.all([
@@ -98,7 +112,7 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
         // Surface minimal error; avoid noise on empty backends
       }
     })()
-  }, [])
+  }, [isOverview])
 
   // Refetch students-with-violations when toggled or date changes
   React.useEffect(() => {
@@ -119,25 +133,35 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
   // Listen to global data events and refetch respective lists to sync across views
   useEffect(() => {
     const unsubInc = on('data:incidents', async () => {
+      refreshSummary()
+      if (!listsLoaded.current) return
       try { setIncidents(await listIncidents() as any) } catch {}
     })
     const unsubSess = on('data:sessions', async () => {
+      refreshSummary()
+      if (!listsLoaded.current) return
       try { setSessions(await listSessions() as any) } catch {}
     })
     const unsubStud = on('data:students', async () => {
+      refreshSummary()
+      if (!listsLoaded.current) return
       try { setStudents(await listStudents() as any) } catch {}
     })
     const unsubApt = on('data:appointments', async () => {
+      refreshSummary()
+      if (!listsLoaded.current) return
       try { setAppointments(await listAppointments() as any) } catch {}
     })
     const unsubAny = on('data:any', async () => {
+      refreshSummary()
+      if (!listsLoaded.current) return
       try {
         const [a,b,c,d] = await Promise.all([listStudents(), listAppointments(), listIncidents(), listSessions()])
         setStudents(a as any); setAppointments(b as any); setIncidents(c as any); setSessions(d as any)
       } catch {}
     })
     return () => { unsubInc(); unsubSess(); unsubStud(); unsubApt(); unsubAny() }
-  }, [])
+  }, [refreshSummary])
 
   const handleAppointmentAdd = (newAppointment: any) => {
     setAppointments(prev => [...prev, newAppointment])
@@ -197,25 +221,31 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
   // Get today's date in YYYY-MM-DD format
   const today = new Date().toISOString().split('T')[0]
   const renderDashboardOverview = () => {
-    const todaysAppointments = appointments.filter(apt => apt.date === today)
-    const completedToday = todaysAppointments.filter(apt => apt.status === 'Completed').length
+    // Everything on the overview comes from the aggregated /api/dashboard/summary response
+    const todaysAppointments: any[] = summary?.appointments.today ?? []
     const scheduledToday = todaysAppointments.filter(apt => apt.status === 'Scheduled').length
-    const completionRate = appointments.length > 0 ? 
-      Math.round((appointments.filter(apt => apt.status === 'Completed').length / appointments.length) * 100) : 0
-    
+    const appointmentTotal = summary?.appointments.total ?? 0
+    const completionRate = appointmentTotal > 0 ?
+      Math.round(((summary?.appointments.byStatus['Completed'] ?? 0) / appointmentTotal) * 100) : 0
+    const recentAppointments: any[] = summary?.appointments.recent ?? []
+
     // Calculate session statistics
-    const todaysSessions = sessions.filter(session => session.date === today)
-    const completedSessions = sessions.filter(session => session.status === 'Completed').length
-    
+    const sessionTotal = summary?.sessions.total ?? 0
+    const todaysSessionCount = summary?.sessions.todayCount ?? 0
+    const completedSessions = summary?.sessions.byStatus['Completed'] ?? 0
+    const upcomingSessions: any[] = summary?.sessions.upcoming ?? []
+
     // Calculate incident statistics
-    const openIncidents = incidents.filter(incident => 
-      incident.status !== 'Resolved' && incident.status !== 'Dismissed'
-    ).length
-    const todaysIncidents = incidents.filter(incident => incident.date === today)
-    
+    const incidentTotal = summary?.incidents.total ?? 0
+    const incidentsByStatus = summary?.incidents.byStatus ?? {}
+    const openIncidents = incidentTotal - (incidentsByStatus['Resolved'] ?? 0) - (incidentsByStatus['Dismissed'] ?? 0)
+    const todaysIncidentCount = summary?.incidents.todayCount ?? 0
+    const recentIncidents = summary?.incidents.recent ?? []
+
     // Calculate student statistics
-    const grade11Students = students.filter((s: any) => (s.gradeLevel || s.grade) === '11').length
-    const grade12Students = students.filter((s: any) => (s.gradeLevel || s.grade) === '12').length
+    const studentTotal = summary?.students.total ?? 0
+    const grade11Students = summary?.students.byGradeLevel['11'] ?? 0
+    const grade12Students = summary?.students.byGradeLevel['12'] ?? 0
     
     return (
       <div className="space-y-6">
@@ -231,7 +261,7 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
               <Users className="h-4 w-4 text-muted-foreground" />
             </CardHeader>
             <CardContent>
-              <div className="text-2xl font-bold">{students.length}</div>
+              <div className="text-2xl font-bold">{studentTotal}</div>
               <p className="text-xs text-muted-foreground">
                 Grade 11: {grade11Students} • Grade 12: {grade12Students}
               </p>
@@ -244,9 +274,9 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
               <Clock className="h-4 w-4 text-muted-foreground" />
             </CardHeader>
             <CardContent>
-              <div className="text-2xl font-bold">{sessions.length}</div>
+              <div className="text-2xl font-bold">{sessionTotal}</div>
               <p className="text-xs text-muted-foreground">
-                {todaysSessions.length} scheduled today • {completedSessions} completed
+                {todaysSessionCount} scheduled today • {completedSessions} completed
               </p>
             </CardContent>
           </Card>
@@ -259,7 +289,7 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
             <CardContent>
               <div className="text-2xl font-bold">{openIncidents}</div>
               <p className="text-xs text-muted-foreground">
-                Open cases • {incidents.length} total incidents
+                Open cases • {incidentTotal} total incidents
               </p>
             </CardContent>
           </Card>
@@ -270,7 +300,7 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
               <TrendingUp className="h-4 w-4 text-muted-foreground" />
             </CardHeader>
             <CardContent>
-              <div className="text-2xl font-bold">{appointments.length}</div>
+              <div className="text-2xl font-bold">{appointmentTotal}</div>
               <p className="text-xs text-muted-foreground">
                 {scheduledToday} today • {completionRate}% completion
               </p>
@@ -285,14 +315,8 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
               <CardDescription>Latest appointments and sessions</CardDescription>
             </CardHeader>
             <CardContent className="space-y-4">
-              {appointments.length > 0 ? (
-                appointments
-                  .sort((a, b) => {
-                    const dateA = new Date(`${a.date} ${a.time}`)
-                    const dateB = new Date(`${b.date} ${b.time}`)
-                    return dateB.getTime() - dateA.getTime()
-                  })
-                  .slice(0, 5)
+              {recentAppointments.length > 0 ? (
+                recentAppointments
                   .map((appointment) => (
                     <div key={appointment.id} className="flex items-center space-x-4">
                       <Avatar className="h-8 w-8">
@@ -350,9 +374,9 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
                     <Clock className="h-4 w-4 text-green-500" />
                     <span className="text-sm">Sessions</span>
                   </div>
-                  <span className="text-sm font-medium">{todaysSessions.length}</span>
+                  <span className="text-sm font-medium">{todaysSessionCount}</span>
                 </div>
-                <Progress value={todaysSessions.length * 20} className="h-2" />
+                <Progress value={todaysSessionCount * 20} className="h-2" />
               </div>
               <div className="space-y-2">
                 <div className="flex items-center justify-between">
@@ -360,14 +384,14 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
                     <AlertTriangle className="h-4 w-4 text-orange-500" />
                     <span className="text-sm">Incidents</span>
                   </div>
-                  <span className="text-sm font-medium">{todaysIncidents.length}</span>
+                  <span className="text-sm font-medium">{todaysIncidentCount}</span>
                 </div>
-                <Progress value={todaysIncidents.length * 20} className="h-2" />
+                <Progress value={todaysIncidentCount * 20} className="h-2" />
               </div>
               <div className="pt-2 border-t">
                 <div className="flex justify-between text-sm">
                   <span>Total Events Today</span>
-                  <span className="font-medium">{scheduledToday + todaysSessions.length + todaysIncidents.length}</span>
+                  <span className="font-medium">{scheduledToday + todaysSessionCount + todaysIncidentCount}</span>
                 </div>
               </div>
             </CardContent>
@@ -383,7 +407,7 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
             <CardContent className="space-y-3">
               <div className="flex justify-between items-center">
                 <span className="text-sm text-muted-foreground">Total Records</span>
-                <span className="font-medium">{appointments.length + students.length + sessions.length + incidents.length}</span>
+                <span className="font-medium">{appointmentTotal + studentTotal + sessionTotal + incidentTotal}</span>
               </div>
               <div className="flex justify-between items-center">
                 <span className="text-sm text-muted-foreground">Active Cases</span>
@@ -402,9 +426,9 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
               <CardDescription>Latest incident reports</CardDescription>
             </CardHeader>
             <CardContent>
-              {incidents.length > 0 ? (
+              {recentIncidents.length > 0 ? (
                 <div className="space-y-2">
-                  {incidents.slice(-3).reverse().map((incident) => (
+                  {recentIncidents.slice(0, 3).map((incident) => (
                     <div key={incident.id} className="flex items-center justify-between">
                       <div className="flex-1">
                         <p className="text-sm font-medium truncate">{incident.reportedBy}</p>
@@ -434,11 +458,9 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
               <CardDescription>Scheduled counseling sessions</CardDescription>
             </CardHeader>
             <CardContent>
-              {sessions.length > 0 ? (
+              {sessionTotal > 0 ? (
                 <div className="space-y-2">
-                  {sessions
-                    .filter(session => new Date(session.date) >= new Date(today))
-                    .sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime())
+                  {upcomingSessions
                     .slice(0, 3)
                     .map((session, index) => (
                       <div key={index} className="flex items-center justify-between">
@@ -453,7 +475,7 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
                         </Badge>
                       </div>
                     ))}
-                  {sessions.filter(session => new Date(session.date) >= new Date(today)).length === 0 && (
+                  {upcomingSessions.length === 0 && (
                     <p className="text-sm text-muted-foreground">No upcoming sessions</p>
                   )}
                 </div>
@@ -946,117 +968,19 @@ export function DashboardContent({ activeSection }: DashboardContentProps) {
                     if (!file) return
                     const ext = file.name.toLowerCase().split('.').pop()
                     if (ext === 'csv') {
-                      const text = await file.text()
-                      const lines = text.split(/\r?\n/).filter(Boolean)
-                      if (!lines.length) return
-                      
-                      // Parse CSV header (handling quoted fields)
-                      const parseCSVLine = (line: string): string[] => {
-                        const result: string[] = []
-                        let current = ''
-                        let inQuotes = false
-                        for (let i = 0; i < line.length; i++) {
-                          const char = line[i]
-                          if (char === '"') {
-                            inQuotes = !inQuotes
-                          } else if (char === ',' && !inQuotes) {
-                            result.push(current.trim())
-                            current = ''
-                          } else {
-                            current += char
-                          }
-                        }
-                        result.push(current.trim())
-                        return result
-                      }
-                      
-                      const headers = parseCSVLine(lines[0])
-                      const idx = (name: string) => {
-                        const normalized = name.toLowerCase().replace(/\s+/g, '').replace(/[\/&]/g, '')
-                        return headers.findIndex(h => {
-                          const hNormalized = h.toLowerCase().replace(/\s+/g, '').replace(/[\/&]/g, '')
-                          return hNormalized === normalized || hNormalized === name.toLowerCase()
-                        })
-                      }
-                      
-                      const newStudents: any[] = []
-                      let successCount = 0
-                      let errorCount = 0
-                      
-                      for (let i = 1; i < lines.length; i++) {
-                        const cols = parseCSVLine(lines[i])
-                        if (cols.length < headers.length) continue
-                        
-                        // Map SEX to gender (Male/Female -> MALE/FEMALE)
-                        const sexValue = cols[idx('SEX')]?.trim() || ''
-                        const genderMap: Record<string, string> = {
-                          'Male': 'MALE',
-                          'Female': 'FEMALE',
-                          'male': 'MALE',
-                          'female': 'FEMALE',
-                          'MALE': 'MALE',
-                          'FEMALE': 'FEMALE'
-                        }
-                        const gender = genderMap[sexValue] || 'OTHER'
-                        
-                        // Helper to get column value or undefined if empty
-                        const getCol = (name: string) => {
-                          const val = cols[idx(name)]?.trim()
-                          return val && val.length > 0 ? val : undefined
-                        }
-                        
-                        // Handle TRACK&STRAND field (try both variations)
-                        const trackStrandIdx = idx('TRACK&STRAND') >= 0 ? idx('TRACK&STRAND') : idx('TRACKSTRAND')
-                        const trackStrand = trackStrandIdx >= 0 ? cols[trackStrandIdx]?.trim() : undefined
-                        
-                        // Handle IP/ETHNICGROUP field (try both variations)
-                        const ipEthnicIdx = idx('IP/ETHNICGROUP') >= 0 ? idx('IP/ETHNICGROUP') : idx('IPETHNICGROUP')
-                        const ipEthnicGroup = ipEthnicIdx >= 0 ? cols[ipEthnicIdx]?.trim() : undefined
-                        
-                        const payload: any = {
-                          lrn: getCol('LRN'),
-                          lastName: getCol('LASTNAME'),
-                          firstName: getCol('FIRSTNAME'),
-                          middleName: getCol('MIDDLENAME'),
-                          gender: gender,
-                          birthDate: getCol('BIRHDATE'),
-                          ipEthnicGroup: ipEthnicGroup,
-                          religion: getCol('RELIGION'),
-                          schoolName: getCol('SCHOOLNAME'),
-                          schoolId: getCol('SCHOOLID'),
-                          schoolRegion: getCol('SCHOOLREGION'),
-                          division: getCol('DIVISION'),
-                          district: getCol('DISTRICT'),
-                          semester: getCol('SEMESTER'),
-                          schoolYear: getCol('SCHOOLYEAR') || '2024-2025',
-                          gradeLevel: getCol('GRADELEVEL'),
-                          section: getCol('SECTION'),
-                          trackStrand: trackStrand,
-                          specialization: getCol('SPECIALIZATION'),
-                          status: 'ACTIVE',
-                        }
-                        
-                        // Validate required fields
-                        if (payload.lrn && payload.firstName && payload.lastName && payload.gradeLevel && payload.section && payload.trackStrand) {
-                          try {
-                            const created = await createStudent(payload)
-                            newStudents.push(created)
-                            successCount++
-                          } catch (err: any) {
-                            errorCount++
-                            console.error('Failed to import student:', payload.lrn, err)
-                          }
+                      try {
+                        // The backend streams the file, skips duplicate LRNs and inserts in one transaction
+                        const report = await importStudents(file, 'text/csv', { schoolYear: '2024-2025', status: 'ACTIVE' })
+                        if (report.inserted > 0) {
+                          setStudents(await listStudents() as any)
+                          toast.success(`Imported ${report.inserted} student(s) successfully${report.skipped > 0 ? `, ${report.skipped} failed` : ''}`)
+                          emit('data:students')
                         } else {
-                          errorCount++
+                          toast.error(`Failed to import students. ${report.skipped > 0 ? `${report.skipped} row(s) had errors.` : 'No valid data found.'}`)
                         }
-                      }
-                      
-                      if (successCount > 0) {
-                        setStudents(prev => [...prev, ...newStudents])
-                        toast.success(`Imported ${successCount} student(s) successfully${errorCount > 0 ? `, ${errorCount} failed` : ''}`)
-                        emit('data:students')
-                      } else {
-                        toast.error(`Failed to import students. ${errorCount > 0 ? `${errorCount} row(s) had errors.` : 'No valid data found.'}`)
+                        report.errors.forEach(err => console.error('Failed to import student:', err.row, err.lrn, err.error))
+                      } catch (err: any) {
+                        toast.error(`Failed to import students. ${err?.message ?? ''}`)
                       }
                     } else {
                       toast.error('Excel import not available. Please upload CSV.')
@@ -6,7 +6,7 @@ import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '.
 import { Dialog, DialogContent, DialogDescription, DialogFooter, DialogHeader, DialogTitle } from './ui/dialog'
 import { AlertDialog, AlertDialogAction, AlertDialogCancel, AlertDialogContent, AlertDialogDescription, AlertDialogFooter, AlertDialogHeader, AlertDialogTitle } from './ui/alert-dialog'
 import { toast } from 'sonner'
-import { updateAppointment, deleteAppointment } from '../lib/api.appointments'
+import { updateAppointment, deleteAppointment, isBookingConflict } from '../lib/api.appointments'
 
 interface EditAppointmentDialogProps {
   appointment: any
@@ -61,8 +61,10 @@ export function EditAppointmentDialog({
       })
       onAppointmentUpdate(updated)
       onOpenChange(false)
-    } catch {
-      toast.error('Failed to update appointment')
+    } catch (error) {
+      toast.error(isBookingConflict(error)
+        ? 'That time overlaps another appointment'
+        : 'Failed to update appointment')
     }
   }
 
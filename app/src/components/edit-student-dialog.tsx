@@ -12,11 +12,9 @@ import { Card, CardContent, CardDescription, CardHeader, CardTitle } from './ui/
 import { CalendarIcon, Trash2, FileText, UserX } from 'lucide-react'
 import { cn } from './ui/utils'
 import { toast } from 'sonner'
-import { updateStudent, deleteStudent as apiDeleteStudent, StudentDTO } from '../lib/api.students'
+import { updateStudent, deleteStudent as apiDeleteStudent, StudentDTO, getStudentProfile, countOpen } from '../lib/api.students'
 import { GoodMoralCertificateDialog } from './good-moral-certificate-dialog'
 import { DroppingFormDialog } from './dropping-form-dialog'
-import { listViolationsByStudent } from '../lib/api.violations'
-import { listIncidents, IncidentDTO } from '../lib/api.incidents'
 import { Alert, AlertDescription } from './ui/alert'
 import { AlertTriangle } from 'lucide-react'
 
@@ -118,25 +116,13 @@ export function EditStudentDialog({ student, open, onOpenChange, onStudentUpdate
     setCheckingIssues(true)
     ;(async () => {
       try {
-        // Check for unresolved violations
-        const violations = await listViolationsByStudent(Number(student.id))
-        const unresolvedViolations = violations.filter(
-          v => v.status !== 'Resolved' && v.status !== 'Appealed'
-        )
-
-        // Check for unresolved incidents (where student is the reporter)
-        const allIncidents = await listIncidents()
-        const studentLRN = student.lrn
-        const unresolvedIncidents = allIncidents.filter(
-          (inc: IncidentDTO) => {
-            const isReporter = inc.reportedByLRN === studentLRN || 
-                              inc.reportedBy?.toLowerCase().includes(student.firstName?.toLowerCase() || '') ||
-                              inc.reportedBy?.toLowerCase().includes(student.lastName?.toLowerCase() || '')
-            return isReporter && inc.status !== 'Resolved' && inc.status !== 'Dismissed'
-          }
-        )
-
-        setHasUnresolvedIssues(unresolvedViolations.length > 0 || unresolvedIncidents.length > 0)
+        // Unresolved violations and incidents (reported by or involving the student),
+        // counted by the server in one request
+        const profile = await getStudentProfile(Number(student.id), { limit: 0 })
+        const unresolvedViolations = countOpen(profile.violations, ['Resolved', 'Appealed'])
+        const unresolvedIncidents = countOpen(profile.incidents, ['Resolved', 'Dismissed'])
+
+        setHasUnresolvedIssues(unresolvedViolations > 0 || unresolvedIncidents > 0)
       } catch (error) {
         console.error('Error checking unresolved issues:', error)
         // On error, allow printing (fail open)
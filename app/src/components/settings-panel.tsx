@@ -11,7 +11,7 @@ import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, Di
 import { useTheme } from './theme-provider'
 import { Palette, Bell, Shield, Database, User, Lock, Save, LogOut, Printer, RefreshCw, MessageSquare, Paperclip, Send, Loader2 } from 'lucide-react'
 import { toast } from 'sonner'
-import { meByEmail, updateUser, UserDTO } from '../lib/api.users'
+import { logout, meByEmail, updateUser, UserDTO } from '../lib/api.users'
 import { getPreferences, updatePreferences } from '../lib/api.preferences'
 import { API_URL } from '../lib/http'
 
@@ -61,7 +61,8 @@ export function SettingsPanel() {
   const [feedbackFiles, setFeedbackFiles] = useState<File[]>([])
   const [isSubmittingFeedback, setIsSubmittingFeedback] = useState(false)
 
-  const handleLogout = () => {
+  const handleLogout = async () => {
+    await logout().catch(() => {})
     localStorage.removeItem('gomis_current_user')
     window.location.reload()
   }
@@ -137,7 +138,7 @@ export function SettingsPanel() {
         const user: UserDTO = JSON.parse(stored)
         try {
           const fresh = await meByEmail(user.email)
-          localStorage.setItem('gomis_current_user', JSON.stringify(fresh))
+          localStorage.setItem('gomis_current_user', JSON.stringify({ ...user, ...fresh }))  // keep the session token
           setCurrentUserId(fresh.id)
           setProfileData({
             firstName: fresh.firstName || '',
@@ -198,7 +199,7 @@ export function SettingsPanel() {
         workPosition: profileData.position,
         specialization: profileData.specialization,
       })
-      localStorage.setItem('gomis_current_user', JSON.stringify(updated))
+      localStorage.setItem('gomis_current_user', JSON.stringify({ ...user, ...updated }))
       toast.success('Profile updated successfully!')
     } catch (e: any) {
       toast.error('Failed to update profile')
@@ -335,14 +336,22 @@ export function SettingsPanel() {
       const res = await fetch(`${API_URL}/api/backup`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ destDir: backupPath }),
+        body: JSON.stringify({ destDir: backupPath, retentionType, retentionValue }),
       })
       if (!res.ok) {
         const msg = await res.text()
         throw new Error(msg || 'Backup failed')
       }
-      const data = await res.json()
-      const filePath = data?.path || ''
+      // The backup runs in the background; poll its task until it finishes
+      let task = await res.json()
+      while (task.status === 'queued' || task.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000))
+        const poll = await fetch(`${API_URL}/api/jobs/${task.id}`)
+        if (!poll.ok) throw new Error('Lost track of the backup task')
+        task = await poll.json()
+      }
+      if (task.status === 'failed') throw new Error(task.error || 'Backup failed')
+      const filePath = task.result?.path || ''
       localStorage.setItem('gomis_backup_last_at', String(Date.now()))
       toast.success(`Backup created${filePath ? `: ${filePath}` : ''}`)
     } catch (e: any) {
@@ -3,7 +3,7 @@
  * These hooks provide reactive state management for all data entities
  */
 
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import api, { Appointment, Session, Incident, Violation, User, Settings } from '../lib/api'
 import {
   listStudents,
@@ -12,9 +12,11 @@ import {
   updateStudent as updateStudentApi,
   deleteStudent as deleteStudentApi,
   searchStudentsByName,
-  countByStatus,
   type StudentDTO,
 } from '../lib/api.students'
+import { getDashboardSummary } from '../lib/api.dashboard'
+import { getChanges, syncList } from '../lib/api.changes'
+import { on } from '../lib/events'
 
 // ===========================
 // STUDENT HOOKS
@@ -25,23 +27,47 @@ export function useStudents() {
   const [loading, setLoading] = useState(true)
   const [countsByStatus, setCountsByStatus] = useState<Record<string, number> | null>(null)
 
+  const studentsRef = useRef<StudentDTO[]>([])
+  const cursorRef = useRef<string | null>(null)
+
   const loadStudents = useCallback(async () => {
     setLoading(true)
+    // Cursor first: changes made while the list loads are pulled again by the next sync
+    cursorRef.current = (await getChanges(undefined, ['students'])).cursor
     const data = await listStudents()
+    studentsRef.current = data
     setStudents(data)
     setLoading(false)
   }, [])
 
+  // Pull only the students created, updated or deleted since the last load/sync
+  const syncStudents = useCallback(async () => {
+    if (!cursorRef.current) return loadStudents()
+    const result = await syncList(studentsRef.current, cursorRef.current, 'students')
+    if (result.reset) return loadStudents()
+    cursorRef.current = result.cursor
+    if (result.list !== studentsRef.current) {
+      studentsRef.current = result.list
+      setStudents(result.list)
+    }
+  }, [loadStudents])
+
   const refreshCounts = useCallback(async () => {
+    // One GROUP BY on the server instead of a count request per status
     const statuses: StudentDTO['status'][] = ['ACTIVE', 'INACTIVE', 'DROPPED', 'GRADUATED']
-    const entries = await Promise.all(statuses.map(async s => [s, await countByStatus(s)] as const))
-    setCountsByStatus(Object.fromEntries(entries))
+    const { students: { byStatus } } = await getDashboardSummary()
+    setCountsByStatus(Object.fromEntries(statuses.map(s => [s, byStatus[s] ?? 0])))
   }, [])
 
   useEffect(() => {
     loadStudents()
     refreshCounts()
-  }, [loadStudents, refreshCounts])
+    // Pushed by the server (lib/live.ts) when any workstation changes students
+    const sync = () => { Promise.all([syncStudents(), refreshCounts()]).catch(() => {}) }
+    const offStudents = on('data:students', sync)
+    const offAny = on('data:any', sync)
+    return () => { offStudents(); offAny() }
+  }, [loadStudents, refreshCounts, syncStudents])
 
   return {
     students,
@@ -49,17 +75,17 @@ export function useStudents() {
     countsByStatus,
     async createStudent(input: Omit<StudentDTO, 'id' | 'status'> & { status?: StudentDTO['status'] }) {
       const created = await createStudentApi(input)
-      await Promise.all([loadStudents(), refreshCounts()])
+      await Promise.all([syncStudents(), refreshCounts()])
       return created
     },
     async updateStudent(id: number, input: Partial<StudentDTO>) {
       const updated = await updateStudentApi(id, input)
-      await Promise.all([loadStudents(), refreshCounts()])
+      await Promise.all([syncStudents(), refreshCounts()])
       return updated
     },
     async deleteStudent(id: number) {
       await deleteStudentApi(id)
-      await Promise.all([loadStudents(), refreshCounts()])
+      await Promise.all([syncStudents(), refreshCounts()])
     },
     getStudentById: (id: number) => getStudentApi(id),
     searchStudents: (name: string) => searchStudentsByName(name),
@@ -4,6 +4,7 @@ export type AppointmentDTO = {
   id: number
   date: string // yyyy-MM-dd
   time: string // HH:mm or HH:mm:ss
+  durationMinutes?: number // defaults to 30 on the server
   title: string
   consultationType: string
   participantName: string
@@ -13,18 +14,44 @@ export type AppointmentDTO = {
   status: 'SCHEDULED' | 'COMPLETED' | 'CANCELLED'
 }
 
+export type FreeSlotsDTO = {
+  date: string
+  durationMinutes: number
+  slots: { start: string; end: string }[] // HH:mm, free from start until end
+}
+
+// Overlapping bookings are rejected with 409 unless allowOverlap is set
+type BookingOptions = { allowOverlap?: boolean }
+
 export function listAppointments() {
   return http.get<AppointmentDTO[]>('/api/appointments')
 }
 
-export function createAppointment(input: Omit<AppointmentDTO, 'id'>) {
+// Appointments starting between two dates (yyyy-MM-dd, both inclusive), e.g. a calendar month
+export function listAppointmentsInRange(from: string, to: string) {
+  const qs = new URLSearchParams({ from, to })
+  return http.get<AppointmentDTO[]>(`/api/appointments?${qs.toString()}`)
+}
+
+export function getFreeSlots(date: string, durationMinutes?: number) {
+  const qs = new URLSearchParams({ date })
+  if (durationMinutes != null) qs.set('duration', String(durationMinutes))
+  return http.get<FreeSlotsDTO>(`/api/appointments/free-slots?${qs.toString()}`)
+}
+
+export function createAppointment(input: Omit<AppointmentDTO, 'id'> & BookingOptions) {
   return http.post<AppointmentDTO>('/api/appointments', input)
 }
 
-export function updateAppointment(id: number, input: Partial<AppointmentDTO>) {
+export function updateAppointment(id: number, input: Partial<AppointmentDTO> & BookingOptions) {
   return http.put<AppointmentDTO>(`/api/appointments/${id}`, input)
 }
 
+// http errors carry the status first ("409 CONFLICT - ...")
+export function isBookingConflict(error: unknown) {
+  return error instanceof Error && error.message.startsWith('409')
+}
+
 export function deleteAppointment(id: number) {
   return http.del(`/api/appointments/${id}`)
 }
@@ -0,0 +1,36 @@
+import { http } from './http'
+import { getJob } from './api.jobs'
+import type { JobDTO } from './api.jobs'
+
+export type ArchivedTable = 'student' | 'appointment' | 'violation' | 'incident' | 'session'
+
+export type ArchiveStatusDTO = {
+  path: string
+  currentSchoolYearStart: string // yyyy-MM-dd; earlier school years are closed
+  tables: Record<ArchivedTable, { live: number; archived: number }>
+}
+
+export type ArchiveResult = {
+  before: string
+  archived: Record<ArchivedTable, number>
+  purged: Partial<Record<'live' | 'archive', Record<ArchivedTable, number>>>
+}
+
+export type ArchiveTaskDTO = JobDTO<ArchiveResult> & {
+  before: string // records dated before this day are archived
+}
+
+export function getArchiveStatus() {
+  return http.get<ArchiveStatusDTO>('/api/archive')
+}
+
+// Moves `schoolYear` and every earlier one (default: every closed school year) into the
+// archive database. With userId, rows older than the user's retention preference are purged.
+// Answers 409 until the newest backup in destDir (default: the user's backupPath) includes the archive.
+export function archiveSchoolYears(options: { schoolYear?: string; destDir?: string; userId?: number; retentionType?: string; retentionValue?: string | number } = {}) {
+  return http.post<ArchiveTaskDTO>('/api/archive', options)
+}
+
+export function getArchiveTask(id: string) {
+  return getJob<ArchiveResult>(id)
+}
@@ -0,0 +1,38 @@
+import { http } from './http'
+
+export type BatchEntity = 'students' | 'appointments' | 'violations'
+
+// `where` matches fields by equality (a list means any of them) and compiles to one statement
+export type BatchOperation =
+  | { op: 'create'; entity: BatchEntity; data: Record<string, unknown>; allowOverlap?: boolean }
+  | { op: 'update'; entity: BatchEntity; id: number; data: Record<string, unknown>; allowOverlap?: boolean }
+  | { op: 'update'; entity: BatchEntity; where: Record<string, unknown>; data: Record<string, unknown> }
+  | { op: 'delete'; entity: BatchEntity; id: number }
+  | { op: 'delete'; entity: BatchEntity; where: Record<string, unknown> }
+
+export type BatchResult = {
+  index: number
+  status: 200 | 201 | 204
+  id?: number // single-row operations
+  row?: Record<string, unknown> // created/updated row
+  count?: number // rows matched by `where`
+}
+
+// Applies every operation or none of them; a failure rejects with the failing operation's
+// index and error in the message.
+export function applyBatch(operations: BatchOperation[]) {
+  return http.post<{ results: BatchResult[] }>('/api/batch', { operations })
+}
+
+// Year-end helpers
+export function graduateGrade(gradeLevel: string) {
+  return applyBatch([{ op: 'update', entity: 'students', where: { gradeLevel, status: 'ACTIVE' }, data: { status: 'GRADUATED' } }])
+}
+
+export function moveSection(gradeLevel: string, from: string, to: string) {
+  return applyBatch([{ op: 'update', entity: 'students', where: { gradeLevel, section: from }, data: { section: to } }])
+}
+
+export function resolveViolations(ids: number[]) {
+  return applyBatch([{ op: 'update', entity: 'violations', where: { id: ids }, data: { status: 'Resolved' } }])
+}
@@ -0,0 +1,25 @@
+import { http } from './http'
+import type { JobDTO } from './api.jobs'
+
+export type CertificateKind = 'good-moral' | 'dropping'
+
+// Select students by id, or a whole section with gradeLevel/section (and optionally schoolYear)
+export type CertificateBatchRequest = {
+  studentIds?: number[]
+  gradeLevel?: string
+  section?: string
+  schoolYear?: string
+  // Placeholder values shared by every document, e.g. for good-moral:
+  // { purpose, formatDateGiven, certificateSigner, signerPosition, includeLRN }
+  fields?: Record<string, string | boolean>
+}
+
+// Renders one .docx per student on the server and returns them as a zip
+export function renderCertificates(kind: CertificateKind, input: CertificateBatchRequest) {
+  return http.download(`/api/certificates/${kind}/batch`, input)
+}
+
+// Large batches: render on the job runner instead; poll with waitForJob, then downloadJobFile
+export function startCertificateJob(kind: CertificateKind, input: CertificateBatchRequest) {
+  return http.post<JobDTO<{ filename: string; documents: number }>>(`/api/certificates/${kind}/batch?async=true`, input)
+}
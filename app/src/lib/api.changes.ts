@@ -0,0 +1,46 @@
+import { http } from './http'
+
+export type SyncedTable = 'students' | 'appointments' | 'violations' | 'incidents' | 'sessions'
+
+export type ChangeDTO<T = unknown> =
+  | { table: SyncedTable; id: number; op: 'upsert'; changedAt: string; row: T }
+  | { table: SyncedTable; id: number; op: 'delete'; changedAt: string }
+
+export type ChangesDTO<T = unknown> = {
+  cursor: string // pass as `since` on the next call
+  reset: boolean // the `since` cursor is no longer valid: reload the lists, then continue from `cursor`
+  hasMore: boolean
+  changes: ChangeDTO<T>[]
+}
+
+// Without `since`: only the current cursor. Take it before loading a list, then sync from it.
+export function getChanges<T = unknown>(since?: string, tables?: SyncedTable[], limit?: number) {
+  const qs = new URLSearchParams()
+  if (since) qs.set('since', since)
+  if (tables?.length) qs.set('tables', tables.join(','))
+  if (limit) qs.set('limit', String(limit))
+  const query = qs.toString()
+  return http.get<ChangesDTO<T>>(`/api/changes${query ? `?${query}` : ''}`)
+}
+
+// Apply every change after `since` to a list keyed by id. Returns the new list (the same
+// array when nothing changed) and cursor, or `reset: true` when the caller has to reload
+// the list instead.
+export async function syncList<T extends { id: number }>(list: T[], since: string, table: SyncedTable) {
+  const rows = new Map(list.map(row => [row.id, row]))
+  let cursor = since
+  let changed = false
+  for (;;) {
+    const page = await getChanges<T>(cursor, [table])
+    if (page.reset) return { list, cursor: page.cursor, reset: true }
+    changed ||= page.changes.length > 0
+    for (const change of page.changes) {
+      if (change.op === 'delete') rows.delete(change.id)
+      else rows.set(change.id, change.row)
+    }
+    cursor = page.cursor
+    if (!page.hasMore) break
+  }
+  if (!changed) return { list, cursor, reset: false }
+  return { list: [...rows.values()].sort((a, b) => a.id - b.id), cursor, reset: false }
+}
@@ -0,0 +1,46 @@
+import { http } from './http'
+import type { AppointmentDTO } from './api.appointments'
+import type { IncidentDTO } from './api.incidents'
+import type { SessionDTO } from './api.sessions'
+
+export type DashboardSummaryDTO = {
+  date: string // yyyy-MM-dd the summary was computed for
+  students: {
+    total: number
+    byStatus: Record<string, number> // keys upper-cased, e.g. ACTIVE
+    byGradeLevel: Record<string, number>
+  }
+  appointments: {
+    total: number
+    byStatus: Record<string, number>
+    today: AppointmentDTO[]
+    upcoming: AppointmentDTO[]
+    recent: AppointmentDTO[]
+  }
+  sessions: {
+    total: number
+    byStatus: Record<string, number>
+    todayCount: number
+    upcoming: SessionDTO[]
+    recent: SessionDTO[]
+  }
+  incidents: {
+    total: number
+    byStatus: Record<string, number>
+    todayCount: number
+    recent: IncidentDTO[]
+  }
+  violations: {
+    total: number
+    bySeverity: Record<string, number>
+    byStatus: Record<string, number>
+  }
+}
+
+export function getDashboardSummary(date?: string, limit?: number) {
+  const params = new URLSearchParams()
+  if (date) params.set('date', date)
+  if (limit) params.set('limit', String(limit))
+  const qs = params.toString()
+  return http.get<DashboardSummaryDTO>(`/api/dashboard/summary${qs ? `?${qs}` : ''}`)
+}
@@ -15,6 +15,8 @@ export type IncidentDTO = {
   actionTaken?: string
   recommendation?: string
   participants: any[]
+  // Number of violations whose status was propagated (update responses only)
+  violationsUpdated?: number
 }
 
 export function listIncidents() {
@@ -28,3 +30,7 @@ export function createIncident(input: Omit<IncidentDTO, 'id'>) {
 export function updateIncident(id: number, input: Partial<IncidentDTO>) {
   return http.put<IncidentDTO>(`/api/incidents/${id}`, input)
 }
+
+export function updateIncidentsStatus(ids: number[], status: string) {
+  return http.put<{ updated: number; violationsUpdated: number }>('/api/incidents/status', { ids, status })
+}
@@ -0,0 +1,50 @@
+import { http } from './http'
+
+export type JobStatus = 'queued' | 'running' | 'done' | 'failed' | 'cancelled'
+
+export type JobDTO<R = unknown> = {
+  id: string
+  kind: 'backup' | 'restore' | 'archive' | 'import-students' | 'certificates'
+  status: JobStatus
+  progress: { done: number; total: number | null; message: string | null }
+  result: R | null
+  error: string | null
+  cancelRequested: boolean
+  attempts: number // > 1 when the job was requeued after a backend restart
+  createdAt: string
+  startedAt: string | null
+  finishedAt: string | null
+}
+
+export function getJob<R = unknown>(id: string) {
+  return http.get<JobDTO<R>>(`/api/jobs/${id}`)
+}
+
+export function listJobs(params?: { status?: JobStatus; kind?: string; limit?: number }) {
+  const qs = new URLSearchParams()
+  if (params?.status) qs.set('status', params.status)
+  if (params?.kind) qs.set('kind', params.kind)
+  if (params?.limit != null) qs.set('limit', String(params.limit))
+  const suffix = qs.toString() ? `?${qs.toString()}` : ''
+  return http.get<JobDTO[]>(`/api/jobs${suffix}`)
+}
+
+// A queued job is cancelled at once; a running one stops at its next progress check
+export function cancelJob(id: string) {
+  return http.post<JobDTO>(`/api/jobs/${id}/cancel`, {})
+}
+
+// The zip (or other file) a finished job produced
+export function downloadJobFile(id: string) {
+  return http.blob(`/api/jobs/${id}/file`)
+}
+
+// Poll until the job finishes; onProgress sees every update
+export async function waitForJob<R = unknown>(id: string, onProgress?: (job: JobDTO<R>) => void, intervalMs = 1000) {
+  for (;;) {
+    const job = await getJob<R>(id)
+    onProgress?.(job)
+    if (job.status !== 'queued' && job.status !== 'running') return job
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+  }
+}
@@ -9,6 +9,8 @@ export type SessionDTO = {
   status?: string
   notes?: string
   participants: any[]
+  // Number of violations whose status was propagated (update responses only)
+  violationsUpdated?: number
   summary?: string
 }
 
@@ -23,3 +25,7 @@ export function createSession(input: Omit<SessionDTO, 'id'>) {
 export function updateSession(id: number, input: Partial<SessionDTO>) {
   return http.put<SessionDTO>(`/api/sessions/${id}`, input)
 }
+
+export function updateSessionsStatus(ids: number[], status: string) {
+  return http.put<{ updated: number; violationsUpdated: number }>('/api/sessions/status', { ids, status })
+}
@@ -1,4 +1,9 @@
 import { http } from './http'
+import type { JobDTO } from './api.jobs'
+import type { ViolationDTO } from './api.violations'
+import type { AppointmentDTO } from './api.appointments'
+import type { IncidentDTO } from './api.incidents'
+import type { SessionDTO } from './api.sessions'
 
 export type StudentDTO = {
   id: number
@@ -22,6 +27,35 @@ export function getStudent(id: number) {
   return http.get<StudentDTO>(`/api/students/${id}`)
 }
 
+// One section of a profile: the newest `limit` records plus counts over all of them
+export type ProfileSection<T> = { total: number; byStatus: Record<string, number>; items: T[] }
+
+export type StudentProfileDTO = {
+  student: StudentDTO
+  violations: ProfileSection<ViolationDTO>
+  appointments: ProfileSection<AppointmentDTO>
+  incidents: ProfileSection<IncidentDTO>
+  sessions: ProfileSection<SessionDTO>
+}
+
+type ProfileSectionName = 'violations' | 'appointments' | 'incidents' | 'sessions'
+
+// The student with their violations, appointments, incidents and sessions in one request.
+// `limit` caps every section's items (default 20, 0 for counts only); `limits` per section.
+export function getStudentProfile(id: number, params?: { limit?: number; limits?: Partial<Record<ProfileSectionName, number>>; includeArchived?: boolean }) {
+  const qs = new URLSearchParams()
+  if (params?.limit != null) qs.set('limit', String(params.limit))
+  for (const [name, limit] of Object.entries(params?.limits ?? {})) qs.set(`${name}Limit`, String(limit))
+  if (params?.includeArchived) qs.set('includeArchived', 'true') // closed school years too
+  const suffix = qs.toString() ? `?${qs.toString()}` : ''
+  return http.get<StudentProfileDTO>(`/api/students/${id}/profile${suffix}`)
+}
+
+// How many records of a profile section are not in one of the `closed` statuses
+export function countOpen(section: ProfileSection<unknown>, closed: string[]) {
+  return Object.entries(section.byStatus).reduce((n, [status, count]) => (closed.includes(status) ? n : n + count), 0)
+}
+
 export function createStudent(input: Omit<StudentDTO, 'id' | 'status'> & { status?: StudentDTO['status'] }) {
   return http.post<StudentDTO>('/api/students', input)
 }
@@ -34,6 +68,26 @@ export function deleteStudent(id: number) {
   return http.del(`/api/students/${id}`)
 }
 
+export type StudentImportReport = {
+  received: number
+  inserted: number
+  skipped: number
+  errors: { row: number; lrn?: string | null; error: string }[]
+}
+
+// Bulk import a CSV (camelCase or SF1 headers) or NDJSON file in one request.
+// `defaults` fill columns missing from a row, e.g. { schoolYear: '2025-2026' }.
+export function importStudents(file: Blob, contentType: 'text/csv' | 'application/x-ndjson', defaults: Record<string, string> = {}) {
+  const qs = new URLSearchParams(defaults).toString()
+  return http.upload<StudentImportReport>(`/api/students/bulk${qs ? `?${qs}` : ''}`, file, contentType)
+}
+
+// Same import on the job runner (for large files); the job's result is the report
+export function startStudentImportJob(file: Blob, contentType: 'text/csv' | 'application/x-ndjson', defaults: Record<string, string> = {}) {
+  const qs = new URLSearchParams({ ...defaults, async: 'true' }).toString()
+  return http.upload<JobDTO<StudentImportReport>>(`/api/students/bulk?${qs}`, file, contentType)
+}
+
 export function searchStudentsByName(name: string) {
   return http.get<StudentDTO[]>(`/api/students/search/name?name=${encodeURIComponent(name)}`)
 }
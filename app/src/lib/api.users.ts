@@ -15,8 +15,22 @@ export type UserDTO = {
   role: 'ADMIN' | 'COUNSELOR' | 'TEACHER' | 'STAFF'
 }
 
+export type AuthenticatedUserDTO = UserDTO & {
+  token: string
+  sessionExpiresAt: string
+}
+
 export async function authenticate(email: string, password: string) {
-  return http.post<UserDTO>('/api/users/authenticate', { email, password })
+  return http.post<AuthenticatedUserDTO>('/api/users/authenticate', { email, password })
+}
+
+// Validates the stored token; rejects (and http.ts logs out) when the session has expired
+export async function getSession() {
+  return http.get<UserDTO & { sessionExpiresAt: string }>('/api/auth/session')
+}
+
+export async function logout() {
+  return http.post<void>('/api/auth/logout', {})
 }
 
 export async function register(user: {
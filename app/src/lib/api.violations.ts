@@ -13,15 +13,16 @@ export type ViolationDTO = {
   status: 'Pending' | 'Resolved' | 'Appealed'
 }
 
-export function listViolations(params?: { studentId?: number; severity?: string; status?: string; date?: string; q?: string }) {
+export function listViolations(params?: { studentId?: number; severity?: string; status?: string; date?: string; q?: string; includeArchived?: boolean }) {
   const qs = new URLSearchParams()
   if (params?.studentId != null) qs.set('studentId', String(params.studentId))
   if (params?.severity) qs.set('severity', params.severity)
   if (params?.status) qs.set('status', params.status)
   if (params?.date) qs.set('date', params.date)
   if (params?.q) qs.set('q', params.q)
+  if (params?.includeArchived) qs.set('includeArchived', 'true') // closed school years too
   const suffix = qs.toString() ? `?${qs.toString()}` : ''
-  return http.get<ViolationDTO[]>(`/api/violations${suffix}`)
+  return http.getRows<ViolationDTO>(`/api/violations${suffix}`)
 }
 
 export function listViolationsByStudent(studentId: number) {
@@ -1,10 +1,29 @@
 export const API_URL: string = 'http://localhost:5000'
 
+// Session token issued at login (stored with the user by the login form)
+export function authToken(): string | null {
+  try {
+    return JSON.parse(localStorage.getItem('gomis_current_user') || 'null')?.token || null
+  } catch {
+    return null
+  }
+}
+
 async function request<T>(path: string, init?: RequestInit): Promise<T> {
+  const token = authToken()
   const res = await fetch(`${API_URL}${path}`, {
-    headers: { 'Content-Type': 'application/json' },
     ...init,
+    headers: {
+      'Content-Type': 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      ...(init?.headers as Record<string, string> | undefined),
+    },
   })
+  if (res.status === 401 && token) {
+    // Session expired or revoked: back to the login screen
+    localStorage.removeItem('gomis_current_user')
+    window.location.reload()
+  }
   if (!res.ok) {
     const text = await res.text().catch(() => '')
     throw new Error(`${res.status} ${res.statusText}${text ? ` - ${text}` : ''}`)
@@ -15,11 +34,46 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
   return (await res.json()) as T
 }
 
+// Rebuild the objects of a `?format=columns` list (keys sent once, then one array per row)
+export function fromColumns<T>(table: { columns: string[]; rows: unknown[][] }): T[] {
+  return table.rows.map((row) => Object.fromEntries(table.columns.map((key, i) => [key, row[i]])) as T)
+}
+
 export const http = {
   get: <T>(p: string) => request<T>(p),
+  // GET a full list in the compact columnar layout and return it as objects
+  getRows: async <T>(p: string): Promise<T[]> =>
+    fromColumns<T>(await request<{ columns: string[]; rows: unknown[][] }>(`${p}${p.includes('?') ? '&' : '?'}format=columns`)),
   post: <T>(p: string, body: unknown) => request<T>(p, { method: 'POST', body: JSON.stringify(body) }),
   put: <T>(p: string, body: unknown) => request<T>(p, { method: 'PUT', body: JSON.stringify(body) }),
   del: (p: string) => request<void>(p, { method: 'DELETE' }),
+  // Send a raw body (file, CSV text, NDJSON...) instead of JSON
+  upload: <T>(p: string, body: BodyInit, contentType: string) =>
+    request<T>(p, { method: 'POST', body, headers: { 'Content-Type': contentType } }),
+  // POST JSON and read a binary response (zip, docx...)
+  download: async (p: string, body: unknown): Promise<Blob> => {
+    const token = authToken()
+    const res = await fetch(`${API_URL}${p}`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...(token ? { Authorization: `Bearer ${token}` } : {}) },
+      body: JSON.stringify(body),
+    })
+    if (!res.ok) {
+      const text = await res.text().catch(() => '')
+      throw new Error(`${res.status} ${res.statusText}${text ? ` - ${text}` : ''}`)
+    }
+    return res.blob()
+  },
+  // GET a binary response (e.g. a finished job's file)
+  blob: async (p: string): Promise<Blob> => {
+    const token = authToken()
+    const res = await fetch(`${API_URL}${p}`, { headers: token ? { Authorization: `Bearer ${token}` } : {} })
+    if (!res.ok) {
+      const text = await res.text().catch(() => '')
+      throw new Error(`${res.status} ${res.statusText}${text ? ` - ${text}` : ''}`)
+    }
+    return res.blob()
+  },
 }
 
 
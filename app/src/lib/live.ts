@@ -0,0 +1,49 @@
+import { API_URL, authToken } from './http'
+import { emit, type DataEvent } from './events'
+import type { SyncedTable } from './api.changes'
+
+export type ChangeEventDTO = {
+  entity: SyncedTable
+  id: number
+  op: 'upsert' | 'delete'
+  version: string // /api/changes cursor right after this change
+}
+
+// Changes arriving within this window are announced once per entity
+const COALESCE_MS = 250
+
+let source: EventSource | null = null
+let timer: ReturnType<typeof setTimeout> | null = null
+const pending = new Map<SyncedTable, ChangeEventDTO[]>()
+
+function flush() {
+  timer = null
+  for (const [entity, changes] of pending) emit(`data:${entity}` as DataEvent, { remote: true, changes })
+  pending.clear()
+}
+
+// Re-emit the server's change notifications (other workstations' writes included) on the
+// local data bus, so lists refresh without polling. Call again after login to use the new token.
+export function connectLiveUpdates() {
+  disconnectLiveUpdates()
+  const token = authToken()
+  source = new EventSource(`${API_URL}/api/events${token ? `?access_token=${encodeURIComponent(token)}` : ''}`)
+  let connected = false
+  source.addEventListener('hello', () => {
+    // After a reconnect, changes may have been missed while offline
+    if (connected) emit('data:any', { remote: true })
+    connected = true
+  })
+  source.addEventListener('change', (e) => {
+    const change = JSON.parse((e as MessageEvent).data) as ChangeEventDTO
+    pending.set(change.entity, [...(pending.get(change.entity) ?? []), change])
+    if (!timer) timer = setTimeout(flush, COALESCE_MS)
+  })
+  // Too many changes at once (e.g. a bulk import): refresh everything instead
+  source.addEventListener('resync', () => emit('data:any', { remote: true }))
+}
+
+export function disconnectLiveUpdates() {
+  source?.close()
+  source = null
+}
@@ -0,0 +1,298 @@
+"""Violation counts by month, type, severity, status, grade and section.
+
+`violation_rollup` holds one row per combination of those dimensions with its count.
+Grade and section are the student's current ones. Triggers keep it equal to
+
+    SELECT substr(v.date, 1, 7), v.violation_type, v.severity, v.status, s.grade_level,
+           s.section, count(*)
+    FROM violation v LEFT JOIN student s ON s.id = v.student_id GROUP BY 1, 2, 3, 4, 5, 6
+
+in the writing transaction. Violation inserts, updates and deletes (including the status
+propagation UPDATEs and bulk statements) move one row's count. A student changing grade or
+section moves that student's counts. Reports then read a table whose size depends on the
+number of distinct combinations, not on the number of violations. Missing values are
+stored as '' (NULLs would defeat the primary key) and reported as null.
+`rebuild_rollup()` recomputes everything (`flask --app app rebuild-analytics`).
+"""
+from sqlalchemy import and_, case, cast, or_, select, text, union_all
+from sqlalchemy.orm import aliased
+
+from db import db
+
+DIMENSIONS = ('month', 'violation_type', 'severity', 'status', 'grade_level', 'section')
+KEY = ', '.join(DIMENSIONS)
+
+# API name -> rollup column; schoolYear is derived from the month
+GROUP_KEYS = {
+    'month': 'month',
+    'violationType': 'violation_type',
+    'severity': 'severity',
+    'status': 'status',
+    'gradeLevel': 'grade_level',
+    'section': 'section',
+}
+SCHOOL_YEAR = 'schoolYear'
+SCHOOL_YEAR_START = 6  # June: 2025-06 .. 2026-05 is school year 2025-2026
+
+
+class AnalyticsError(ValueError):
+    """Raised for invalid analytics query parameters."""
+
+
+def _violation_dims(row):
+    return (f"substr({row}.date, 1, 7), coalesce({row}.violation_type, ''), coalesce({row}.severity, ''), "
+            f"coalesce({row}.status, '')")
+
+
+def _sqlite_violation_delta(row, delta):
+    # The student is looked up when the violation is written; the student triggers below
+    # cover later grade/section changes. (WHERE true: SQLite needs it before ON CONFLICT.)
+    return f"""
+        INSERT INTO violation_rollup ({KEY}, count)
+        SELECT {_violation_dims(row)}, coalesce(s.grade_level, ''), coalesce(s.section, ''), {delta}
+        FROM (SELECT 1) LEFT JOIN student s ON s.id = {row}.student_id WHERE true
+        ON CONFLICT ({KEY}) DO UPDATE SET count = violation_rollup.count + excluded.count;"""
+
+
+def _sqlite_student_move(student_id, row, sign):
+    # Every violation of the student, grouped, counted under the given grade/section
+    return f"""
+        INSERT INTO violation_rollup ({KEY}, count)
+        SELECT {_violation_dims('v')}, {row[0]}, {row[1]}, {sign}count(*)
+        FROM violation v WHERE v.student_id = {student_id} GROUP BY 1, 2, 3, 4
+        ON CONFLICT ({KEY}) DO UPDATE SET count = violation_rollup.count + excluded.count;"""
+
+
+_PRUNE = 'DELETE FROM violation_rollup WHERE count <= 0;'
+_PRUNE_MONTH = "DELETE FROM violation_rollup WHERE month = substr(old.date, 1, 7) AND count <= 0;"
+_OLD_STUDENT = ("coalesce(old.grade_level, '')", "coalesce(old.section, '')")
+_NEW_STUDENT = ("coalesce(new.grade_level, '')", "coalesce(new.section, '')")
+_NO_STUDENT = ("''", "''")
+_TRACKED = ('date', 'violation_type', 'severity', 'status', 'student_id')
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS violation_rollup_ai AFTER INSERT ON violation BEGIN
+        {_sqlite_violation_delta('new', 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS violation_rollup_au AFTER UPDATE ON violation
+    WHEN {' OR '.join(f'old.{c} IS NOT new.{c}' for c in _TRACKED)} BEGIN
+        {_sqlite_violation_delta('old', -1)}
+        {_sqlite_violation_delta('new', 1)}
+        {_PRUNE_MONTH}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS violation_rollup_ad AFTER DELETE ON violation BEGIN
+        {_sqlite_violation_delta('old', -1)}
+        {_PRUNE_MONTH}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS violation_rollup_student_au AFTER UPDATE OF grade_level, section ON student
+    WHEN old.grade_level IS NOT new.grade_level OR old.section IS NOT new.section BEGIN
+        {_sqlite_student_move('old.id', _OLD_STUDENT, '-')}
+        {_sqlite_student_move('new.id', _NEW_STUDENT, '')}
+        {_PRUNE}
+    END
+    """,
+    # Violations keep their student_id when the student is deleted (and pick up a student
+    # re-created with the same id)
+    f"""
+    CREATE TRIGGER IF NOT EXISTS violation_rollup_student_ad AFTER DELETE ON student BEGIN
+        {_sqlite_student_move('old.id', _OLD_STUDENT, '-')}
+        {_sqlite_student_move('old.id', _NO_STUDENT, '')}
+        {_PRUNE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS violation_rollup_student_ai AFTER INSERT ON student
+    WHEN EXISTS (SELECT 1 FROM violation WHERE student_id = new.id) BEGIN
+        {_sqlite_student_move('new.id', _NO_STUDENT, '-')}
+        {_sqlite_student_move('new.id', _NEW_STUDENT, '')}
+        {_PRUNE}
+    END
+    """,
+]
+
+# PostgreSQL: row-level triggers calling plpgsql functions with the same logic
+POSTGRES_FUNCTIONS = [
+    f"""
+    CREATE OR REPLACE FUNCTION violation_rollup_move(student integer, from_grade text, from_section text,
+                                                     to_grade text, to_section text) RETURNS void AS $$
+    BEGIN
+        IF (from_grade, from_section) = (to_grade, to_section)
+                OR NOT EXISTS (SELECT 1 FROM violation WHERE student_id = student) THEN
+            RETURN;
+        END IF;
+        INSERT INTO violation_rollup ({KEY}, count)
+        SELECT {_violation_dims('v')}, g.grade_level, g.section, g.sign * count(*)
+        FROM violation v CROSS JOIN (VALUES (from_grade, from_section, -1), (to_grade, to_section, 1))
+            AS g (grade_level, section, sign)
+        WHERE v.student_id = student GROUP BY 1, 2, 3, 4, 5, 6, g.sign
+        ON CONFLICT ({KEY}) DO UPDATE SET count = violation_rollup.count + excluded.count;
+        {_PRUNE}
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION violation_rollup_violation() RETURNS trigger AS $$
+    DECLARE
+        s record;
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT coalesce(grade_level, '') AS grade_level, coalesce(section, '') AS section INTO s
+            FROM (SELECT 1) AS one LEFT JOIN student ON student.id = OLD.student_id;
+            INSERT INTO violation_rollup ({KEY}, count)
+            VALUES ({_violation_dims('OLD')}, s.grade_level, s.section, -1)
+            ON CONFLICT ({KEY}) DO UPDATE SET count = violation_rollup.count + excluded.count;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT coalesce(grade_level, '') AS grade_level, coalesce(section, '') AS section INTO s
+            FROM (SELECT 1) AS one LEFT JOIN student ON student.id = NEW.student_id;
+            INSERT INTO violation_rollup ({KEY}, count)
+            VALUES ({_violation_dims('NEW')}, s.grade_level, s.section, 1)
+            ON CONFLICT ({KEY}) DO UPDATE SET count = violation_rollup.count + excluded.count;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM violation_rollup WHERE month = substr(OLD.date, 1, 7) AND count <= 0;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION violation_rollup_student() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM violation_rollup_move(NEW.id, '', '', coalesce(NEW.grade_level, ''), coalesce(NEW.section, ''));
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM violation_rollup_move(OLD.id, coalesce(OLD.grade_level, ''), coalesce(OLD.section, ''), '', '');
+        ELSIF OLD.grade_level IS DISTINCT FROM NEW.grade_level OR OLD.section IS DISTINCT FROM NEW.section THEN
+            PERFORM violation_rollup_move(NEW.id, coalesce(OLD.grade_level, ''), coalesce(OLD.section, ''),
+                                          coalesce(NEW.grade_level, ''), coalesce(NEW.section, ''));
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+POSTGRES_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE TRIGGER violation_rollup AFTER INSERT OR DELETE OR UPDATE OF {', '.join(_TRACKED)}
+    ON violation FOR EACH ROW EXECUTE FUNCTION violation_rollup_violation()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER violation_rollup_student AFTER INSERT OR DELETE OR UPDATE OF grade_level, section
+    ON student FOR EACH ROW EXECUTE FUNCTION violation_rollup_student()
+    """,
+]
+
+REBUILD = f"""
+INSERT INTO violation_rollup ({KEY}, count)
+SELECT substr(v.date, 1, 7), coalesce(v.violation_type, ''), coalesce(v.severity, ''), coalesce(v.status, ''),
+       coalesce(s.grade_level, ''), coalesce(s.section, ''), count(*)
+FROM violation v LEFT JOIN student s ON s.id = v.student_id
+GROUP BY 1, 2, 3, 4, 5, 6
+"""
+
+
+def init_analytics():
+    """Create the rollup triggers if missing."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        if dialect == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                conn.execute(text(trigger))
+        elif dialect == 'postgresql':
+            for function in POSTGRES_FUNCTIONS:
+                conn.execute(text(function))
+            for trigger in POSTGRES_TRIGGERS:
+                conn.execute(text(trigger))
+
+
+def rebuild_rollup():
+    """Recompute the rollup from the violation table; returns the number of rollup rows."""
+    with db.engine.begin() as conn:
+        if db.engine.dialect.name == 'postgresql':
+            conn.execute(text('LOCK TABLE violation, student IN SHARE MODE'))
+        conn.execute(text('DELETE FROM violation_rollup'))
+        conn.execute(text(REBUILD))
+        return conn.execute(text('SELECT count(*) FROM violation_rollup')).scalar()
+
+
+def _list(value):
+    return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+
+def _month(value, name):
+    if len(value) != 7 or value[4] != '-' or not (value[:4] + value[5:]).isdigit():
+        raise AnalyticsError(f'Invalid {name}: {value!r} (expected yyyy-MM)')
+    return value
+
+
+def _school_year_months(value):
+    try:
+        start, end = (int(part) for part in value.split('-'))
+    except ValueError:
+        start = end = None
+    if start is None or end != start + 1:
+        raise AnalyticsError(f'Invalid schoolYear: {value!r} (expected e.g. 2025-2026)')
+    return f'{start}-{SCHOOL_YEAR_START:02d}', f'{end}-{SCHOOL_YEAR_START - 1:02d}'
+
+
+def school_year_of(month_column):
+    year = cast(db.func.substr(month_column, 1, 4), db.Integer)
+    start = case((cast(db.func.substr(month_column, 6, 2), db.Integer) >= SCHOOL_YEAR_START, year), else_=year - 1)
+    return cast(start, db.String) + '-' + cast(start + 1, db.String)
+
+
+def violation_counts(args):
+    """Counts grouped by `groupBy` and filtered by the other query args, as API dicts.
+
+    With `includeArchived=true` the archive's rollup is added to the live one.
+    """
+    from archive import archive_table, include_archived
+    from models import ViolationRollup as R
+
+    if include_archived(args):
+        table = R.__table__
+        R = aliased(R, union_all(select(table), select(archive_table(table))).subquery('violation_rollup'))
+
+    group_by = _list(args.get('groupBy')) or ['violationType']
+    unknown = [k for k in group_by if k not in GROUP_KEYS and k != SCHOOL_YEAR]
+    if unknown:
+        raise AnalyticsError('Unknown groupBy keys: ' + ', '.join(unknown) +
+                             ' (use ' + ', '.join([*GROUP_KEYS, SCHOOL_YEAR]) + ')')
+    group_by = list(dict.fromkeys(group_by))
+
+    filters = []
+    # Month bounds and school years are ranges over the leading primary key column
+    if args.get('from'):
+        filters.append(R.month >= _month(args['from'], 'from'))
+    if args.get('to'):
+        filters.append(R.month <= _month(args['to'], 'to'))
+    years = [_school_year_months(y) for y in _list(args.get('schoolYear'))]
+    if years:
+        filters.append(or_(*[and_(R.month >= start, R.month <= end) for start, end in years]))
+    for key, column in GROUP_KEYS.items():
+        values = _list(args.get(key)) if key != 'month' else []
+        if values:
+            filters.append(getattr(R, column).in_(values))
+
+    columns = [school_year_of(R.month) if k == SCHOOL_YEAR else getattr(R, GROUP_KEYS[k]) for k in group_by]
+    count = db.func.sum(R.count)
+    query = db.session.query(*columns, count).filter(*filters).group_by(*columns)
+    # Time series come back in time order, everything else biggest first
+    if 'month' in group_by or SCHOOL_YEAR in group_by:
+        query = query.order_by(*columns)
+    else:
+        query = query.order_by(count.desc(), *columns)
+    rows = [
+        {**{k: (v if v != '' else None) for k, v in zip(group_by, row[:-1])}, 'count': int(row[-1])}
+        for row in query.all()
+    ]
+    return {'groupBy': group_by, 'total': sum(r['count'] for r in rows), 'rows': rows}
@@ -0,0 +1,318 @@
+"""School-year archive: closed school years move out of the live tables into a second SQLite database.
+
+The archive (GOMIS_ARCHIVE_PATH, default gomis-archive.db next to the main database) is
+attached to every connection as `archive`. It has the live tables' columns and indexes,
+without the unique constraints (an LRN can come back in a later year), and its own
+violation_rollup. Archived rows keep their ids; the live tables never reuse one
+(migration 0011).
+
+archive_closed_years() moves the violations, appointments, incidents (with their
+participants) and sessions dated before the end of the archived school years. It also
+moves the students of those school years who are no longer ACTIVE and have no live
+violations left. Rows move BATCH_SIZE at a time in two short transactions: one copies
+the batch into the archive, the next deletes it from the live tables. Neither database
+is write-locked for longer than one batch. A crash in between leaves the batch in both
+places until the next run, and a row edited in between stays live until the next run.
+The live delete triggers keep the ETag counters, the rollup and the change log current,
+so clients see archived rows leave their lists as deletes.
+
+purge_expired(cutoff) deletes the rows older than the retention window (the
+retentionType/retentionValue preference) from both databases, in the same batches.
+
+List routes, the student status count, the student profile and the violation analytics
+take `?includeArchived=true` to also read the archive.
+"""
+import os
+import time
+from datetime import date
+
+from sqlalchemy import MetaData, UniqueConstraint, event, text
+from sqlalchemy.schema import CreateIndex
+
+from analytics import KEY, SCHOOL_YEAR_START
+from db import db
+
+ARCHIVE = 'archive'  # schema name of the attached archive database
+DEFAULT_FILENAME = 'gomis-archive.db'
+BATCH_SIZE = 500  # rows per transaction
+BATCH_PAUSE = 0.01  # seconds between batches, so waiting writers get the lock
+DATED_TABLES = ('violation', 'appointment', 'incident', 'session')
+PARENT_TABLES = ('incident', 'session')  # their participant rows move along
+TRUE_VALUES = ('1', 'true', 'yes')
+
+_metadata = MetaData()
+_tables = {}
+
+ARCHIVE_ROLLUP = f"""
+INSERT INTO {ARCHIVE}.violation_rollup ({KEY}, count)
+SELECT substr(v.date, 1, 7), coalesce(v.violation_type, ''), coalesce(v.severity, ''), coalesce(v.status, ''),
+       coalesce(s.grade_level, a.grade_level, ''), coalesce(s.section, a.section, ''), count(*)
+FROM {ARCHIVE}.violation v
+LEFT JOIN main.student s ON s.id = v.student_id
+LEFT JOIN {ARCHIVE}.student a ON a.id = v.student_id
+GROUP BY 1, 2, 3, 4, 5, 6
+"""
+
+
+class ArchiveError(ValueError):
+    """Raised for archive requests that cannot be served (no SQLite database, bad school year...)."""
+
+
+def archive_path(engine):
+    """The archive database file for a file-based SQLite `engine`; None for other databases."""
+    if engine.dialect.name != 'sqlite' or not engine.url.database or engine.url.database == ':memory:':
+        return None
+    return os.environ.get('GOMIS_ARCHIVE_PATH') or os.path.join(
+        os.path.dirname(os.path.abspath(engine.url.database)), DEFAULT_FILENAME)
+
+
+def enabled():
+    return archive_path(db.engine) is not None
+
+
+def init_engine(engine):
+    """Attach the archive to every new connection of a file-based SQLite `engine`."""
+    path = archive_path(engine)
+    if path is None:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def attach_archive(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f'ATTACH DATABASE ? AS {ARCHIVE}', (path,))
+            cursor.execute(f'PRAGMA {ARCHIVE}.synchronous=NORMAL')
+        finally:
+            cursor.close()
+
+
+def _live_tables():
+    from models import Appointment, Incident, Participant, Session, Student, Violation, ViolationRollup
+
+    return [m.__table__ for m in (Student, Appointment, Violation, Incident, Session, Participant, ViolationRollup)]
+
+
+def archive_table(table):
+    """The archive copy of a live Table, e.g. for queries over both."""
+    copy = _tables.get(table.name)
+    if copy is None:
+        copy = table.to_metadata(_metadata, schema=ARCHIVE)
+        for constraint in [c for c in copy.constraints if isinstance(c, UniqueConstraint)]:
+            copy.constraints.discard(constraint)
+        for index in copy.indexes:
+            index.unique = False
+        _tables[table.name] = copy
+    return copy
+
+
+def init_archive():
+    """Create the archive tables if missing and add the columns and indexes later migrations added to the live ones."""
+    if not enabled():
+        return
+    tables = [archive_table(t) for t in _live_tables()]
+    with db.engine.connect() as conn:
+        conn.exec_driver_sql(f'PRAGMA {ARCHIVE}.journal_mode=WAL')
+    with db.engine.begin() as conn:
+        _metadata.create_all(conn, tables=tables)
+        for table in tables:
+            existing = {row[1] for row in conn.execute(text(f'PRAGMA {ARCHIVE}.table_info("{table.name}")'))}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.execute(text(f'ALTER TABLE {ARCHIVE}."{table.name}" '
+                                      f'ADD COLUMN "{column.name}" {column.type.compile(conn.dialect)}'))
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def include_archived(args):
+    """Whether a request asks for archived rows too (?includeArchived=true)."""
+    if (args.get('includeArchived') or '').lower() not in TRUE_VALUES:
+        return False
+    if not enabled():
+        raise ArchiveError('includeArchived needs a SQLite database')
+    return True
+
+
+def from_archive(query):
+    """The same ORM query, run against the archive tables."""
+    return query.execution_options(schema_translate_map={None: ARCHIVE})
+
+
+def school_year_start(today=None):
+    """First day (yyyy-MM-dd) of the school year `today` falls in."""
+    today = today or date.today()
+    year = today.year if today.month >= SCHOOL_YEAR_START else today.year - 1
+    return date(year, SCHOOL_YEAR_START, 1).isoformat()
+
+
+def archive_boundary(school_year=None, today=None):
+    """The day after the last archived school year ('2023-2024' and earlier, or every closed one)."""
+    current = school_year_start(today)
+    if not school_year:
+        return current
+    try:
+        start, end = (int(part) for part in school_year.split('-'))
+    except ValueError:
+        start = end = None
+    if start is None or end != start + 1:
+        raise ArchiveError(f'Invalid schoolYear: {school_year!r} (expected e.g. 2023-2024)')
+    boundary = date(end, SCHOOL_YEAR_START, 1).isoformat()
+    if boundary > current:
+        raise ArchiveError(f'School year {school_year} is not closed yet')
+    return boundary
+
+
+def _ended_by(schema, boundary_param):
+    # Students of a school year ('2023-2024') that ended before the boundary date
+    return (f"{schema}.student.school_year GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9][0-9][0-9]' "
+            f"AND substr({schema}.student.school_year, 6, 4) || '-{SCHOOL_YEAR_START:02d}-01' <= :{boundary_param}")
+
+
+def _inactive(schema):
+    return f"upper(coalesce({schema}.student.status, '')) != 'ACTIVE'"
+
+
+def _no_violations(schema, source):
+    return f'NOT EXISTS (SELECT 1 FROM {source}.violation v WHERE v.student_id = {schema}.student.id)'
+
+
+def _columns(table, skip=()):
+    return ', '.join(f'"{c.name}"' for c in table.columns if c.name not in skip)
+
+
+def _batches(schema, table, where, params):
+    """Yield the ids of the matching rows, BATCH_SIZE at a time, pausing in between."""
+    after = 0
+    while True:
+        with db.engine.connect() as conn:
+            ids = conn.execute(text(f'SELECT id FROM {schema}."{table}" WHERE ({where}) AND id > :after '
+                                    f'ORDER BY id LIMIT {BATCH_SIZE}'), {**params, 'after': after}).scalars().all()
+        if not ids:
+            return
+        yield ', '.join(str(i) for i in ids)
+        after = ids[-1]
+        time.sleep(BATCH_PAUSE)
+
+
+def _move(table, where, params):
+    """Move the live rows of `table` matching `where` into the archive; returns how many moved."""
+    from models import Participant
+
+    name = table.name
+    columns = _columns(table)
+    # Only delete rows still equal to their copy; one edited meanwhile is moved next time
+    same = ' AND '.join(f'a."{c.name}" IS main."{name}"."{c.name}"' for c in table.columns)
+    participant_columns = _columns(Participant.__table__, skip=('id',))
+    moved = 0
+    for id_list in _batches('main', name, where, params):
+        with db.engine.begin() as conn:
+            conn.execute(text(f'INSERT OR REPLACE INTO {ARCHIVE}."{name}" ({columns}) '
+                              f'SELECT {columns} FROM main."{name}" WHERE id IN ({id_list})'))
+            if name in PARENT_TABLES:
+                conn.execute(text(f'DELETE FROM {ARCHIVE}.participant '
+                                  f'WHERE parent_type = :type AND parent_id IN ({id_list})'), {'type': name})
+                conn.execute(text(f'INSERT INTO {ARCHIVE}.participant ({participant_columns}) '
+                                  f'SELECT {participant_columns} FROM main.participant '
+                                  f'WHERE parent_type = :type AND parent_id IN ({id_list})'), {'type': name})
+        # The copy is committed before the live rows go
+        with db.engine.begin() as conn:
+            moved += conn.execute(text(f'DELETE FROM main."{name}" WHERE id IN ({id_list}) AND EXISTS (SELECT 1 '
+                                       f'FROM {ARCHIVE}."{name}" a WHERE a.id = main."{name}".id AND {same})')).rowcount
+            if name in PARENT_TABLES:
+                conn.execute(text(f'DELETE FROM main.participant WHERE parent_type = :type AND parent_id IN ({id_list}) '
+                                  f'AND NOT EXISTS (SELECT 1 FROM main."{name}" p WHERE p.id = participant.parent_id)'),
+                             {'type': name})
+    return moved
+
+
+def _purge(schema, name, where, params):
+    """Delete the rows of `schema`.`name` matching `where`; returns how many were deleted."""
+    deleted = 0
+    for id_list in _batches(schema, name, where, params):
+        with db.engine.begin() as conn:
+            deleted += conn.execute(text(f'DELETE FROM {schema}."{name}" WHERE id IN ({id_list})')).rowcount
+            if name in PARENT_TABLES:
+                conn.execute(text(f'DELETE FROM {schema}.participant '
+                                  f'WHERE parent_type = :type AND parent_id IN ({id_list})'), {'type': name})
+    return deleted
+
+
+def rebuild_archive_rollup():
+    """Recompute the archive's violation counts (after archived violations were added or purged)."""
+    with db.engine.begin() as conn:
+        conn.execute(text(f'DELETE FROM {ARCHIVE}.violation_rollup'))
+        conn.execute(text(ARCHIVE_ROLLUP))
+
+
+def archive_closed_years(boundary, progress=None):
+    """Move the records dated before `boundary` (yyyy-MM-dd) and the students of the school
+    years that ended by then into the archive; returns the rows moved per table.
+
+    `progress(done, total, message)` is called before each table; raising from it stops
+    between tables, with every batch moved so far complete.
+    """
+    from models import Appointment, Incident, Session, Student, Violation
+
+    if not enabled():
+        raise ArchiveError('The archive needs a file-based SQLite database')
+    params = {'boundary': boundary}
+    moved = {}
+    for done, model in enumerate((Violation, Appointment, Incident, Session)):
+        if progress:
+            progress(done, 5, f'Archiving {model.__tablename__}')
+        moved[model.__tablename__] = _move(model.__table__, 'date < :boundary', params)
+    if progress:
+        progress(4, 5, 'Archiving student')
+    moved['student'] = _move(Student.__table__, f"{_ended_by('main', 'boundary')} AND {_inactive('main')} "
+                                                f"AND {_no_violations('main', 'main')}", params)
+    if moved['violation']:
+        rebuild_archive_rollup()
+    return moved
+
+
+def purge_expired(cutoff):
+    """Delete the records dated before `cutoff` (a datetime, see backup.retention_cutoff) from
+    the live tables and the archive, and the inactive students of school years that ended by
+    then with no violations left; returns the rows deleted per database and table."""
+    if cutoff is None:
+        return {}
+    params = {'cutoff': cutoff.date().isoformat()}
+    purged = {}
+    for key, schema in (('live', 'main'), ('archive', ARCHIVE)):
+        counts = purged[key] = {}
+        for name in DATED_TABLES:
+            counts[name] = _purge(schema, name, 'date < :cutoff', params)
+        counts['student'] = _purge(schema, 'student', f"{_ended_by(schema, 'cutoff')} AND {_inactive(schema)} "
+                                                      f"AND {_no_violations(schema, 'main')} "
+                                                      f"AND {_no_violations(schema, ARCHIVE)}", params)
+    touched = [name for name, n in purged['archive'].items() if n]
+    if 'violation' in touched:
+        rebuild_archive_rollup()
+    if touched:
+        from versions import bump_versions
+        bump_versions(touched)  # the triggers only see the live tables
+    return purged
+
+
+def has_archived_rows():
+    """Whether the archive holds any records."""
+    with db.engine.connect() as conn:
+        return any(conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM {ARCHIVE}."{name}")')).scalar()
+                   for name in DATED_TABLES + ('student',))
+
+
+def archive_stats():
+    """Row counts per table in the live database and in the archive."""
+    from models import Appointment, Incident, Session, Student, Violation
+
+    if not enabled():
+        raise ArchiveError('The archive needs a file-based SQLite database')
+    stats = {}
+    with db.engine.connect() as conn:
+        for model in (Student, Appointment, Violation, Incident, Session):
+            name = model.__tablename__
+            stats[name] = {
+                'live': conn.execute(text(f'SELECT count(*) FROM main."{name}"')).scalar(),
+                'archived': conn.execute(text(f'SELECT count(*) FROM {ARCHIVE}."{name}"')).scalar(),
+            }
+    return {'path': archive_path(db.engine), 'currentSchoolYearStart': school_year_start(), 'tables': stats}
@@ -0,0 +1,180 @@
+"""Password hashing off the request threads, and signed session tokens.
+
+Hashing (scrypt/PBKDF2) is CPU-bound by design. It runs on a small pool so a burst of
+logins can use at most HASH_WORKERS cores. At most HASH_QUEUE more requests wait for
+it, and any beyond that are turned away with HashPoolBusy (the route answers 503)
+instead of piling up.
+
+After a login the client sends `Authorization: Bearer <token>`. The token is a random
+session id signed with the app secret, so forged tokens are rejected without touching the
+database. Valid ones cost one primary-key lookup. Sessions expire after IDLE_TIMEOUT of
+inactivity when the user's sessionTimeout preference is on, and after MAX_AGE either way.
+"""
+import functools
+import os
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app, g, jsonify, request
+from itsdangerous import BadSignature, Signer
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from db import db
+
+HASH_WORKERS = int(os.environ.get('GOMIS_HASH_WORKERS') or 2)
+HASH_QUEUE = int(os.environ.get('GOMIS_HASH_QUEUE') or 32)
+HASH_QUEUE_WAIT = 2.0  # seconds a request waits for a queue slot before giving up
+
+IDLE_TIMEOUT = timedelta(minutes=30)  # "Auto-logout after 30 minutes of inactivity"
+MAX_AGE = timedelta(days=7)
+TOUCH_INTERVAL = timedelta(minutes=1)  # write last_seen_at at most this often
+
+# Endpoints that ignore the bearer token (a stale token must not block signing in again)
+PUBLIC_ENDPOINTS = {'api.index', 'api.authenticate_user', 'api.create_user'}
+# EventSource cannot send headers, so the event stream also takes the token as ?access_token=
+QUERY_TOKEN_ENDPOINTS = {'api.event_stream'}
+
+
+class HashPoolBusy(Exception):
+    """Raised when the hashing queue is full; retry later."""
+
+
+_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix='gomis-hash')
+_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE)
+
+
+def _offload(fn, *args):
+    if not _slots.acquire(timeout=HASH_QUEUE_WAIT):
+        raise HashPoolBusy()
+    try:
+        future = _pool.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda f: _slots.release())
+    return future.result()
+
+
+def hash_password(password):
+    return _offload(generate_password_hash, password)
+
+
+@functools.cache
+def _dummy_hash():
+    return generate_password_hash(secrets.token_hex(8))
+
+
+def verify_password(password_hash, password):
+    # An unknown email is checked against a dummy hash, so a miss takes as long as a wrong password
+    return _offload(check_password_hash, password_hash or _dummy_hash(), password) and bool(password_hash)
+
+
+def _signer():
+    return Signer(current_app.secret_key, salt='gomis-session')
+
+
+def create_session(user_id, idle_timeout):
+    """Start a session for `user_id`; return (token, session). Caller commits."""
+    from models import AuthSession
+
+    now = datetime.utcnow()
+    session = AuthSession(
+        id=secrets.token_urlsafe(24),
+        user_id=user_id,
+        created_at=now,
+        last_seen_at=now,
+        idle_timeout=int(IDLE_TIMEOUT.total_seconds()) if idle_timeout else None,
+    )
+    db.session.add(session)
+    return _signer().sign(session.id).decode(), session
+
+
+def session_expires_at(session):
+    expires = session.created_at + MAX_AGE
+    if session.idle_timeout:
+        expires = min(expires, session.last_seen_at + timedelta(seconds=session.idle_timeout))
+    return expires
+
+
+def resolve_token(token):
+    """The live AuthSession for `token` (sliding its idle timer), or None."""
+    from models import AuthSession
+
+    try:
+        session_id = _signer().unsign(token).decode()
+    except BadSignature:
+        return None
+    session = db.session.get(AuthSession, session_id)
+    if session is None:
+        return None
+    now = datetime.utcnow()
+    if now >= session_expires_at(session):
+        db.session.delete(session)
+        db.session.commit()
+        return None
+    if now - session.last_seen_at >= TOUCH_INTERVAL:
+        session.last_seen_at = now
+        db.session.commit()
+    return session
+
+
+def bearer_token():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[7:].strip()
+    if request.endpoint in QUERY_TOKEN_ENDPOINTS:
+        return request.args.get('access_token') or None
+    return None
+
+
+def load_session():
+    """before_request hook: set g.auth_session from the bearer token.
+
+    A request with an invalid or expired token gets 401, so the client can send the user
+    back to the login screen. Requests without a token are only rejected when
+    GOMIS_REQUIRE_AUTH is set.
+    """
+    g.auth_session = None
+    if request.method == 'OPTIONS' or request.endpoint in PUBLIC_ENDPOINTS:
+        return None
+    token = bearer_token()
+    if token:
+        g.auth_session = resolve_token(token)
+        if g.auth_session is None:
+            return jsonify({'error': 'Session expired'}), 401
+    elif os.environ.get('GOMIS_REQUIRE_AUTH'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return None
+
+
+def _secret_key(app):
+    key = os.environ.get('GOMIS_SECRET_KEY')
+    if key:
+        return key
+    # Keep a generated key in the instance folder so sessions survive restarts
+    path = os.path.join(app.instance_path, 'secret_key')
+    if not os.path.exists(path):
+        os.makedirs(app.instance_path, exist_ok=True)
+        try:
+            # Readable by the owner only; O_EXCL so a concurrent start keeps the first key
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            pass
+        else:
+            with os.fdopen(fd, 'w') as f:
+                f.write(secrets.token_hex(32))
+    with open(path) as f:
+        return f.read().strip()
+
+
+def init_app(app):
+    app.secret_key = _secret_key(app)
+    app.before_request(load_session)
+
+    @app.errorhandler(HashPoolBusy)
+    def hash_pool_busy(e):
+        response = jsonify({'error': 'Too many sign-in requests, try again shortly'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
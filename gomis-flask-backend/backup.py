@@ -0,0 +1,312 @@
+"""Online, page-level incremental backups of the SQLite database.
+
+Snapshots are taken with SQLite's online backup API a few hundred pages at a time, so
+writers keep working while a backup runs and the copy is still consistent (the API
+restarts the copy if the source changes underneath it). Every backup also stores a hash
+of each database page. The next backup only writes the pages whose hash changed
+(an "incremental"), until FULL_EVERY incrementals have been chained and a new full
+snapshot starts the next chain.
+
+The school-year archive database (see archive.py), when there is one, is backed up
+alongside it in the same way. Its copy is listed in the manifest under `archive`, and a
+restore replaces both files, so archived rows are never lost or restored twice. Backups,
+restores and archiving run one at a time in the job runner's maintenance lane, and
+nothing else writes the archive, so the two snapshots always match.
+
+Files in the backup directory, per backup id:
+  gomis-<id>.json      manifest (type, parent, page size/count, sizes; `archive` likewise)
+  gomis-<id>.full.gz   gzip of the whole database file (full backups)
+  gomis-<id>.incr.gz   gzip of (page number, page bytes) records (incrementals)
+  gomis-<id>.pages     page hashes, used to diff the next backup against
+  gomis-<id>.archive.* the same for the archive database
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+from datetime import datetime, timedelta
+
+BACKUP_STEP_PAGES = 256  # pages copied per backup step before yielding to writers
+BACKUP_STEP_SLEEP = 0.005
+FULL_EVERY = 6  # incrementals per chain before the next full snapshot
+HASH_SIZE = 16
+PREFIX = 'gomis-'
+ARCHIVE_PART = '.archive'  # file name part of the archive database's copy
+
+_PAGE_NO = struct.Struct('>I')
+
+
+class BackupError(Exception):
+    """Raised for backup/restore requests that cannot be served (bad path, unknown id...)."""
+
+
+def sqlite_path(engine):
+    if engine.dialect.name != 'sqlite' or not engine.url.database or engine.url.database == ':memory:':
+        raise BackupError('Backups are only supported for file-based SQLite databases')
+    return engine.url.database
+
+
+def _path(dest_dir, backup_id, suffix):
+    return os.path.join(dest_dir, f'{PREFIX}{backup_id}{suffix}')
+
+
+def _new_id():
+    return datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+
+
+def snapshot(db_path, target_path):
+    """Copy the live database into `target_path` with the online backup API."""
+    src = sqlite3.connect(db_path)
+    dst = sqlite3.connect(target_path)
+    try:
+        src.backup(dst, pages=BACKUP_STEP_PAGES, sleep=BACKUP_STEP_SLEEP)
+        page_size = dst.execute('PRAGMA page_size').fetchone()[0]
+    finally:
+        dst.close()
+        src.close()
+    return page_size
+
+
+def iter_pages(path, page_size):
+    with open(path, 'rb') as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                return
+            yield page
+
+
+def page_hash(page):
+    return hashlib.blake2b(page, digest_size=HASH_SIZE).digest()
+
+
+def read_hashes(dest_dir, backup_id, part=''):
+    with open(_path(dest_dir, backup_id, part + '.pages'), 'rb') as f:
+        data = f.read()
+    return [data[i:i + HASH_SIZE] for i in range(0, len(data), HASH_SIZE)]
+
+
+def list_backups(dest_dir):
+    """Manifests in `dest_dir`, oldest first."""
+    if not os.path.isdir(dest_dir):
+        return []
+    manifests = []
+    for name in os.listdir(dest_dir):
+        if name.startswith(PREFIX) and name.endswith('.json'):
+            with open(os.path.join(dest_dir, name)) as f:
+                manifests.append(json.load(f))
+    return sorted(manifests, key=lambda m: m['id'])
+
+
+def get_manifest(dest_dir, backup_id):
+    path = _path(dest_dir, backup_id, '.json')
+    if not os.path.exists(path):
+        raise BackupError(f'Unknown backup {backup_id}')
+    with open(path) as f:
+        return json.load(f)
+
+
+def _backup_file(db_path, dest_dir, backup_id, part, parent):
+    """Write the full or incremental copy of one database file; return its manifest section.
+
+    `parent` is the parent backup's section for the same file, or None for a full copy.
+    """
+    fd, tmp = tempfile.mkstemp(suffix='.db', dir=dest_dir)
+    os.close(fd)
+    try:
+        page_size = snapshot(db_path, tmp)
+        previous = None
+        if parent is not None and parent['pageSize'] == page_size:
+            previous = read_hashes(dest_dir, parent['id'], part)
+
+        hashes = []
+        changed = 0
+        if previous is None:
+            data_path = _path(dest_dir, backup_id, part + '.full.gz')
+            with gzip.open(data_path, 'wb') as out:
+                for page in iter_pages(tmp, page_size):
+                    hashes.append(page_hash(page))
+                    out.write(page)
+            changed = len(hashes)
+        else:
+            data_path = _path(dest_dir, backup_id, part + '.incr.gz')
+            with gzip.open(data_path, 'wb') as out:
+                for number, page in enumerate(iter_pages(tmp, page_size)):
+                    digest = page_hash(page)
+                    hashes.append(digest)
+                    if number >= len(previous) or previous[number] != digest:
+                        out.write(_PAGE_NO.pack(number))
+                        out.write(page)
+                        changed += 1
+        with open(_path(dest_dir, backup_id, part + '.pages'), 'wb') as f:
+            f.write(b''.join(hashes))
+    finally:
+        os.remove(tmp)
+    return {
+        'id': backup_id,
+        'type': 'full' if previous is None else 'incremental',
+        'pageSize': page_size,
+        'pageCount': len(hashes),
+        'pagesWritten': changed,
+        'path': data_path,
+        'bytes': os.path.getsize(data_path),
+    }
+
+
+def create_backup(db_path, dest_dir, full=False, archive_path=None):
+    """Write a full or incremental backup of `db_path` (and of the archive database at
+    `archive_path`, if given) into `dest_dir`; return its manifest."""
+    os.makedirs(dest_dir, exist_ok=True)
+    backups = list_backups(dest_dir)
+    parent = backups[-1] if backups else None
+    if full or not parent or parent['chainLength'] >= FULL_EVERY:
+        parent = None
+    backup_id = _new_id()
+
+    section = _backup_file(db_path, dest_dir, backup_id, '', parent)
+    if section['type'] == 'full':
+        parent = None  # the page size changed: a new chain, the archive copy included
+    manifest = {
+        **section,
+        'parent': parent['id'] if parent else None,
+        'chainLength': parent['chainLength'] + 1 if parent else 0,
+        'createdAt': datetime.utcnow().isoformat(),
+        'archive': None,
+    }
+    if archive_path and os.path.exists(archive_path):
+        manifest['archive'] = _backup_file(archive_path, dest_dir, backup_id, ARCHIVE_PART,
+                                           parent.get('archive') if parent else None)
+    with open(_path(dest_dir, backup_id, '.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _chain(dest_dir, backup_id):
+    chain = [get_manifest(dest_dir, backup_id)]
+    while chain[-1]['parent']:
+        chain.append(get_manifest(dest_dir, chain[-1]['parent']))
+    return list(reversed(chain))
+
+
+def _sections(chain, part):
+    """The copies of one database file to apply in order: the newest full one, then incrementals."""
+    if not part:
+        return chain  # the main database's fields are the manifest's own
+    sections = [m.get('archive') for m in chain]
+    if sections[-1] is None:
+        raise BackupError(f"Backup {chain[-1]['id']} has no copy of the archive")
+    start = max(i for i, section in enumerate(sections) if section and section['type'] == 'full')
+    return sections[start:]
+
+
+def materialize(dest_dir, backup_id, target_path, part=''):
+    """Rebuild the database file of `backup_id` (its full snapshot plus incrementals) at `target_path`.
+
+    `part` selects the archive database's copy (ARCHIVE_PART) instead of the main one.
+    """
+    chain = _chain(dest_dir, backup_id)
+    sections = _sections(chain, part)
+    with gzip.open(sections[0]['path'], 'rb') as src, open(target_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    with open(target_path, 'r+b') as dst:
+        for section in sections[1:]:
+            page_size = section['pageSize']
+            with gzip.open(section['path'], 'rb') as src:
+                while True:
+                    header = src.read(_PAGE_NO.size)
+                    if not header:
+                        break
+                    (number,) = _PAGE_NO.unpack(header)
+                    dst.seek(number * page_size)
+                    dst.write(src.read(page_size))
+            dst.truncate(section['pageCount'] * page_size)
+    return chain[-1]
+
+
+def _materialize_checked(dest_dir, backup_id, target_path, part=''):
+    manifest = materialize(dest_dir, backup_id, target_path, part)
+    check = sqlite3.connect(target_path)
+    try:
+        result = check.execute('PRAGMA integrity_check').fetchone()[0]
+    finally:
+        check.close()
+    if result != 'ok':
+        raise BackupError(f'Backup {backup_id} failed the integrity check: {result}')
+    return manifest
+
+
+def restore_backup(db_path, dest_dir, backup_id, archive_path=None):
+    """Replace the live database contents with backup `backup_id`, online.
+
+    With `archive_path`, the archive database is replaced with the backup's copy as well.
+    Both copies are rebuilt and checked before either database is touched.
+    """
+    temps = []
+    try:
+        for _ in range(2 if archive_path else 1):
+            fd, tmp = tempfile.mkstemp(suffix='.db', dir=dest_dir)
+            os.close(fd)
+            temps.append(tmp)
+        manifest = _materialize_checked(dest_dir, backup_id, temps[0])
+        if archive_path:
+            _materialize_checked(dest_dir, backup_id, temps[1], ARCHIVE_PART)
+        snapshot(temps[0], db_path)
+        if archive_path:
+            snapshot(temps[1], archive_path)
+    finally:
+        for tmp in temps:
+            os.remove(tmp)
+    return manifest
+
+
+def covers_archive(manifest):
+    """Whether a backup holds a copy of the archive database (older backups do not)."""
+    return bool(manifest.get('archive'))
+
+
+def latest_covers_archive(dest_dir):
+    """Whether the newest backup in `dest_dir` holds a copy of the archive database."""
+    backups = list_backups(dest_dir)
+    return bool(backups) and covers_archive(backups[-1])
+
+
+def retention_cutoff(retention_type, retention_value, now=None):
+    """Oldest creation time to keep for a retentionType/retentionValue preference, or None."""
+    try:
+        value = int(retention_value)
+    except (TypeError, ValueError):
+        return None
+    if value <= 0:
+        return None
+    days = {'days': 1, 'months': 30, 'years': 365}.get(retention_type)
+    if days is None:
+        return None
+    return (now or datetime.utcnow()) - timedelta(days=days * value)
+
+
+def prune_backups(dest_dir, cutoff):
+    """Delete whole chains whose newest backup is older than `cutoff`; the latest chain is always kept."""
+    if cutoff is None:
+        return []
+    chains = []
+    for manifest in list_backups(dest_dir):
+        if manifest['type'] == 'full' or not chains:
+            chains.append([])
+        chains[-1].append(manifest)
+    removed = []
+    for chain in chains[:-1]:
+        if datetime.fromisoformat(chain[-1]['createdAt']) >= cutoff:
+            continue
+        for manifest in chain:
+            for suffix in ('.full.gz', '.incr.gz', '.pages', '.json'):
+                for part in ('', ARCHIVE_PART):
+                    path = _path(dest_dir, manifest['id'], part + suffix)
+                    if os.path.exists(path):
+                        os.remove(path)
+            removed.append(manifest['id'])
+    return removed
+
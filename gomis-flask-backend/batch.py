@@ -0,0 +1,172 @@
+"""Ordered create/update/delete operations across entities, applied in one transaction.
+
+`POST /api/batch` takes `{"operations": [...]}`. The operations run in order in the
+request's session and are committed together. The first one that fails rolls the whole
+batch back and is reported with its index. An update or delete with `where` instead of
+`id` compiles to a single UPDATE/DELETE statement over the matching rows, so marking a
+whole grade GRADUATED is one statement instead of one request per student. The triggers
+keep the ETag counters, the violation rollup and the change log current for these
+statements as for any other write.
+"""
+from sqlalchemy import delete, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from db import db
+
+MAX_OPERATIONS = 1000
+READ_ONLY = ('id', 'createdAt', 'updatedAt')
+OPS = ('create', 'update', 'delete')
+
+
+class BatchError(ValueError):
+    """Raised for an operation that cannot be applied; `status` is the HTTP status to answer."""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra  # more response keys, e.g. the conflicting appointments
+        self.index = None
+
+
+class Entity:
+    """How the batch endpoint writes one model, using the camelCase field map of its serializer.
+
+    `prepare(obj, op, before)` runs after the fields of a create (before is None) or an
+    update by id (before is the row as it was) are set, and may raise BatchError.
+    `check_where(clauses, values)` does the same for set-based updates.
+    """
+
+    def __init__(self, model, serializer, prepare=None, check_where=None):
+        self.model = model
+        self.serializer = serializer
+        self.prepare = prepare
+        self.check_where = check_where
+        self.fields = dict(zip(serializer.keys, serializer.columns))
+        self.writable = {k: c for k, c in self.fields.items() if k not in READ_ONLY}
+        self.required = [k for k, c in self.writable.items()
+                         if not c.property.columns[0].nullable and c.property.columns[0].default is None]
+
+
+def _values(entity, data):
+    if not isinstance(data, dict) or not data:
+        raise BatchError('data must be a non-empty object')
+    unknown = [k for k in data if k not in entity.writable]
+    if unknown:
+        raise BatchError('Unknown or read-only fields: ' + ', '.join(unknown))
+    return {entity.writable[k].key: v for k, v in data.items()}
+
+
+def _where(entity, where):
+    if not isinstance(where, dict) or not where:
+        raise BatchError('where must be a non-empty object')
+    clauses = []
+    for key, value in where.items():
+        column = entity.fields.get(key)
+        if column is None:
+            raise BatchError(f'Unknown where field: {key}')
+        if isinstance(value, list):
+            if not value:
+                raise BatchError(f'where.{key} must not be an empty list')
+            clauses.append(column.in_(value))
+        elif value is None:
+            clauses.append(column.is_(None))
+        else:
+            clauses.append(column == value)
+    return clauses
+
+
+def _get(entity, op):
+    if not isinstance(op.get('id'), int):
+        raise BatchError('id (an integer) or where is required')
+    obj = db.session.get(entity.model, op['id'])
+    if obj is None:
+        raise BatchError(f"{op['entity']} {op['id']} not found", 404)
+    return obj
+
+
+def _create(entity, op):
+    values = _values(entity, op.get('data'))
+    missing = [k for k in entity.required if op['data'].get(k) is None]
+    if missing:
+        raise BatchError('Missing fields: ' + ', '.join(missing))
+    obj = entity.model(**values)
+    if entity.prepare:
+        entity.prepare(obj, op, None)
+    db.session.add(obj)
+    db.session.flush()
+    return {'status': 201, 'id': obj.id, 'row': entity.serializer.object(obj)}
+
+
+def _update(entity, op):
+    values = _values(entity, op.get('data'))
+    if 'where' in op:
+        clauses = _where(entity, op['where'])
+        if entity.check_where:
+            entity.check_where(clauses, op['data'])
+        result = db.session.execute(update(entity.model).where(*clauses).values(values)
+                                    .execution_options(synchronize_session=False))
+        db.session.expire_all()  # loaded rows may be among the updated ones
+        return {'status': 200, 'count': result.rowcount}
+    obj = _get(entity, op)
+    before = entity.serializer.object(obj)
+    for key, value in values.items():
+        setattr(obj, key, value)
+    if entity.prepare:
+        entity.prepare(obj, op, before)
+    db.session.flush()
+    return {'status': 200, 'id': obj.id, 'row': entity.serializer.object(obj)}
+
+
+def _delete(entity, op):
+    if 'where' in op:
+        result = db.session.execute(delete(entity.model).where(*_where(entity, op['where']))
+                                    .execution_options(synchronize_session=False))
+        db.session.expire_all()
+        return {'status': 200, 'count': result.rowcount}
+    obj = _get(entity, op)
+    db.session.delete(obj)
+    db.session.flush()
+    return {'status': 204, 'id': op['id']}
+
+
+def _apply(op, entities):
+    if not isinstance(op, dict):
+        raise BatchError('Each operation must be an object')
+    if op.get('op') not in OPS:
+        raise BatchError('op must be one of: ' + ', '.join(OPS))
+    entity = entities.get(op.get('entity'))
+    if entity is None:
+        raise BatchError('entity must be one of: ' + ', '.join(entities))
+    if op['op'] == 'create':
+        return _create(entity, op)
+    if op['op'] == 'update':
+        return _update(entity, op)
+    return _delete(entity, op)
+
+
+def apply_batch(body, entities):
+    """Apply and commit `body['operations']`; returns one result per operation.
+
+    On failure nothing is committed and the BatchError carries the operation's `index`.
+    """
+    operations = body.get('operations') if isinstance(body, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list')
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f'At most {MAX_OPERATIONS} operations per batch')
+    results = []
+    for index, op in enumerate(operations):
+        try:
+            results.append({'index': index, **_apply(op, entities)})
+        except Exception as e:
+            db.session.rollback()
+            if isinstance(e, IntegrityError):
+                e = BatchError(f'Conflicts with an existing row: {e.orig}', 409)
+            elif isinstance(e, DBAPIError):
+                e = BatchError(f'Invalid value: {e.orig}')
+            elif not isinstance(e, BatchError):
+                raise
+            e.index = index
+            raise e
+    db.session.commit()
+    return results
@@ -0,0 +1,74 @@
+"""Bytes on the wire and encode cost of the full-list endpoints, per layout and encoding.
+
+Seeds the bench_api dataset into a temporary database, then fetches each unpaged
+collection in both layouts (objects, ?format=columns) and compresses the body with every
+encoding compression.py can offer. Reports the body size, the request time (query and
+JSON encoding) and the compression time, best of --repeat.
+
+    python bench_encoding.py [--violations 20000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+ENDPOINTS = ['/api/violations', '/api/sessions', '/api/incidents', '/api/students', '/api/appointments']
+LAYOUTS = [('objects', ''), ('columns', '?format=columns')]
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--violations', type=int, default=20000)
+    parser.add_argument('--appointments', type=int, default=5000)
+    parser.add_argument('--incidents', type=int, default=2000)
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=2025)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='gomis-bench-')
+    os.environ['GOMIS_DATABASE_URL'] = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+    import logging
+    logging.getLogger('alembic').setLevel(logging.WARNING)
+    import compression
+    from app import create_app
+    from bench_api import seed
+    app = create_app()
+
+    config = {k: getattr(args, k) for k in ('students', 'violations', 'appointments', 'incidents', 'sessions')}
+    with app.app_context():
+        seed(config, random.Random(args.seed))
+
+    client = app.test_client()
+    encodings = sorted(compression.ENCODERS, key=lambda e: ('gzip', 'br', 'zstd').index(e))
+    missing = {'br': 'brotli', 'zstd': 'zstandard'}.keys() - compression.ENCODERS.keys()
+    print(f'best of {args.repeat}; not installed: {", ".join(sorted(missing)) or "none"}')
+    header = f'{"endpoint":20} {"layout":8} {"identity":>10} {"request ms":>10}'
+    for encoding in encodings:
+        header += f' {encoding:>9} {"ms":>6}'
+    print(header)
+    for path in ENDPOINTS:
+        for layout, query in LAYOUTS:
+            # No Accept-Encoding: the test client gets the identity body and its render time
+            elapsed, body = best_of(args.repeat, lambda: client.get(path + query).get_data())
+            line = f'{path:20} {layout:8} {len(body):10d} {elapsed:10.1f}'
+            for encoding in encodings:
+                encode = compression.ENCODERS[encoding]
+                elapsed, compressed = best_of(args.repeat, lambda: encode(body))
+                line += f' {len(compressed):9d} {elapsed:6.1f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Per-row cost of serializing violations: hand-written to_dict vs compiled serializers.
+
+Seeds a temporary database with 100k violations, then times the old list path (ORM
+instances, a dict built per object with isoformat(), Flask's default JSON provider)
+against the new one (Core rows, the compiled VIOLATION_SERIALIZER, the fast provider).
+
+    python bench_serializers.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def old_violation_to_dict(v):
+    # The hand-written serializer this benchmark compares against
+    return {
+        'id': v.id,
+        'studentId': v.student_id,
+        'studentName': v.student_name,
+        'studentLRN': v.student_lrn,
+        'violationType': v.violation_type,
+        'date': v.date,
+        'description': v.description,
+        'severity': v.severity,
+        'actionTaken': v.action_taken,
+        'status': v.status,
+        'createdAt': v.created_at.isoformat() if v.created_at else None,
+        'updatedAt': v.updated_at.isoformat() if v.updated_at else None,
+    }
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ['GOMIS_DATABASE_URL'] = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+    from datetime import datetime
+    from flask.json.provider import DefaultJSONProvider
+
+    import serializers
+    from app import create_app
+    from db import db
+    from models import Violation
+    from routes import VIOLATION_SERIALIZER
+
+    app = create_app()
+    now = datetime.utcnow()
+    with app.app_context():
+        rows = [
+            {'student_id': i % 2000, 'student_name': f'Student {i % 2000}', 'student_lrn': f'{i % 2000:012d}',
+             'violation_type': 'Tardiness', 'date': f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+             'description': 'Arrived after the flag ceremony', 'severity': 'Minor', 'action_taken': None,
+             'status': 'Pending', 'created_at': now, 'updated_at': now}
+            for i in range(args.rows)
+        ]
+        db.session.execute(Violation.__table__.insert(), rows)
+        db.session.commit()
+        order = (Violation.date.desc(), Violation.id.desc())
+        default_json = DefaultJSONProvider(app)
+
+        def before():
+            items = [old_violation_to_dict(v) for v in Violation.query.order_by(*order).all()]
+            db.session.expunge_all()
+            return len(default_json.dumps(items))
+
+        def after():
+            result = Violation.query.with_entities(*VIOLATION_SERIALIZER.columns).order_by(*order).all()
+            serialize = VIOLATION_SERIALIZER.row
+            return len(serializers.dumps([serialize(r) for r in result]))
+
+        encoder = 'orjson' if serializers.orjson else 'json (orjson not installed)'
+        print(f'{args.rows} violations, best of {args.repeat}, encoder: {encoder}')
+        for label, fn in (('to_dict + ORM', before), ('compiled + Core', after)):
+            elapsed, size = best_of(args.repeat, fn)
+            print(f'{label:16} {elapsed:6.3f}s  {elapsed / args.rows * 1e6:6.2f} us/row  {size / 1e6:5.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
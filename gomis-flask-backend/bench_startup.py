@@ -0,0 +1,103 @@
+"""Cold start of the production launcher: time from spawn until the API answers.
+
+Starts `python serve.py` on a free port and polls GET / until it returns 200, --repeat
+times for each case:
+
+    first run   a new, empty database (all migrations, triggers and tables are created)
+    existing    the database the first runs left behind (the usual desktop start)
+
+It prints min/median/max and the startup the launcher reports itself. The run fails
+(exit code 1) when the median start on an existing database exceeds --budget-ms. The
+Electron shell waits for the backend before it shows the UI.
+
+    python bench_startup.py [--repeat 5] [--budget-ms 1500]
+"""
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+READY = re.compile(r'ready on \S+ \(startup (\d+) ms\)')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_once(database_url, timeout):
+    """Wall time until GET / answers, and the startup the launcher printed, in ms."""
+    port = free_port()
+    env = dict(os.environ, GOMIS_DATABASE_URL=database_url)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--port', str(port)], cwd=HERE, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError(f'serve.py exited with code {proc.returncode}')
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f'no answer within {timeout}s')
+            time.sleep(0.005)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        proc.terminate()
+        output, _ = proc.communicate(timeout=10)
+    match = READY.search(output)
+    return elapsed, int(match.group(1)) if match else None
+
+
+def report(label, runs):
+    walls = [wall for wall, _ in runs]
+    reported = [r for _, r in runs if r is not None]
+    line = (f'{label:10} min {min(walls):6.0f}  median {statistics.median(walls):6.0f}  '
+            f'max {max(walls):6.0f} ms')
+    if reported:
+        line += f'   (launcher reports median {statistics.median(reported):.0f} ms)'
+    print(line)
+    return statistics.median(walls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500)
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='gomis-startup-')
+    first, existing = [], []
+    for i in range(args.repeat):
+        # A database of its own per first run; the last one is reused for the existing case
+        url = f'sqlite:///{os.path.join(tmp, f"startup-{i}.db")}'
+        first.append(start_once(url, args.timeout))
+    for _ in range(args.repeat):
+        existing.append(start_once(url, args.timeout))
+
+    print(f'serve.py cold start, {args.repeat} runs each, wall time until GET / answers')
+    report('first run', first)
+    median = report('existing', existing)
+    if median > args.budget_ms:
+        print(f'FAIL: median start on an existing database {median:.0f} ms > budget {args.budget_ms:.0f} ms')
+        return 1
+    print(f'ok: within the {args.budget_ms:.0f} ms budget')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Write throughput of the default SQLite settings vs the tuned storage profile.
+
+Several threads (standing in for counselor workstations) each insert violations in small
+committed transactions against a fresh database file, once with SQLite's default pragmas
+and once with storage.SQLITE_PRAGMAS.
+
+    python bench_storage.py [--writers 4] [--commits 250] [--rows 5]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+
+import storage
+from db import db
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(f'sqlite:///{path}')
+    if pragmas:
+        storage.apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def run(pragmas, writers, commits, rows):
+    from models import Violation
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, 'bench.db'), pragmas)
+        db.metadata.create_all(engine)
+        errors = []
+        written = [0] * writers
+
+        def writer(n):
+            for i in range(commits):
+                batch = [
+                    {'student_id': n, 'student_name': f'Writer {n}', 'violation_type': 'Tardiness',
+                     'severity': 'Minor', 'date': '2025-01-01', 'status': 'Pending'}
+                    for _ in range(rows)
+                ]
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(insert(Violation), batch)
+                    written[n] += rows
+                except OperationalError as e:
+                    errors.append(str(e.orig))
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        engine.dispose()
+    return sum(written), elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--commits', type=int, default=250, help='transactions per writer')
+    parser.add_argument('--rows', type=int, default=5, help='rows per transaction')
+    args = parser.parse_args()
+
+    for label, pragmas in (('default', None), ('tuned', storage.sqlite_pragmas())):
+        written, elapsed, errors = run(pragmas, args.writers, args.commits, args.rows)
+        print(f'{label:8} {written:7d} rows in {elapsed:6.2f}s = {written / elapsed:9.0f} rows/s, '
+              f'{written / args.rows / elapsed:7.0f} commits/s, {len(errors)} failed transactions'
+              + (f' ({errors[0]})' if errors else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Streaming bulk import of students from CSV or NDJSON.
+
+Rows are parsed one at a time from the request stream, checked against the unique
+`lrn` index one chunk at a time and inserted with executemany. Everything runs in
+the caller's transaction, so an import either lands completely or not at all.
+"""
+import csv
+import io
+import json
+import re
+
+from db import db
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Normalized header/key (lowercase, letters and digits only) -> Student column. Covers the
+# API's camelCase keys, snake_case columns and the SF1 school form headers (TRACK&STRAND...).
+COLUMNS = {
+    'lrn': 'lrn',
+    'firstname': 'first_name',
+    'lastname': 'last_name',
+    'middlename': 'middle_name',
+    'gradelevel': 'grade_level',
+    'section': 'section',
+    'trackstrand': 'track_strand',
+    'specialization': 'specialization',
+    'schoolyear': 'school_year',
+    'status': 'status',
+}
+
+REQUIRED = ('lrn', 'first_name', 'last_name')
+
+_NORMALIZE = re.compile(r'[^a-z0-9]')
+
+
+class ImportFormatError(ValueError):
+    """Raised when the upload cannot be parsed at all (as opposed to a bad row)."""
+
+
+def normalize_key(key):
+    return _NORMALIZE.sub('', str(key).lower())
+
+
+def iter_records(stream, content_type):
+    """Yield (row number, dict) pairs from a CSV or NDJSON byte stream without reading it all."""
+    try:
+        yield from _iter_records(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''), content_type)
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise ImportFormatError(f'Unreadable upload: {e}')
+
+
+def _iter_records(text, content_type):
+    if 'json' in (content_type or ''):
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield number, ValueError('Invalid JSON')
+                continue
+            yield number, record if isinstance(record, dict) else ValueError('Expected a JSON object')
+    else:
+        reader = csv.DictReader(text)
+        if not reader.fieldnames:
+            raise ImportFormatError('Missing CSV header')
+        for record in reader:
+            # Row 1 is the header
+            yield reader.line_num, record
+
+
+def to_row(record, defaults):
+    """Map one input record to Student column values, or raise ValueError with the reason."""
+    if isinstance(record, Exception):
+        raise record
+    # executemany needs the same keys in every row
+    row = {column: None for column in COLUMNS.values()}
+    row.update(defaults)
+    for key, value in record.items():
+        column = COLUMNS.get(normalize_key(key)) if key is not None else None
+        if column is None:
+            continue
+        value = value.strip() if isinstance(value, str) else value
+        if value not in (None, ''):
+            row[column] = str(value)
+    missing = [c for c in REQUIRED if not row.get(c)]
+    if missing:
+        raise ValueError('Missing ' + ', '.join(missing))
+    if len(row['lrn']) > 12:
+        raise ValueError('LRN longer than 12 characters')
+    row['status'] = row['status'] or 'ACTIVE'
+    return row
+
+
+def record_lrn(record):
+    if isinstance(record, dict):
+        for key, value in record.items():
+            if key is not None and normalize_key(key) == 'lrn':
+                return value
+    return None
+
+
+def import_students(stream, content_type, defaults=None, on_chunk=None):
+    """Insert students from `stream`; return a report with per-row errors.
+
+    `defaults` supplies column values for fields missing from a row (e.g. school_year).
+    `on_chunk(report)` is called before each chunk is inserted; raising from it aborts
+    the import (e.g. a cancelled job). The caller commits or rolls back.
+    """
+    from models import Student
+
+    defaults = {COLUMNS[normalize_key(k)]: v for k, v in (defaults or {}).items() if normalize_key(k) in COLUMNS}
+    report = {'received': 0, 'inserted': 0, 'skipped': 0, 'errors': []}
+    seen = set()
+    pending = []
+
+    def error(number, lrn, message):
+        report['skipped'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': number, 'lrn': lrn, 'error': message})
+
+    def flush():
+        if not pending:
+            return
+        if on_chunk:
+            on_chunk(report)
+        lrns = [row['lrn'] for _, row in pending]
+        existing = {r[0] for r in db.session.query(Student.lrn).filter(Student.lrn.in_(lrns))}
+        rows = []
+        for number, row in pending:
+            if row['lrn'] in existing:
+                error(number, row['lrn'], 'LRN already exists')
+            else:
+                rows.append(row)
+        if rows:
+            db.session.execute(Student.__table__.insert(), rows)
+            report['inserted'] += len(rows)
+        pending.clear()
+
+    for number, record in iter_records(stream, content_type):
+        report['received'] += 1
+        try:
+            row = to_row(record, defaults)
+        except ValueError as e:
+            error(number, record_lrn(record), str(e))
+            continue
+        if row['lrn'] in seen:
+            error(number, row['lrn'], 'Duplicate LRN in upload')
+            continue
+        seen.add(row['lrn'])
+        pending.append((number, row))
+        if len(pending) >= CHUNK_SIZE:
+            flush()
+    flush()
+    return report
@@ -0,0 +1,276 @@
+"""Batch rendering of the certificate/form DOCX templates.
+
+Each template is parsed once per process: placeholders that Word split across several runs
+(`${` `studentName` `}`) are merged into one text node, and every XML part that contains
+placeholders is compiled into alternating static chunks and placeholder names. Rendering a
+document is then a string join plus writing the zip, with the untouched parts copied as
+already-compressed bytes. Large batches are spread over a process pool (each worker keeps its
+own compiled templates) and streamed back as a zip of .docx files.
+"""
+import io
+import os
+import re
+import struct
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from xml.sax.saxutils import escape
+
+TEMPLATE_DIR = os.environ.get('GOMIS_TEMPLATE_DIR') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'app', 'src', 'templates', 'binary')
+
+# kind -> template file, the same files the certificate dialogs load in the browser
+TEMPLATES = {
+    'good-moral': 'good_moral_template.zip',
+    'dropping': 'dropping_form_template.zip',
+}
+
+TRACK_NAMES = {
+    'ABM': 'Accountancy, Business and Management',
+    'STEM': 'Science, Technology, Engineering and Mathematics',
+    'HUMSS': 'Humanities and Social Sciences',
+    'GAS': 'General Academic Strand',
+    'TVL': 'Technical-Vocational-Livelihood',
+}
+
+BATCH_SIZE = 16  # documents per pool task
+MIN_POOL_BATCH = 32  # smaller batches render in the request process
+MAX_WORKERS = int(os.environ.get('GOMIS_RENDER_WORKERS') or min(4, os.cpu_count() or 1))
+
+_PLACEHOLDER = re.compile(r'\$\{(\w+)\}')
+_TEXT_NODE = re.compile(r'<w:t(?:\s[^>]*)?>([^<]*)</w:t>')
+_MARK = '\x00{}\x00'
+_MARK_SPLIT = re.compile('\x00(\\d+)\x00')
+_PRESERVE = '<w:t xml:space="preserve">{}</w:t>'
+
+
+class TemplateError(Exception):
+    """Raised for an unknown template kind or a template file that cannot be read."""
+
+
+def compile_part(xml):
+    """Split one XML part into (static chunks, placeholder names); chunks has one more item."""
+    nodes = list(_TEXT_NODE.finditer(xml))
+    texts = [m.group(1) for m in nodes]
+    # offset of each node's text in the concatenated text of the part
+    starts, total = [], 0
+    for t in texts:
+        starts.append(total)
+        total += len(t)
+    joined = ''.join(texts)
+
+    def locate(offset):
+        for i in range(len(starts) - 1, -1, -1):
+            if starts[i] <= offset:
+                return i, offset - starts[i]
+        return 0, 0
+
+    names = []
+    rewritten = set()
+    for match in reversed(list(_PLACEHOLDER.finditer(joined))):
+        first, a = locate(match.start())
+        last, b = locate(match.end() - 1)
+        b += 1
+        marker = _MARK.format(len(names))
+        names.append(match.group(1))
+        if first == last:
+            texts[first] = texts[first][:a] + marker + texts[first][b:]
+        else:
+            texts[first] = texts[first][:a] + marker
+            for i in range(first + 1, last):
+                texts[i] = ''
+            texts[last] = texts[last][b:]
+        rewritten.update(range(first, last + 1))
+
+    out, pos = [], 0
+    for i, node in enumerate(nodes):
+        out.append(xml[pos:node.start()])
+        out.append(_PRESERVE.format(texts[i]) if i in rewritten else node.group(0))
+        pos = node.end()
+    out.append(xml[pos:])
+
+    parts = _MARK_SPLIT.split(''.join(out))
+    chunks = parts[0::2]
+    order = [int(i) for i in parts[1::2]]
+    return chunks, [names[i] for i in order]
+
+
+# Minimal zip writer for the rendered .docx: static parts are deflated once at compile time
+# and copied as is, so rendering a document only compresses the parts with placeholders.
+_LOCAL = struct.Struct('<IHHHHHIIIHH')
+_CENTRAL = struct.Struct('<IHHHHHHIIIHHHHHII')
+_END = struct.Struct('<IHHHHIIH')
+
+
+def _deflate(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompiledTemplate:
+    def __init__(self, path):
+        # (name, dos time, dos date, compiled part or None, pre-compressed entry or None)
+        self.entries = []
+        self.placeholders = set()
+        with zipfile.ZipFile(path) as z:
+            for info in z.infolist():
+                data = z.read(info)
+                y, mo, d, h, mi, sec = info.date_time
+                stamp = (h << 11 | mi << 5 | sec // 2, max(y - 1980, 0) << 9 | mo << 5 | d)
+                if info.filename.endswith('.xml') and b'${' in data:
+                    compiled = compile_part(data.decode('utf-8'))
+                    self.placeholders.update(compiled[1])
+                    self.entries.append((info.filename.encode('utf-8'), *stamp, compiled, None))
+                else:
+                    entry = self._entry(data, info.compress_type != zipfile.ZIP_STORED)
+                    self.entries.append((info.filename.encode('utf-8'), *stamp, None, entry))
+
+    @staticmethod
+    def _entry(data, deflate):
+        # (method, crc, compressed bytes, size)
+        if deflate:
+            return zipfile.ZIP_DEFLATED, zlib.crc32(data), _deflate(data), len(data)
+        return zipfile.ZIP_STORED, zlib.crc32(data), data, len(data)
+
+    def render(self, values):
+        out, central, offset = [], [], 0
+        for name, time, date, compiled, entry in self.entries:
+            if compiled:
+                chunks, names = compiled
+                pieces = [chunks[0]]
+                for placeholder, chunk in zip(names, chunks[1:]):
+                    pieces.append(_value(values.get(placeholder)))
+                    pieces.append(chunk)
+                entry = self._entry(''.join(pieces).encode('utf-8'), True)
+            method, crc, data, size = entry
+            flags = 0 if name.isascii() else 0x800
+            out.append(_LOCAL.pack(0x04034b50, 20, flags, method, time, date, crc, len(data), size, len(name), 0))
+            out.append(name)
+            out.append(data)
+            central.append(_CENTRAL.pack(0x02014b50, 20, 20, flags, method, time, date, crc, len(data), size,
+                                         len(name), 0, 0, 0, 0, 0, offset) + name)
+            offset += _LOCAL.size + len(name) + len(data)
+        directory = b''.join(central)
+        out.append(directory)
+        out.append(_END.pack(0x06054b50, 0, 0, len(central), len(central), len(directory), offset, 0))
+        return b''.join(out)
+
+
+def _value(value):
+    text = escape('' if value is None else str(value))
+    # Same as docxtemplater's linebreaks option
+    return text.replace('\n', '</w:t><w:br/><w:t xml:space="preserve">')
+
+
+_cache = {}
+
+
+def get_template(kind):
+    """The compiled template for `kind`, recompiled only when the file changes."""
+    if kind not in TEMPLATES:
+        raise TemplateError(f'Unknown template {kind}')
+    path = os.path.join(TEMPLATE_DIR, TEMPLATES[kind])
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        raise TemplateError(f'Template file not found: {path}')
+    cached = _cache.get(kind)
+    if cached is None or cached[0] != mtime:
+        try:
+            cached = (mtime, CompiledTemplate(path))
+        except (zipfile.BadZipFile, UnicodeDecodeError) as e:
+            raise TemplateError(f'Unreadable template {path}: {e}')
+        _cache[kind] = cached
+    return cached[1]
+
+
+def student_values(kind, student, fields):
+    """Placeholder values for one student: request-wide `fields` plus the student's own data."""
+    name = ' '.join(filter(None, [student.first_name, student.middle_name, student.last_name]))
+    track = student.track_strand or ''
+    specialization = TRACK_NAMES.get(track) or student.specialization or track
+    values = dict(fields)
+    if kind == 'good-moral':
+        values.update(
+            studentName=name,
+            withLRN=f', bearing LRN {student.lrn},' if fields.get('includeLRN') and student.lrn else '',
+            schoolYear=student.school_year or fields.get('schoolYear', ''),
+            trackAndStrand=track,
+            specialization=specialization,
+        )
+    else:
+        values.update(
+            Name=name,
+            TrackNStrand=track,
+            Specialization=specialization,
+            GradeNSection=f'Grade {student.grade_level or ""} - {student.section or ""}',
+        )
+    return values
+
+
+def document_name(kind, student):
+    prefix = 'Good_Moral_Certificate' if kind == 'good-moral' else 'Dropping_Form'
+    name = '_'.join(filter(None, [student.last_name, student.first_name])) or str(student.id)
+    return f'{prefix}_{re.sub(r"[^0-9A-Za-z]+", "_", name).strip("_")}_{student.lrn or student.id}.docx'
+
+
+def _render_batch(kind, batch):
+    template = get_template(kind)
+    return [(filename, template.render(values)) for filename, values in batch]
+
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn: forking a threaded server process can deadlock the children
+        _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context('spawn'))
+    return _pool
+
+
+def render_documents(kind, jobs):
+    """Yield (filename, docx bytes) for each (filename, values) job, in order."""
+    get_template(kind)  # fail early on a missing template
+    jobs = list(jobs)
+    batches = [jobs[i:i + BATCH_SIZE] for i in range(0, len(jobs), BATCH_SIZE)]
+    if len(jobs) < MIN_POOL_BATCH or MAX_WORKERS < 2:
+        for batch in batches:
+            yield from _render_batch(kind, batch)
+    else:
+        for rendered in _get_pool().map(_render_batch, [kind] * len(batches), batches):
+            yield from rendered
+
+
+class _Chunks(io.RawIOBase):
+    # Write-only, unseekable sink; zipfile then writes data descriptors and never seeks back
+    def __init__(self):
+        self.data = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.data.append(bytes(b))
+        return len(b)
+
+    def take(self):
+        data, self.data = b''.join(self.data), []
+        return data
+
+
+def stream_zip(documents):
+    """Yield a zip archive of (filename, bytes) documents piece by piece."""
+    sink = _Chunks()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as z:
+        seen = set()
+        for filename, data in documents:
+            # .docx is already deflated; store it as is
+            if filename in seen:
+                filename = filename.replace('.docx', f'_{len(seen)}.docx')
+            seen.add(filename)
+            z.writestr(filename, data)
+            yield sink.take()
+    yield sink.take()
@@ -0,0 +1,244 @@
+"""Delta sync: a log of created, updated and deleted rows behind /api/changes.
+
+Triggers write a `change_log` entry for every changed row of the synced tables in the
+writing transaction, so the log also sees Core bulk statements, status propagation and
+other server processes. A row keeps only its latest entry: each write deletes the row's
+previous entry and appends one with the next `seq` (AUTOINCREMENT, never reused). The log
+therefore holds at most one entry per row that ever existed, and deleted rows stay as
+tombstones. Participant rows belong to the incident/session payloads and log their parent.
+
+A cursor is (epoch, seq). The epoch is a random number kept in `table_version` under
+'change_log' and replaced after a restore, so a cursor handed out for the replaced data
+makes the client reload its lists instead of silently missing changes.
+"""
+import random
+
+from sqlalchemy import text
+
+from db import chunks, db
+from pagination import BadRequest, decode_cursor, encode_cursor
+
+SYNCED_TABLES = ('student', 'appointment', 'violation', 'incident', 'session')
+ENTITIES = {table: table + 's' for table in SYNCED_TABLES}  # table -> API name ('students'...)
+EPOCH = 'change_log'  # table_version row holding the cursor epoch
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+class ChangesError(ValueError):
+    """Raised for invalid /api/changes query parameters."""
+
+
+def _sqlite_log(table, row_id, op):
+    return f"""
+        DELETE FROM change_log WHERE table_name = {table} AND row_id = {row_id};
+        INSERT INTO change_log (table_name, row_id, op) VALUES ({table}, {row_id}, '{op}');"""
+
+
+def _parent_exists(row):
+    # A participant deleted after its parent must not bring the parent back as an upsert
+    return (f"""({row}.parent_type = 'incident' AND EXISTS (SELECT 1 FROM incident WHERE id = {row}.parent_id))
+        OR ({row}.parent_type = 'session' AND EXISTS (SELECT 1 FROM "session" WHERE id = {row}.parent_id))""")
+
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS change_log_{table}_{suffix} AFTER {event} ON "{table}" BEGIN
+        {_sqlite_log(f"'{table}'", f'{row}.id', op)}
+    END
+    """
+    for table in SYNCED_TABLES
+    for suffix, event, row, op in (('ai', 'INSERT', 'new', 'upsert'), ('au', 'UPDATE', 'new', 'upsert'),
+                                   ('ad', 'DELETE', 'old', 'delete'))
+] + [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS change_log_participant_{suffix} AFTER {event} ON participant
+    WHEN {_parent_exists(row)} BEGIN
+        {_sqlite_log(f'{row}.parent_type', f'{row}.parent_id', 'upsert')}
+    END
+    """
+    for suffix, event, row in (('ai', 'INSERT', 'new'), ('au', 'UPDATE', 'new'), ('ad', 'DELETE', 'old'))
+]
+
+# PostgreSQL: row-level triggers. Sequence values are handed out at insert time but become
+# visible at commit, so writers of the log are serialized with a transaction-level advisory
+# lock; otherwise a reader could move its cursor past a seq that commits later.
+_LOCK = "PERFORM pg_advisory_xact_lock(hashtext('change_log'));"
+
+POSTGRES_FUNCTIONS = [
+    f"""
+    CREATE OR REPLACE FUNCTION log_change() RETURNS trigger AS $$
+    DECLARE
+        changed_id integer := CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END;
+    BEGIN
+        {_LOCK}
+        DELETE FROM change_log WHERE table_name = TG_TABLE_NAME AND row_id = changed_id;
+        INSERT INTO change_log (table_name, row_id, op)
+        VALUES (TG_TABLE_NAME, changed_id, CASE WHEN TG_OP = 'DELETE' THEN 'delete' ELSE 'upsert' END);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION log_participant_change() RETURNS trigger AS $$
+    DECLARE
+        parent_table text := CASE WHEN TG_OP = 'DELETE' THEN OLD.parent_type ELSE NEW.parent_type END;
+        parent integer := CASE WHEN TG_OP = 'DELETE' THEN OLD.parent_id ELSE NEW.parent_id END;
+        parent_exists boolean;
+    BEGIN
+        IF parent_table NOT IN ('incident', 'session') THEN
+            RETURN NULL;
+        END IF;
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE id = $1)', parent_table) INTO parent_exists USING parent;
+        IF NOT parent_exists THEN
+            RETURN NULL;
+        END IF;
+        {_LOCK}
+        DELETE FROM change_log WHERE table_name = parent_table AND row_id = parent;
+        INSERT INTO change_log (table_name, row_id, op) VALUES (parent_table, parent, 'upsert');
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+POSTGRES_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE TRIGGER change_log_{table} AFTER INSERT OR UPDATE OR DELETE ON "{table}"
+    FOR EACH ROW EXECUTE FUNCTION log_change()
+    """
+    for table in SYNCED_TABLES
+] + [
+    """
+    CREATE OR REPLACE TRIGGER change_log_participant AFTER INSERT OR UPDATE OR DELETE ON participant
+    FOR EACH ROW EXECUTE FUNCTION log_participant_change()
+    """
+]
+
+
+def _epoch():
+    return random.getrandbits(40)
+
+
+def init_changes():
+    """Seed the cursor epoch and create the change log triggers if missing."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        if conn.execute(text('SELECT 1 FROM table_version WHERE name = :name'), {'name': EPOCH}).first() is None:
+            conn.execute(text('INSERT INTO table_version (name, version) VALUES (:name, :version)'),
+                         {'name': EPOCH, 'version': _epoch()})
+        if dialect == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                conn.execute(text(trigger))
+        elif dialect == 'postgresql':
+            for function in POSTGRES_FUNCTIONS:
+                conn.execute(text(function))
+            for trigger in POSTGRES_TRIGGERS:
+                conn.execute(text(trigger))
+
+
+def reset_changes():
+    """Start a new cursor epoch (after a restore replaced the data and the log)."""
+    with db.engine.begin() as conn:
+        conn.execute(text('UPDATE table_version SET version = :version WHERE name = :name'),
+                     {'name': EPOCH, 'version': _epoch()})
+
+
+def row_loader(model, serializer, participants=None):
+    """A loader for change_feed(): list of ids -> {id: API dict} via the model's serializer.
+
+    `participants` is the parent type whose `participants` arrays are attached.
+    """
+    from participants import load_participants
+
+    def load(ids):
+        rows = {}
+        for chunk in chunks(ids):
+            query = model.query.with_entities(*serializer.columns).filter(model.id.in_(chunk))
+            for values in query:
+                item = serializer.row(values)
+                rows[item['id']] = item
+        if participants:
+            for parent_id, items in load_participants(participants, list(rows)).items():
+                rows[parent_id]['participants'] = items
+        return rows
+    return load
+
+
+def head():
+    """The current cursor position: (epoch, latest seq)."""
+    from models import ChangeLog, TableVersion
+
+    epoch = db.session.query(TableVersion.version).filter(TableVersion.name == EPOCH).scalar()
+    seq = db.session.query(db.func.max(ChangeLog.seq)).scalar() or 0
+    return epoch, seq
+
+
+def _parse_since(value):
+    try:
+        values = decode_cursor(value)
+    except BadRequest:
+        values = None
+    if not values or len(values) != 2 or not all(isinstance(v, int) for v in values):
+        raise ChangesError('Invalid since cursor')
+    return values
+
+
+def change_feed(args, loaders):
+    """The /api/changes response for the query args.
+
+    `loaders` maps API table names (e.g. 'students') to (table, load) pairs, `load` taking
+    a list of ids. Without `since` the response only carries the current cursor. With an
+    unusable `since` (other epoch, or ahead of the log) it has `reset: true`: the client
+    reloads its lists and continues from the returned cursor.
+    """
+    from models import ChangeLog
+
+    names = [n.strip() for n in (args.get('tables') or '').split(',') if n.strip()] or list(loaders)
+    unknown = [n for n in names if n not in loaders]
+    if unknown:
+        raise ChangesError('Unknown tables: ' + ', '.join(unknown) + ' (use ' + ', '.join(loaders) + ')')
+    try:
+        limit = max(1, min(int(args.get('limit') or DEFAULT_LIMIT), MAX_LIMIT))
+    except ValueError:
+        raise ChangesError('Invalid limit')
+    since = _parse_since(args['since']) if args.get('since') else None
+
+    # Read the head first and stop there, so entries committed meanwhile are left for the
+    # next call instead of being skipped by a cursor that already passed them
+    epoch, latest = head()
+    response = {'cursor': encode_cursor([epoch, latest]), 'reset': False, 'hasMore': False, 'changes': []}
+    if since is None:
+        return response
+    if since[0] != epoch or since[1] > latest:
+        response['reset'] = True
+        return response
+
+    api_names = {loaders[n][0]: n for n in names}
+    entries = (db.session.query(ChangeLog.seq, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.op,
+                                ChangeLog.changed_at)
+               .filter(ChangeLog.seq > since[1], ChangeLog.seq <= latest, ChangeLog.table_name.in_(api_names))
+               .order_by(ChangeLog.seq).limit(limit + 1).all())
+    if len(entries) > limit:
+        entries = entries[:limit]
+        response['hasMore'] = True
+        response['cursor'] = encode_cursor([epoch, entries[-1].seq])
+
+    upserts = {}
+    for entry in entries:
+        if entry.op == 'upsert':
+            upserts.setdefault(entry.table_name, []).append(entry.row_id)
+    rows = {table: loaders[api_names[table]][1](ids) for table, ids in upserts.items()}
+
+    changes = response['changes']
+    for entry in entries:
+        change = {'table': api_names[entry.table_name], 'id': entry.row_id, 'op': entry.op,
+                  'changedAt': entry.changed_at}
+        if entry.op == 'upsert':
+            row = rows[entry.table_name].get(entry.row_id)
+            if row is None:  # deleted since the head was read; its tombstone comes next time
+                change['op'] = 'delete'
+            else:
+                change['row'] = row
+        changes.append(change)
+    return response
@@ -0,0 +1,100 @@
+"""Response compression negotiated with Accept-Encoding.
+
+A response body of at least MIN_SIZE bytes with a text-like type is compressed with the
+encoding the client prefers (its q-values, ties broken by ENCODINGS order). zstd needs
+the `zstandard` package and br the `brotli` package; gzip is always available. Levels
+favour speed, because list bodies are compressed on every request. Streamed responses
+(the text/event-stream of /api/events) and file downloads are passed through untouched.
+
+A compressed response gets a weak ETag (as nginx does). The bytes differ per encoding
+while the content does not, and @conditional compares weakly, as If-None-Match requires.
+
+GOMIS_COMPRESS_MIN_SIZE   smallest body to compress, in bytes (default 1024)
+GOMIS_COMPRESS_ENCODINGS  encodings to offer, in preference order (default zstd,br,gzip;
+                          empty disables compression)
+"""
+import gzip
+import os
+import threading
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+MIN_SIZE = int(os.environ.get('GOMIS_COMPRESS_MIN_SIZE') or 1024)
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+COMPRESSIBLE_TYPES = {'application/json', 'application/javascript', 'application/xml', 'image/svg+xml'}
+
+_local = threading.local()
+
+
+def _zstd(data):
+    # ZstdCompressor instances must not be shared between threads
+    compressor = getattr(_local, 'zstd', None)
+    if compressor is None:
+        compressor = _local.zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    return compressor.compress(data)
+
+
+ENCODERS = {'gzip': lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)}
+if brotli is not None:
+    ENCODERS['br'] = lambda data: brotli.compress(data, quality=BROTLI_QUALITY)
+if zstandard is not None:
+    ENCODERS['zstd'] = _zstd
+
+
+def _offered():
+    names = os.environ.get('GOMIS_COMPRESS_ENCODINGS')
+    names = 'zstd,br,gzip' if names is None else names
+    return [n.strip() for n in names.split(',') if n.strip() in ENCODERS]
+
+
+ENCODINGS = _offered()
+
+
+def choose_encoding(accept_encodings):
+    """The offered encoding with the highest q-value in the Accept-Encoding header, or None."""
+    best, best_quality = None, 0
+    for name in ENCODINGS:
+        quality = accept_encodings.quality(name)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compressible(mimetype):
+    if mimetype is None or mimetype == 'text/event-stream':
+        return False
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES or mimetype.endswith('+json')
+
+
+def compress_response(response):
+    if (not ENCODINGS or response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers or not compressible(response.mimetype)):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None or (response.content_length or 0) < MIN_SIZE:
+        return response
+    response.set_data(ENCODERS[encoding](response.get_data()))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """Register the after_request hook; call after metrics.init_app so the metrics see wire sizes."""
+    app.after_request(compress_response)
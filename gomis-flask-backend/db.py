@@ -1,2 +1,12 @@
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy()
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit.
+CHUNK_SIZE = 500
+
+
+def chunks(ids):
+    """The distinct `ids` in order, CHUNK_SIZE at a time, for one IN (...) query each."""
+    ids = list(dict.fromkeys(ids))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
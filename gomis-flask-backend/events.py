@@ -0,0 +1,188 @@
+"""Server-Sent Events: live change notifications on /api/events.
+
+After every commit a broker thread reads the `change_log` entries written since the last
+ones it saw (see changes.py) and fans each out to every connected client as a compact
+notification: entity, id, op and version (the /api/changes cursor just after that
+change). It also polls every POLL_SECONDS, which picks up writes committed by other
+server processes or plain Core connections.
+
+Writers only set a flag, and messages are encoded once for all clients. Each client has
+its own bounded queue. A client that falls QUEUE_SIZE notifications behind has its
+pending ones replaced by a single `resync` event (catch up with /api/changes), so a slow
+or stalled client never blocks writers or the other clients.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from db import db
+from pagination import encode_cursor
+
+QUEUE_SIZE = 256  # notifications a client may fall behind before it has to resync
+MAX_CLIENTS = int(os.environ.get('GOMIS_EVENT_CLIENTS') or 64)
+THREAD_HEADROOM = 4  # server threads limit_clients keeps free for the other requests
+POLL_SECONDS = 1.0
+KEEPALIVE_SECONDS = 15.0  # also bounds how long a vanished client keeps its slot
+RETRY_MS = 3000  # EventSource reconnect delay
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyClients(RuntimeError):
+    """Raised when the broker's max_clients event streams are already open."""
+
+
+def _message(kind, data, event_id=None):
+    head = f'id: {event_id}\n' if event_id else ''
+    return f'{head}event: {kind}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+RESYNC = _message('resync', {})
+KEEPALIVE = ': keepalive\n\n'
+
+
+class Client:
+    __slots__ = ('queue',)
+
+    def __init__(self):
+        self.queue = queue.Queue(QUEUE_SIZE)
+
+    def send(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            # Too far behind: drop what is pending, the client catches up from the change log
+            while True:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self.queue.put_nowait(RESYNC)
+
+
+class Broker:
+    """Fan-out of change_log entries to the connected clients (one thread, started lazily)."""
+
+    def __init__(self):
+        self._app = None
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._position = None  # (epoch, seq) published so far; None while nobody listens
+        self.max_clients = MAX_CLIENTS
+
+    def init_app(self, app):
+        self._app = app
+        event.listen(Session, 'after_commit', self._after_commit)
+
+    def _after_commit(self, session):
+        if self._clients:
+            self._wake.set()
+
+    def subscribe(self):
+        """Register a client; returns it and the version it starts at (inside the app context)."""
+        from changes import head
+
+        client = Client()
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                raise TooManyClients()
+            if self._position is None:
+                self._position = head()
+            self._clients.add(client)
+            version = encode_cursor(self._position)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='gomis-events', daemon=True)
+                self._thread.start()
+        return client, version
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _broadcast(self, messages):
+        with self._lock:
+            clients = list(self._clients)
+        for message in messages:
+            for client in clients:
+                client.send(message)
+
+    def _run(self):
+        while True:
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+            try:
+                with self._app.app_context():
+                    self._publish()
+            except Exception:
+                logger.exception('Publishing change events failed')
+
+    def _publish(self):
+        from changes import ENTITIES, head
+        from models import ChangeLog
+
+        with self._lock:
+            if not self._clients:
+                self._position = None
+                return
+            epoch, seq = self._position
+        latest_epoch, latest = head()
+        if latest_epoch != epoch or latest < seq:
+            # Restored database: the clients' versions no longer mean anything
+            with self._lock:
+                self._position = (latest_epoch, latest)
+            self._broadcast([RESYNC])
+            return
+        while seq < latest:
+            entries = (db.session.query(ChangeLog.seq, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.op)
+                       .filter(ChangeLog.seq > seq, ChangeLog.seq <= latest)
+                       .order_by(ChangeLog.seq).limit(BATCH_SIZE).all())
+            if not entries:
+                break
+            messages = []
+            for entry in entries:
+                version = encode_cursor([epoch, entry.seq])
+                messages.append(_message('change', {'entity': ENTITIES.get(entry.table_name, entry.table_name),
+                                                    'id': entry.row_id, 'op': entry.op, 'version': version},
+                                         version))
+            self._broadcast(messages)
+            seq = entries[-1].seq
+        with self._lock:
+            self._position = (epoch, latest)
+
+
+broker = Broker()
+
+
+def stream(client, version):
+    """The text/event-stream body for one client; unsubscribes it when the connection closes."""
+    try:
+        yield f'retry: {RETRY_MS}\n' + _message('hello', {'version': version}, version)
+        while True:
+            try:
+                yield client.queue.get(timeout=KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield KEEPALIVE
+    finally:
+        broker.unsubscribe(client)
+
+
+def limit_clients(threads):
+    """Cap the open streams for a server with `threads` request threads; returns the cap.
+
+    Every stream holds a thread for as long as it is open. The cap keeps THREAD_HEADROOM
+    threads free, so further clients get 503 instead of the API hanging.
+    """
+    broker.max_clients = max(0, min(MAX_CLIENTS, threads - THREAD_HEADROOM))
+    return broker.max_clients
+
+
+def init_app(app):
+    broker.init_app(app)
@@ -0,0 +1,392 @@
+"""Background jobs: long operations run off the request threads, from a table that survives restarts.
+
+A route enqueues a job and answers 202 with it. Clients then poll GET /api/jobs/<id>. A
+job is a row of the `job` table with its kind and JSON params, so queued work is still
+there after a restart. Each server process runs a dispatcher thread, started by the first
+request or by start(). It claims queued jobs with a conditional UPDATE, so several
+processes can share the table, and runs them on a pool of GOMIS_JOB_WORKERS threads.
+Jobs of the same lane run one at a time across processes. Backups, restores and
+archiving share the 'maintenance' lane.
+
+Handlers are registered per kind with @handler and called as fn(job, **params). `job` is a
+JobContext: job.progress() records progress, and both it and job.check_cancelled() raise
+JobCancelled once POST /api/jobs/<id>/cancel was requested. The dispatcher refreshes the
+heartbeat of the jobs it runs. A running job whose heartbeat is older than
+GOMIS_JOB_STALE_SECONDS lost its process and is queued again, up to MAX_ATTEMPTS runs. A
+handler must therefore be safe to rerun from the start.
+
+GOMIS_JOB_WORKERS        jobs run at once per process (default 2; 0 runs none in this process)
+GOMIS_JOB_STALE_SECONDS  heartbeat age after which a running job is requeued (default 60)
+GOMIS_JOB_DIR            uploads and result files (default jobs/ in the instance folder)
+"""
+import json
+import logging
+import os
+import queue
+import shutil
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, exists, or_, select
+
+from db import db
+
+WORKERS = int(os.environ.get('GOMIS_JOB_WORKERS', 2))
+STALE_SECONDS = int(os.environ.get('GOMIS_JOB_STALE_SECONDS') or 60)
+POLL_SECONDS = 2.0  # picks up jobs queued by other processes
+HEARTBEAT_SECONDS = 10.0
+PROGRESS_SECONDS = 0.5  # progress is written at most this often
+MAX_ATTEMPTS = 3
+KEEP_DAYS = 7  # finished jobs and their files are deleted after this
+CLAIM_CANDIDATES = 20
+FINISHED = ('done', 'failed', 'cancelled')
+UPLOAD = '.upload'  # file suffixes in JOB_DIR, after the job id
+OUTPUT = '.out'
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}  # kind -> (fn, lane)
+JOB_DIR = os.environ.get('GOMIS_JOB_DIR')
+
+
+class JobError(ValueError):
+    """Raised for job requests that cannot be served (unknown kind, finished job...)."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once its job was cancelled."""
+
+
+def handler(kind, lane=None):
+    """Register fn(job, **params) as the handler of `kind`."""
+    def decorator(fn):
+        HANDLERS[kind] = (fn, lane)
+        return fn
+    return decorator
+
+
+def _table():
+    from models import Job
+
+    return Job.__table__
+
+
+def new_id():
+    return uuid.uuid4().hex
+
+
+def job_path(job_id, suffix):
+    return os.path.join(JOB_DIR, f'{job_id}{suffix}')
+
+
+def save_upload(job_id, stream):
+    """Write a request body to the job's upload file, without reading it all into memory."""
+    with open(job_path(job_id, UPLOAD), 'wb') as f:
+        shutil.copyfileobj(stream, f, 1024 * 1024)
+
+
+def _remove_files(job_id, suffixes=(UPLOAD, OUTPUT)):
+    for suffix in suffixes:
+        path = job_path(job_id, suffix)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def job_to_dict(row):
+    return {
+        'id': row.id,
+        'kind': row.kind,
+        'status': row.status,
+        'progress': {'done': row.progress_done, 'total': row.progress_total, 'message': row.message},
+        'result': json.loads(row.result) if row.result else None,
+        'error': row.error,
+        'cancelRequested': bool(row.cancel_requested),
+        'attempts': row.attempts,
+        'createdAt': row.created_at,
+        'startedAt': row.started_at,
+        'finishedAt': row.finished_at,
+    }
+
+
+def get_job(job_id):
+    job = _table()
+    with db.engine.connect() as conn:
+        row = conn.execute(select(job).where(job.c.id == job_id)).first()
+    return job_to_dict(row) if row else None
+
+
+def list_jobs(status=None, kind=None, limit=50):
+    """The newest jobs first, optionally of one status and/or kind."""
+    job = _table()
+    query = select(job).order_by(job.c.created_at.desc(), job.c.id).limit(limit)
+    if status:
+        query = query.where(job.c.status == status)
+    if kind:
+        query = query.where(job.c.kind == kind)
+    with db.engine.connect() as conn:
+        return [job_to_dict(row) for row in conn.execute(query)]
+
+
+def enqueue(kind, params=None, job_id=None):
+    """Queue a job of `kind` with JSON-serializable `params`; returns it as a dict."""
+    if kind not in HANDLERS:
+        raise JobError(f'Unknown job kind: {kind}')
+    job_id = job_id or new_id()
+    with db.engine.begin() as conn:
+        conn.execute(_table().insert().values(
+            id=job_id, kind=kind, lane=HANDLERS[kind][1], status='queued', params=json.dumps(params or {}),
+            progress_done=0, cancel_requested=False, attempts=0, created_at=datetime.utcnow(),
+        ))
+    runner.wake()
+    return get_job(job_id)
+
+
+def cancel_job(job_id):
+    """Cancel a queued job at once, or ask a running one to stop; returns the job or None."""
+    job = _table()
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        conn.execute(job.update().where(job.c.id == job_id, job.c.status == 'queued')
+                     .values(status='cancelled', cancel_requested=True, finished_at=now))
+        conn.execute(job.update().where(job.c.id == job_id, job.c.status == 'running')
+                     .values(cancel_requested=True))
+    return get_job(job_id)
+
+
+class JobContext:
+    """What a handler gets: the job id, its files, progress reporting and cancellation."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self._reported = 0.0
+
+    def path(self, suffix):
+        return job_path(self.id, suffix)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if a cancel was requested. Only reads, so it is safe to call
+        while the handler holds a write transaction."""
+        job = _table()
+        with db.engine.connect() as conn:
+            if conn.execute(select(job.c.cancel_requested).where(job.c.id == self.id)).scalar():
+                raise JobCancelled()
+
+    def progress(self, done, total=None, message=None, force=False):
+        """Record progress (at most every PROGRESS_SECONDS unless `force`), then check for a cancel.
+        This writes, so inside a write transaction of the handler use check_cancelled instead."""
+        now = time.monotonic()
+        if not force and now - self._reported < PROGRESS_SECONDS:
+            return
+        self._reported = now
+        values = {'progress_done': done, 'heartbeat_at': datetime.utcnow()}
+        if total is not None:
+            values['progress_total'] = total
+        if message is not None:
+            values['message'] = message[:200]
+        job = _table()
+        with db.engine.begin() as conn:
+            conn.execute(job.update().where(job.c.id == self.id).values(**values))
+        self.check_cancelled()
+
+
+def claim(worker):
+    """Mark the oldest runnable queued job as running on `worker`; returns its row or None."""
+    job = _table()
+    busy = job.alias('busy')
+    with db.engine.connect() as conn:
+        candidates = conn.execute(select(job.c.id, job.c.kind).where(job.c.status == 'queued')
+                                  .order_by(job.c.created_at, job.c.id).limit(CLAIM_CANDIDATES)).all()
+    for job_id, kind in candidates:
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            if kind not in HANDLERS:
+                conn.execute(job.update().where(job.c.id == job_id, job.c.status == 'queued')
+                             .values(status='failed', error=f'Unknown job kind: {kind}', finished_at=now))
+                continue
+            # Only claimed if still queued and no job of its lane is running, in one statement
+            claimed = conn.execute(
+                job.update()
+                .where(job.c.id == job_id, job.c.status == 'queued',
+                       or_(job.c.lane.is_(None),
+                           ~exists().where(busy.c.lane == job.c.lane, busy.c.status == 'running')))
+                .values(status='running', worker=worker, attempts=job.c.attempts + 1,
+                        started_at=now, heartbeat_at=now)
+            ).rowcount
+            if claimed:
+                return conn.execute(select(job).where(job.c.id == job_id)).first()
+    return None
+
+
+def _finish(job_id, worker, status, result=None, error=None):
+    job = _table()
+    with db.engine.begin() as conn:
+        # A job requeued after a stalled heartbeat belongs to another run now
+        conn.execute(job.update().where(job.c.id == job_id, job.c.worker == worker, job.c.status == 'running')
+                     .values(status=status, result=json.dumps(result) if result is not None else None,
+                             error=error, finished_at=datetime.utcnow()))
+
+
+def run_job(row, worker):
+    """Run a claimed job inside an app context and record how it ended."""
+    fn, _ = HANDLERS[row.kind]
+    try:
+        result = fn(JobContext(row.id), **json.loads(row.params or '{}'))
+    except JobCancelled:
+        db.session.rollback()
+        _remove_files(row.id, (OUTPUT,))
+        _finish(row.id, worker, 'cancelled')
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Job %s (%s) failed', row.id, row.kind)
+        _remove_files(row.id, (OUTPUT,))
+        _finish(row.id, worker, 'failed', error=str(e) or type(e).__name__)
+    else:
+        _finish(row.id, worker, 'done', result=result)
+
+
+def requeue_stale(now=None):
+    """Requeue the running jobs whose process stopped sending heartbeats (fail them after
+    MAX_ATTEMPTS runs, cancel them if a cancel was requested)."""
+    job = _table()
+    now = now or datetime.utcnow()
+    stale = and_(job.c.status == 'running', job.c.heartbeat_at < now - timedelta(seconds=STALE_SECONDS))
+    with db.engine.begin() as conn:
+        conn.execute(job.update().where(stale, job.c.cancel_requested)
+                     .values(status='cancelled', finished_at=now))
+        conn.execute(job.update().where(stale, job.c.attempts >= MAX_ATTEMPTS)
+                     .values(status='failed', error='Interrupted too many times', finished_at=now))
+        conn.execute(job.update().where(stale).values(status='queued', worker=None))
+
+
+def expire_finished(now=None):
+    """Delete the jobs that finished more than KEEP_DAYS ago, with their files."""
+    job = _table()
+    old = and_(job.c.status.in_(FINISHED), job.c.finished_at < (now or datetime.utcnow()) - timedelta(days=KEEP_DAYS))
+    with db.engine.begin() as conn:
+        ids = conn.execute(select(job.c.id).where(old)).scalars().all()
+        conn.execute(job.delete().where(old))
+    for job_id in ids:
+        _remove_files(job_id)
+
+
+def snapshot():
+    """Every job row, to carry the queue over a restore (which replaces the whole database)."""
+    job = _table()
+    with db.engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(select(job))]
+
+
+def replace_all(rows):
+    """Put back the rows of snapshot() in place of the jobs the restored backup had."""
+    job = _table()
+    with db.engine.begin() as conn:
+        conn.execute(job.delete())
+        if rows:
+            conn.execute(job.insert(), rows)
+
+
+class Runner:
+    """Dispatcher thread plus worker threads for this process (started lazily)."""
+
+    def __init__(self):
+        self._app = None
+        self._claimed = queue.Queue()
+        self._thread = None
+        self._running = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.worker = None
+
+    def init_app(self, app):
+        self._app = app
+        app.before_request(self._ensure_started)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self.start()
+
+    def start(self):
+        """Start dispatching in this process (idempotent; a no-op with GOMIS_JOB_WORKERS=0)."""
+        with self._lock:
+            if self._thread is not None or WORKERS < 1:
+                return
+            # Taken at start, so a forked server worker gets its own pid
+            self.worker = f'{socket.gethostname()}:{os.getpid()}'
+            # Daemon threads: stopping the server never waits for a job; an interrupted job
+            # is rerun once its heartbeat goes stale
+            for i in range(WORKERS):
+                threading.Thread(target=self._work, name=f'gomis-job-{i}', daemon=True).start()
+            self._thread = threading.Thread(target=self._run, name='gomis-jobs', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        last_beat = 0.0
+        while True:
+            try:
+                with self._app.app_context():
+                    if time.monotonic() - last_beat >= HEARTBEAT_SECONDS:
+                        last_beat = time.monotonic()
+                        self._heartbeat()
+                        requeue_stale()
+                        expire_finished()
+                    self._dispatch()
+            except Exception:
+                logger.exception('Dispatching jobs failed')
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+
+    def _heartbeat(self):
+        with self._lock:
+            running = list(self._running)
+        if running:
+            job = _table()
+            with db.engine.begin() as conn:
+                conn.execute(job.update().where(job.c.id.in_(running), job.c.worker == self.worker)
+                             .values(heartbeat_at=datetime.utcnow()))
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if len(self._running) >= WORKERS:
+                    return
+            row = claim(self.worker)
+            if row is None:
+                return
+            with self._lock:
+                self._running.add(row.id)
+            self._claimed.put(row)
+
+    def _work(self):
+        while True:
+            self._execute(self._claimed.get())
+
+    def _execute(self, row):
+        try:
+            with self._app.app_context():
+                run_job(row, self.worker)
+        except Exception:
+            logger.exception('Recording the end of job %s failed', row.id)
+        finally:
+            with self._lock:
+                self._running.discard(row.id)
+            self._wake.set()  # a slot (and maybe a lane) is free
+
+
+runner = Runner()
+
+
+def start():
+    runner.start()
+
+
+def init_app(app):
+    global JOB_DIR
+    JOB_DIR = JOB_DIR or os.path.join(app.instance_path, 'jobs')
+    os.makedirs(JOB_DIR, exist_ok=True)
+    runner.init_app(app)
@@ -0,0 +1,180 @@
+"""Per-route request metrics and SQL statement counts, in Prometheus text format.
+
+Every request records its latency (histogram), response size and the SQL statements it
+ran: how many (histogram, so routes that issue one query per row stand out) and how long
+they took. Statements run outside a request (background backups, startup) are counted
+under route "<background>". `render()` produces the /api/metrics page.
+
+Slow statements are logged to the `gomis.slow_queries` logger when GOMIS_SLOW_QUERY_MS is
+set, and also appended to the file GOMIS_SLOW_QUERY_LOG when that is set.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)  # statements per request
+BACKGROUND = '<background>'
+
+SLOW_QUERY_MS = float(os.environ.get('GOMIS_SLOW_QUERY_MS') or 0)  # 0 = slow-query log off
+SLOW_QUERY_LOG = os.environ.get('GOMIS_SLOW_QUERY_LOG')
+
+slow_query_logger = logging.getLogger('gomis.slow_queries')
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # non-cumulative; render() accumulates
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))  # (route, method, status)
+_queries = defaultdict(lambda: Histogram(QUERY_BUCKETS))  # (route, method)
+_response_bytes = defaultdict(int)  # (route, method)
+_sql_count = defaultdict(int)  # route
+_sql_seconds = defaultdict(float)  # route
+_slow_queries = defaultdict(int)  # route
+
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else '<unmatched>'
+
+
+def start_request():
+    g.metrics_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_seconds = 0.0
+
+
+def finish_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    route, method = _route(), request.method
+    # Streamed bodies (certificate zips) have no length up front and count as 0 bytes
+    size = response.content_length or 0
+    with _lock:
+        _latency[route, method, response.status_code].observe(elapsed)
+        _queries[route, method].observe(g.sql_count)
+        _response_bytes[route, method] += size
+        _sql_count[route] += g.sql_count
+        _sql_seconds[route] += g.sql_seconds
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+    in_request = has_request_context() and 'sql_count' in g
+    if in_request:
+        g.sql_count += 1
+        g.sql_seconds += elapsed
+        route = _route()
+    else:
+        route = BACKGROUND
+        with _lock:
+            _sql_count[route] += 1
+            _sql_seconds[route] += elapsed
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        with _lock:
+            _slow_queries[route] += 1
+        # Statements only: parameters can hold personal data and password hashes
+        slow_query_logger.warning('%.1f ms %s %s', elapsed * 1000, route, ' '.join(statement.split())[:2000])
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    if context.connection is not None and context.connection.info.get('metrics_start'):
+        context.connection.info['metrics_start'].pop()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _histogram_lines(name, histograms, label_names):
+    lines = []
+    for key, h in sorted(histograms.items(), key=lambda item: tuple(map(str, item[0]))):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(h.buckets, h.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {h.count}')
+        lines.append(f'{name}_sum{_labels(**labels)} {h.sum:.6f}')
+        lines.append(f'{name}_count{_labels(**labels)} {h.count}')
+    return lines
+
+
+def _counter_lines(name, values, label_names, fmt='{}'):
+    return [f'{name}{_labels(**dict(zip(label_names, key if isinstance(key, tuple) else (key,))))} '
+            + fmt.format(value) for key, value in sorted(values.items())]
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        sections = [
+            ('gomis_http_request_duration_seconds', 'histogram', 'Request latency by route, method and status.',
+             _histogram_lines('gomis_http_request_duration_seconds', _latency, ('route', 'method', 'status'))),
+            ('gomis_http_request_sql_queries', 'histogram', 'SQL statements executed per request.',
+             _histogram_lines('gomis_http_request_sql_queries', _queries, ('route', 'method'))),
+            ('gomis_http_response_bytes_total', 'counter', 'Response body bytes sent (streamed bodies excluded).',
+             _counter_lines('gomis_http_response_bytes_total', _response_bytes, ('route', 'method'))),
+            ('gomis_sql_queries_total', 'counter', 'SQL statements executed.',
+             _counter_lines('gomis_sql_queries_total', _sql_count, ('route',))),
+            ('gomis_sql_duration_seconds_total', 'counter', 'Time spent executing SQL statements.',
+             _counter_lines('gomis_sql_duration_seconds_total', _sql_seconds, ('route',), '{:.6f}')),
+            ('gomis_sql_slow_queries_total', 'counter', f'SQL statements slower than {SLOW_QUERY_MS:g} ms (0 = off).',
+             _counter_lines('gomis_sql_slow_queries_total', _slow_queries, ('route',))),
+        ]
+    lines = []
+    for name, kind, help_text, samples in sections:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def init_app(app):
+    """Register the request hooks; call before other before_request hooks so they are timed."""
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    if SLOW_QUERY_LOG:
+        handler = logging.FileHandler(SLOW_QUERY_LOG)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+
+
+def init_engine(engine):
+    """Count and time every statement the engine runs (inside an app context)."""
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
@@ -0,0 +1,138 @@
+"""baseline schema
+
+Tables as created by db.create_all() before schema migrations were introduced.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 22:40:58.849453
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created by the old db.create_all() startup already have some or all of
+    # these tables; only create what is missing so they can be upgraded in place.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'appointment' not in existing:
+        op.create_table('appointment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('participant_name', sa.String(length=100), nullable=False),
+        sa.Column('participant_lrn', sa.String(length=12), nullable=True),
+        sa.Column('participant_type', sa.String(length=20), nullable=True),
+        sa.Column('date', sa.String(length=10), nullable=False),
+        sa.Column('time', sa.String(length=8), nullable=False),
+        sa.Column('consultation_type', sa.String(length=60), nullable=False),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'incident' not in existing:
+        op.create_table('incident',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reported_by', sa.String(length=200), nullable=False),
+        sa.Column('reported_by_lrn', sa.String(length=12), nullable=True),
+        sa.Column('grade', sa.String(length=10), nullable=True),
+        sa.Column('section', sa.String(length=60), nullable=True),
+        sa.Column('date', sa.String(length=10), nullable=False),
+        sa.Column('time', sa.String(length=8), nullable=False),
+        sa.Column('status', sa.String(length=40), nullable=True),
+        sa.Column('narrative_date', sa.String(length=10), nullable=True),
+        sa.Column('narrative_time', sa.String(length=8), nullable=True),
+        sa.Column('narrative_description', sa.Text(), nullable=True),
+        sa.Column('action_taken', sa.Text(), nullable=True),
+        sa.Column('recommendation', sa.Text(), nullable=True),
+        sa.Column('participants', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'session' not in existing:
+        op.create_table('session',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.String(length=10), nullable=False),
+        sa.Column('time', sa.String(length=8), nullable=False),
+        sa.Column('appointment_type', sa.String(length=40), nullable=True),
+        sa.Column('consultation_type', sa.String(length=80), nullable=True),
+        sa.Column('status', sa.String(length=40), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('participants', sa.Text(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if 'student' not in existing:
+        op.create_table('student',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('lrn', sa.String(length=12), nullable=False),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('middle_name', sa.String(length=100), nullable=True),
+        sa.Column('grade_level', sa.String(length=10), nullable=True),
+        sa.Column('section', sa.String(length=30), nullable=True),
+        sa.Column('track_strand', sa.String(length=60), nullable=True),
+        sa.Column('specialization', sa.String(length=60), nullable=True),
+        sa.Column('school_year', sa.String(length=20), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('lrn')
+        )
+    if 'user' not in existing:
+        op.create_table('user',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('first_name', sa.String(length=100), nullable=False),
+        sa.Column('last_name', sa.String(length=100), nullable=False),
+        sa.Column('middle_name', sa.String(length=100), nullable=True),
+        sa.Column('suffix', sa.String(length=30), nullable=True),
+        sa.Column('gender', sa.String(length=30), nullable=False),
+        sa.Column('position', sa.String(length=100), nullable=True),
+        sa.Column('work_position', sa.String(length=100), nullable=True),
+        sa.Column('specialization', sa.String(length=100), nullable=True),
+        sa.Column('contact_no', sa.String(length=30), nullable=True),
+        sa.Column('role', sa.String(length=30), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+    if 'violation' not in existing:
+        op.create_table('violation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('student_name', sa.String(length=200), nullable=False),
+        sa.Column('student_lrn', sa.String(length=12), nullable=True),
+        sa.Column('violation_type', sa.String(length=120), nullable=False),
+        sa.Column('date', sa.String(length=10), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('severity', sa.String(length=20), nullable=True),
+        sa.Column('action_taken', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade():
+    op.drop_table('violation')
+    op.drop_table('user')
+    op.drop_table('student')
+    op.drop_table('session')
+    op.drop_table('incident')
+    op.drop_table('appointment')
@@ -0,0 +1,55 @@
+"""hot path indexes
+
+Indexes for the list orderings (date desc, id desc), violation status propagation
+by (student_lrn, date) / (student_id, date) and the status filters and counts.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 22:41:00.595246
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_student_status_upper', 'student', [sa.text('upper(status)')], if_not_exists=True)
+
+    op.create_index('ix_appointment_date_time', 'appointment', ['date', 'time'], if_not_exists=True)
+    op.create_index('ix_appointment_status', 'appointment', ['status'], if_not_exists=True)
+
+    op.create_index('ix_incident_date', 'incident', ['date'], if_not_exists=True)
+    op.create_index('ix_incident_status', 'incident', ['status'], if_not_exists=True)
+
+    op.create_index('ix_session_date', 'session', ['date'], if_not_exists=True)
+    op.create_index('ix_session_status', 'session', ['status'], if_not_exists=True)
+
+    op.create_index('ix_violation_date', 'violation', ['date'], if_not_exists=True)
+    op.create_index('ix_violation_student_id_date', 'violation', ['student_id', 'date'], if_not_exists=True)
+    op.create_index('ix_violation_student_lrn_date', 'violation', ['student_lrn', 'date'], if_not_exists=True)
+    op.create_index('ix_violation_status_upper', 'violation', [sa.text('upper(status)')], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_violation_status_upper', table_name='violation')
+    op.drop_index('ix_violation_student_lrn_date', table_name='violation')
+    op.drop_index('ix_violation_student_id_date', table_name='violation')
+    op.drop_index('ix_violation_date', table_name='violation')
+
+    op.drop_index('ix_session_status', table_name='session')
+    op.drop_index('ix_session_date', table_name='session')
+
+    op.drop_index('ix_incident_status', table_name='incident')
+    op.drop_index('ix_incident_date', table_name='incident')
+
+    op.drop_index('ix_appointment_status', table_name='appointment')
+    op.drop_index('ix_appointment_date_time', table_name='appointment')
+
+    op.drop_index('ix_student_status_upper', table_name='student')
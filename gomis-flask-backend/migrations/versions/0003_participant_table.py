@@ -0,0 +1,125 @@
+"""participant table
+
+Move the JSON `participants` blobs of incidents and sessions into an indexed
+participant table (one row per array entry) and drop the old columns.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 23:02:11.418302
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+participant = sa.table(
+    'participant',
+    sa.column('parent_type', sa.String),
+    sa.column('parent_id', sa.Integer),
+    sa.column('position', sa.Integer),
+    sa.column('student_id', sa.Integer),
+    sa.column('lrn', sa.String),
+    sa.column('data', sa.Text),
+)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _keys(p):
+    # Same rules as participants.participant_keys at the time of this migration.
+    if not isinstance(p, dict):
+        return _as_int(p), None
+    lrn = p.get('lrn') or p.get('studentLRN')
+    if 'studentId' in p:
+        student_id = p['studentId']
+    else:
+        # A bare `id` is only a student id on whole student objects; incident entries
+        # use client-generated ids.
+        student_id = p.get('id') if lrn else None
+    if not lrn and isinstance(student_id, str) and len(student_id) == 12 and student_id.isdigit():
+        lrn, student_id = student_id, None
+    return _as_int(student_id), (str(lrn) if lrn else None)
+
+
+def upgrade():
+    op.create_table('participant',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('parent_type', sa.String(length=20), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.Integer(), nullable=True),
+    sa.Column('lrn', sa.String(length=12), nullable=True),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_participant_parent', 'participant', ['parent_type', 'parent_id', 'position'])
+    op.create_index('ix_participant_student_id', 'participant', ['student_id', 'parent_type', 'parent_id'])
+    op.create_index('ix_participant_lrn', 'participant', ['lrn', 'parent_type', 'parent_id'])
+
+    conn = op.get_bind()
+    for parent_type in ('incident', 'session'):
+        rows = []
+        for parent_id, raw in conn.execute(sa.text(f'SELECT id, participants FROM {parent_type}')):
+            try:
+                items = json.loads(raw or '[]')
+            except ValueError:
+                items = []
+            if not isinstance(items, list):
+                items = [items]
+            for position, p in enumerate(items):
+                student_id, lrn = _keys(p)
+                rows.append({'parent_type': parent_type, 'parent_id': parent_id, 'position': position,
+                             'student_id': student_id, 'lrn': lrn, 'data': json.dumps(p)})
+        if rows:
+            op.bulk_insert(participant, rows)
+
+    op.execute("""
+        UPDATE participant SET lrn = (SELECT s.lrn FROM student s WHERE s.id = participant.student_id)
+        WHERE lrn IS NULL AND student_id IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE participant SET student_id = (SELECT s.id FROM student s WHERE s.lrn = participant.lrn)
+        WHERE student_id IS NULL AND lrn IS NOT NULL
+    """)
+
+    with op.batch_alter_table('incident', schema=None) as batch_op:
+        batch_op.drop_column('participants')
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.drop_column('participants')
+
+
+def downgrade():
+    with op.batch_alter_table('session', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('participants', sa.Text(), nullable=True))
+    with op.batch_alter_table('incident', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('participants', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    for parent_type in ('incident', 'session'):
+        arrays = {}
+        rows = conn.execute(sa.text(
+            'SELECT parent_id, data FROM participant WHERE parent_type = :t ORDER BY parent_id, position'
+        ), {'t': parent_type})
+        for parent_id, data in rows:
+            arrays.setdefault(parent_id, []).append(json.loads(data))
+        for parent_id, items in arrays.items():
+            conn.execute(sa.text(f'UPDATE {parent_type} SET participants = :p WHERE id = :id'),
+                         {'p': json.dumps(items), 'id': parent_id})
+
+    op.drop_index('ix_participant_lrn', table_name='participant')
+    op.drop_index('ix_participant_student_id', table_name='participant')
+    op.drop_index('ix_participant_parent', table_name='participant')
+    op.drop_table('participant')
@@ -0,0 +1,26 @@
+"""student grade level index
+
+Lets the dashboard summary count students per grade level (and the meta endpoint list
+grade levels/sections) from the index instead of scanning the student table.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 23:31:47.202915
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_student_grade_level_section', 'student', ['grade_level', 'section'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_student_grade_level_section', table_name='student')
@@ -0,0 +1,32 @@
+"""preference table
+
+Persist per-user settings (backup path, retention, session timeout...) that the
+preferences API used to only echo back.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 23:52:06.113870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('preference',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('data', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('preference')
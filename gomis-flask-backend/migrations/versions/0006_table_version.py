@@ -0,0 +1,40 @@
+"""table version counters
+
+Per-table change counters behind the ETags of the read endpoints. The triggers that bump
+them are (re)created on startup by versions.init_versions().
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:41:18.402566
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_version',
+    sa.Column('name', sa.String(length=40), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        triggers = bind.execute(sa.text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'version_bump_%'"
+        )).scalars().all()
+        for name in triggers:
+            op.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+    elif bind.dialect.name == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS bump_table_version() CASCADE')
+    op.drop_table('table_version')
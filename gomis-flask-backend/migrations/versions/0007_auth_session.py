@@ -0,0 +1,38 @@
+"""auth session table
+
+Server-side sessions behind the signed bearer tokens issued at login.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 01:26:44.910237
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('auth_session',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=False),
+    sa.Column('idle_timeout', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('auth_session', schema=None) as batch_op:
+        batch_op.create_index('ix_auth_session_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('auth_session', schema=None) as batch_op:
+        batch_op.drop_index('ix_auth_session_user_id')
+
+    op.drop_table('auth_session')
@@ -0,0 +1,75 @@
+"""appointment schedule columns
+
+Normalized starts_at/ends_at datetimes (from the free-form date and time strings plus a
+duration) with an index, for calendar range queries and double-booking checks. Rows whose
+date or time cannot be parsed keep NULLs until they are next edited.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 02:14:05.381920
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+DEFAULT_DURATION = 30  # minutes, as scheduling.DEFAULT_DURATION at the time of this migration
+
+appointment = sa.table(
+    'appointment',
+    sa.column('id', sa.Integer),
+    sa.column('duration_minutes', sa.Integer),
+    sa.column('starts_at', sa.DateTime),
+    sa.column('ends_at', sa.DateTime),
+)
+
+
+def _starts_at(date, time):
+    try:
+        day = datetime.strptime(date, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return None
+    for fmt in ('%H:%M:%S', '%H:%M', '%I:%M %p', '%I:%M:%S %p'):
+        try:
+            t = datetime.strptime(str(time).strip(), fmt)
+        except ValueError:
+            continue
+        return day + timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
+    return None
+
+
+def upgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('starts_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('ends_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_appointment_starts_at', ['starts_at', 'ends_at'], unique=False)
+
+    conn = op.get_bind()
+    rows = []
+    for id_, date, time in conn.execute(sa.text('SELECT id, date, time FROM appointment')):
+        starts_at = _starts_at(date, time)
+        if starts_at is not None:
+            rows.append({'b_id': id_, 'duration_minutes': DEFAULT_DURATION, 'starts_at': starts_at,
+                         'ends_at': starts_at + timedelta(minutes=DEFAULT_DURATION)})
+    if rows:
+        conn.execute(
+            appointment.update().where(appointment.c.id == sa.bindparam('b_id')),
+            rows,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('appointment', schema=None) as batch_op:
+        batch_op.drop_index('ix_appointment_starts_at')
+        batch_op.drop_column('ends_at')
+        batch_op.drop_column('starts_at')
+        batch_op.drop_column('duration_minutes')
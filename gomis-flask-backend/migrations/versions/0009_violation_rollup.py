@@ -0,0 +1,55 @@
+"""violation rollup table
+
+Violation counts per month, type, severity, status, grade and section for the analytics
+endpoint, filled from the existing violations. The triggers that keep it up to date are
+(re)created on startup by analytics.init_analytics().
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 03:02:51.630417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('violation_rollup',
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('violation_type', sa.String(length=120), nullable=False),
+    sa.Column('severity', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('grade_level', sa.String(length=10), nullable=False),
+    sa.Column('section', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('month', 'violation_type', 'severity', 'status', 'grade_level', 'section')
+    )
+    op.execute("""
+        INSERT INTO violation_rollup (month, violation_type, severity, status, grade_level, section, count)
+        SELECT substr(v.date, 1, 7), coalesce(v.violation_type, ''), coalesce(v.severity, ''),
+               coalesce(v.status, ''), coalesce(s.grade_level, ''), coalesce(s.section, ''), count(*)
+        FROM violation v LEFT JOIN student s ON s.id = v.student_id
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        triggers = bind.execute(sa.text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'violation_rollup_%'"
+        )).scalars().all()
+        for name in triggers:
+            op.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+    elif bind.dialect.name == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS violation_rollup_violation() CASCADE')
+        op.execute('DROP FUNCTION IF EXISTS violation_rollup_student() CASCADE')
+        op.execute('DROP FUNCTION IF EXISTS violation_rollup_move(integer, text, text, text, text)')
+    op.drop_table('violation_rollup')
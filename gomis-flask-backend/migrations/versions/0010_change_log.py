@@ -0,0 +1,48 @@
+"""change log table
+
+Latest insert/update/delete per row of the synced tables, read by /api/changes. It starts
+empty: clients take a cursor and load the lists once before syncing. The triggers that
+write it are (re)created on startup by changes.init_changes().
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 05:12:40.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_log',
+    sa.Column('seq', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('table_name', sa.String(length=40), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.PrimaryKeyConstraint('seq'),
+    sa.UniqueConstraint('table_name', 'row_id', name='uq_change_log_row'),
+    sqlite_autoincrement=True
+    )
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        triggers = bind.execute(sa.text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'change_log_%'"
+        )).scalars().all()
+        for name in triggers:
+            op.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+    elif bind.dialect.name == 'postgresql':
+        op.execute('DROP FUNCTION IF EXISTS log_change() CASCADE')
+        op.execute('DROP FUNCTION IF EXISTS log_participant_change() CASCADE')
+    op.execute("DELETE FROM table_version WHERE name = 'change_log'")
+    op.drop_table('change_log')
@@ -0,0 +1,57 @@
+"""never reuse row ids
+
+Archived rows (archive.py) keep their ids. SQLite gives a plain INTEGER PRIMARY KEY
+max(id) + 1, so once the newest rows of a table were archived or deleted a new row could
+take the id of an archived one. The synced tables are rebuilt with AUTOINCREMENT, which
+never hands out an id twice. Their triggers are dropped first (a table rebuild fails
+while a trigger refers to the table being replaced) and recreated on startup by the
+init_* functions. PostgreSQL sequences never reuse ids, so there is nothing to do there.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 07:26:03.514209
+
+"""
+import warnings
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+TABLES = ('student', 'appointment', 'violation', 'incident', 'session')
+
+# Reflection skips expression indexes, so the rebuild loses them
+EXPRESSION_INDEXES = [
+    ('ix_student_status_upper', 'student'),
+    ('ix_violation_status_upper', 'violation'),
+]
+
+
+def _rebuild(autoincrement):
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    for (trigger,) in bind.execute(sa.text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).all():
+        op.execute(f'DROP TRIGGER IF EXISTS "{trigger}"')
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', 'Skipped unsupported reflection of expression-based index')
+        for table in TABLES:
+            with op.batch_alter_table(table, recreate='always',
+                                      table_kwargs={'sqlite_autoincrement': autoincrement}):
+                pass
+    for name, table in EXPRESSION_INDEXES:
+        op.create_index(name, table, [sa.text('upper(status)')], if_not_exists=True)
+
+
+def upgrade():
+    _rebuild(True)
+
+
+def downgrade():
+    _rebuild(False)
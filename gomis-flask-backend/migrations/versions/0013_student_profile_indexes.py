@@ -0,0 +1,30 @@
+"""student profile indexes
+
+Let /api/students/<id>/profile find a student's appointments (by participant LRN) and
+the incidents they reported (by reporter LRN) from an index, newest first, instead of
+scanning the appointment and incident tables.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17 14:12:05.318276
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_appointment_participant_lrn_date', 'appointment', ['participant_lrn', 'date'],
+                    if_not_exists=True)
+    op.create_index('ix_incident_reported_by_lrn_date', 'incident', ['reported_by_lrn', 'date'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_incident_reported_by_lrn_date', table_name='incident')
+    op.drop_index('ix_appointment_participant_lrn_date', table_name='appointment')
@@ -17,6 +17,13 @@ class Student(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # count_students_by_status compares upper(status)
+        db.Index('ix_student_status_upper', db.func.upper(status)),
+        db.Index('ix_student_grade_level_section', 'grade_level', 'section'),
+        {'sqlite_autoincrement': True},  # ids are never reused (archived rows keep theirs)
+    )
+
 class Appointment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -25,12 +32,24 @@ class Appointment(db.Model):
     participant_type = db.Column(db.String(20))
     date = db.Column(db.String(10), nullable=False) # yyyy-MM-dd
     time = db.Column(db.String(8), nullable=False)  # HH:mm:ss
+    duration_minutes = db.Column(db.Integer)
+    # date + time (+ duration) as datetimes, kept in sync by scheduling.set_schedule
+    starts_at = db.Column(db.DateTime)
+    ends_at = db.Column(db.DateTime)
     consultation_type = db.Column(db.String(60), nullable=False)
     notes = db.Column(db.Text)
     status = db.Column(db.String(20), default='SCHEDULED')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_appointment_date_time', 'date', 'time'),
+        db.Index('ix_appointment_status', 'status'),
+        db.Index('ix_appointment_starts_at', 'starts_at', 'ends_at'),
+        db.Index('ix_appointment_participant_lrn_date', 'participant_lrn', 'date'),
+        {'sqlite_autoincrement': True},
+    )
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -48,6 +67,24 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+class AuthSession(db.Model):
+    # Login sessions behind the bearer tokens (see auth.py)
+    __tablename__ = 'auth_session'
+    id = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    idle_timeout = db.Column(db.Integer)  # seconds; NULL = no idle timeout
+
+    __table_args__ = (
+        db.Index('ix_auth_session_user_id', 'user_id'),
+    )
+
+class Preference(db.Model):
+    user_id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Text, nullable=False, default='{}')  # JSON object of camelCase settings
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Violation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, nullable=False)
@@ -62,6 +99,15 @@ class Violation(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_violation_date', 'date'),
+        db.Index('ix_violation_student_id_date', 'student_id', 'date'),
+        db.Index('ix_violation_student_lrn_date', 'student_lrn', 'date'),
+        # list_violations filters on upper(status)
+        db.Index('ix_violation_status_upper', db.func.upper(status)),
+        {'sqlite_autoincrement': True},
+    )
+
 class Incident(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     reported_by = db.Column(db.String(200), nullable=False)
@@ -76,10 +122,16 @@ class Incident(db.Model):
     narrative_description = db.Column(db.Text)
     action_taken = db.Column(db.Text)
     recommendation = db.Column(db.Text)
-    participants = db.Column(db.Text)  # JSON string
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_incident_date', 'date'),
+        db.Index('ix_incident_status', 'status'),
+        db.Index('ix_incident_reported_by_lrn_date', 'reported_by_lrn', 'date'),
+        {'sqlite_autoincrement': True},
+    )
+
 class Session(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.String(10), nullable=False)
@@ -88,7 +140,86 @@ class Session(db.Model):
     consultation_type = db.Column(db.String(80))
     status = db.Column(db.String(40))
     notes = db.Column(db.Text)
-    participants = db.Column(db.Text)  # JSON string
     summary = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_session_date', 'date'),
+        db.Index('ix_session_status', 'status'),
+        {'sqlite_autoincrement': True},
+    )
+
+class Participant(db.Model):
+    # Participants of incidents and sessions, one row per entry of the API `participants` array
+    id = db.Column(db.Integer, primary_key=True)
+    parent_type = db.Column(db.String(20), nullable=False)  # incident/session
+    parent_id = db.Column(db.Integer, nullable=False)
+    position = db.Column(db.Integer, nullable=False)  # index in the participants array
+    student_id = db.Column(db.Integer)
+    lrn = db.Column(db.String(12))
+    data = db.Column(db.Text, nullable=False)  # the participant object as sent by the client (JSON)
+
+    __table_args__ = (
+        db.Index('ix_participant_parent', 'parent_type', 'parent_id', 'position'),
+        db.Index('ix_participant_student_id', 'student_id', 'parent_type', 'parent_id'),
+        db.Index('ix_participant_lrn', 'lrn', 'parent_type', 'parent_id'),
+    )
+
+class ViolationRollup(db.Model):
+    # Violation counts per month/type/severity/status/grade/section, kept up to date by
+    # triggers (see analytics.py); '' stands for a missing value
+    __tablename__ = 'violation_rollup'
+    month = db.Column(db.String(7), primary_key=True)  # yyyy-MM
+    violation_type = db.Column(db.String(120), primary_key=True)
+    severity = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    grade_level = db.Column(db.String(10), primary_key=True)
+    section = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    # Latest change per row of the synced tables, written by triggers (see changes.py);
+    # seq is the /api/changes cursor position and is never reused
+    __tablename__ = 'change_log'
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    table_name = db.Column(db.String(40), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert/delete
+    changed_at = db.Column(db.DateTime, nullable=False, server_default=db.func.current_timestamp())
+
+    __table_args__ = (
+        db.UniqueConstraint('table_name', 'row_id', name='uq_change_log_row'),
+        {'sqlite_autoincrement': True},
+    )
+
+class TableVersion(db.Model):
+    # Change counter per table, bumped by triggers (see versions.py); used for ETags
+    __tablename__ = 'table_version'
+    name = db.Column(db.String(40), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+class Job(db.Model):
+    # Background jobs (see jobs.py); params/result are JSON, the id is a uuid4 hex
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(40), nullable=False)
+    lane = db.Column(db.String(40))  # jobs of one lane run one at a time
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued/running/done/failed/cancelled
+    params = db.Column(db.Text)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    message = db.Column(db.String(200))
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(120))  # host:pid of the process running it
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_job_status_created', 'status', 'created_at'),
+        db.Index('ix_job_lane_status', 'lane', 'status'),
+    )
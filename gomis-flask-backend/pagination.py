@@ -0,0 +1,157 @@
+import base64
+import heapq
+import json
+from itertools import islice
+
+from flask import jsonify, request
+from sqlalchemy import and_, or_
+
+from archive import ArchiveError, from_archive, include_archived
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+LAYOUTS = ('objects', 'columns')
+
+
+class BadRequest(ValueError):
+    """Raised when list query parameters (cursor, fields, limit) are invalid."""
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise BadRequest('Invalid cursor')
+    # Only what encode_cursor writes (dates, ids); anything else would reach the SQL
+    if not isinstance(values, list) or not all(isinstance(v, (int, str)) and not isinstance(v, bool)
+                                               for v in values):
+        raise BadRequest('Invalid cursor')
+    return values
+
+
+def parse_fields(raw, field_map, batch_fields=()):
+    """Turn `fields=a,b,c` into an ordered list of camelCase keys, or None for all fields."""
+    if not raw:
+        return None
+    keys = [k.strip() for k in raw.split(',') if k.strip()]
+    unknown = [k for k in keys if k not in field_map and k not in batch_fields]
+    if unknown:
+        raise BadRequest('Unknown fields: ' + ', '.join(unknown))
+    return list(dict.fromkeys(keys))
+
+
+def keyset_filter(order_cols, values, descending):
+    """Rows strictly after `values` in (col1, col2, ...) order, e.g. (date, id) < (d, i)."""
+    if len(values) != len(order_cols):
+        raise BadRequest('Invalid cursor')
+    clauses = []
+    for i, col in enumerate(order_cols):
+        equal = [order_cols[j] == values[j] for j in range(i)]
+        step = col < values[i] if descending else col > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def list_response(query, order_cols, serializer, descending=True, batch_fields=None):
+    """Serialize a list query, honoring the optional `limit`, `cursor` and `fields` args.
+
+    Without `limit`/`cursor` the full list is returned as a plain JSON array, as old
+    clients expect. With either of them the response is a page envelope
+    `{"items": [...], "nextCursor": str|null}` using keyset pagination on `order_cols`
+    (the last of which must be the primary key).
+    Only the columns of `serializer` (or of the keys requested with `fields=`) are
+    selected, and rows are serialized without building ORM instances.
+    `batch_fields` maps keys that do not live on the row to a loader taking the list of
+    row ids and returning `{id: value}`; each loader runs once per response.
+    With `includeArchived=true` the same query also runs against the archive and both
+    sorted results are merged; loaders then get the archived ids with `archived=True`.
+    `format=columns` sends the keys once: `{"columns": [...], "rows": [[...], ...]}` (plus
+    `nextCursor` when paged) instead of one object per row.
+    """
+    batch_fields = batch_fields or {}
+    try:
+        fields = parse_fields(request.args.get('fields'), serializer.field_map, batch_fields)
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit')
+        paginated = cursor is not None or limit is not None
+        archived = include_archived(request.args)
+        layout = request.args.get('format') or 'objects'
+        if layout not in LAYOUTS:
+            raise BadRequest('Invalid format (use ' + ' or '.join(LAYOUTS) + ')')
+        columnar = layout == 'columns'
+        if paginated:
+            try:
+                limit = int(limit) if limit is not None else DEFAULT_LIMIT
+            except ValueError:
+                raise BadRequest('Invalid limit')
+            limit = max(1, min(limit, MAX_LIMIT))
+            if cursor:
+                query = query.filter(keyset_filter(order_cols, decode_cursor(cursor), descending))
+    except (BadRequest, ArchiveError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in order_cols])
+    if paginated:
+        query = query.limit(limit + 1)
+
+    if fields:
+        serializer = serializer.project([k for k in fields if k not in batch_fields])
+    batch = {k: loader for k, loader in batch_fields.items() if not fields or k in fields}
+    n = len(serializer.columns)
+    query = query.with_entities(*serializer.columns, *order_cols)
+    rows = query.all()
+    archived_ids = ()
+    if archived:
+        old = from_archive(query).all()
+        if old:
+            rows = heapq.merge(rows, old, key=lambda row: tuple(row[n:]), reverse=descending)
+            if paginated:
+                rows = islice(rows, limit + 1)
+            rows = list(rows)
+            archived_ids = {row[-1] for row in old}
+    keys = [tuple(row[n:]) for row in rows]
+    columns = list(serializer.keys)
+    serialize = serializer.values if columnar else serializer.row
+    items = [serialize(row) for row in rows]
+    if batch:
+        ids = [key[-1] for key in keys]
+        for k, loader in batch.items():
+            if archived_ids:
+                found = loader([i for i in ids if i not in archived_ids])
+                found.update(loader([i for i in ids if i in archived_ids], archived=True))
+            else:
+                found = loader(ids)
+            if columnar:
+                columns.append(k)
+                for item, id_ in zip(items, ids):
+                    item.append(found[id_])
+            else:
+                for item, id_ in zip(items, ids):
+                    item[k] = found[id_]
+    if fields and len(fields) != n:
+        # batch fields go where the client listed them
+        if columnar:
+            positions = [columns.index(k) for k in fields]
+            items = [[item[i] for i in positions] for item in items]
+            columns = list(fields)
+        else:
+            items = [{k: item[k] for k in fields} for item in items]
+
+    next_cursor = None
+    if paginated and len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(keys[limit - 1])
+    if columnar:
+        body = {'columns': columns, 'rows': items}
+        if paginated:
+            body['nextCursor'] = next_cursor
+        return jsonify(body)
+    if not paginated:
+        return jsonify(items)
+    return jsonify({'items': items, 'nextCursor': next_cursor})
@@ -0,0 +1,118 @@
+import json
+
+from sqlalchemy import select, union
+
+from db import chunks, db
+
+INCIDENT = 'incident'
+SESSION = 'session'
+
+# Fill in whichever of lrn / student_id the client did not send from the student table.
+RESOLVE_SQL = [
+    """
+    UPDATE participant SET lrn = (SELECT s.lrn FROM student s WHERE s.id = participant.student_id)
+    WHERE parent_type = :parent_type AND parent_id = :parent_id
+      AND lrn IS NULL AND student_id IS NOT NULL
+    """,
+    """
+    UPDATE participant SET student_id = (SELECT s.id FROM student s WHERE s.lrn = participant.lrn)
+    WHERE parent_type = :parent_type AND parent_id = :parent_id
+      AND student_id IS NULL AND lrn IS NOT NULL
+    """,
+]
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def participant_keys(p):
+    """Return (student_id, lrn) for one entry of a `participants` array.
+
+    Sessions send whole student objects ({id, lrn, ...}); incidents send
+    {id: '<ts>-<lrn>', studentId, name, ...} where studentId falls back to the LRN.
+    """
+    if not isinstance(p, dict):
+        return _as_int(p), None
+    lrn = p.get('lrn') or p.get('studentLRN')
+    if 'studentId' in p:
+        student_id = p['studentId']
+    else:
+        # A bare `id` is only a student id on whole student objects; incident entries
+        # use client-generated ids.
+        student_id = p.get('id') if lrn else None
+    if not lrn and isinstance(student_id, str) and len(student_id) == 12 and student_id.isdigit():
+        lrn, student_id = student_id, None
+    return _as_int(student_id), (str(lrn) if lrn else None)
+
+
+def set_participants(parent_type, parent_id, items):
+    """Replace the participant rows of one incident/session (within the caller's transaction)."""
+    from models import Participant
+
+    Participant.query.filter_by(parent_type=parent_type, parent_id=parent_id).delete(synchronize_session=False)
+    rows = []
+    for position, p in enumerate(items or []):
+        student_id, lrn = participant_keys(p)
+        rows.append({
+            'parent_type': parent_type,
+            'parent_id': parent_id,
+            'position': position,
+            'student_id': student_id,
+            'lrn': lrn,
+            'data': json.dumps(p),
+        })
+    if rows:
+        db.session.execute(Participant.__table__.insert(), rows)
+        for sql in RESOLVE_SQL:
+            db.session.execute(db.text(sql), {'parent_type': parent_type, 'parent_id': parent_id})
+
+
+def load_participants(parent_type, parent_ids, archived=False):
+    """Batch-load the `participants` arrays for many parents: {parent_id: [...]}.
+
+    One query per CHUNK_SIZE parents instead of one per row. `archived` reads the archive.
+    """
+    from archive import from_archive
+    from models import Participant
+
+    result = {pid: [] for pid in parent_ids}
+    for chunk in chunks(result):
+        rows = db.session.query(Participant.parent_id, Participant.data).filter(
+            Participant.parent_type == parent_type,
+            Participant.parent_id.in_(chunk),
+        ).order_by(Participant.parent_id, Participant.position)
+        if archived:
+            rows = from_archive(rows)
+        for parent_id, data in rows:
+            result[parent_id].append(json.loads(data))
+    return result
+
+
+def participant_lrns(parent_type, parent_id):
+    from models import Participant
+
+    rows = db.session.query(Participant.lrn).filter(
+        Participant.parent_type == parent_type,
+        Participant.parent_id == parent_id,
+        Participant.lrn.isnot(None),
+    )
+    return {row[0] for row in rows}
+
+
+def involving(parent_type, student_id, lrn):
+    """The ids of the incidents/sessions that list a student (by id or LRN) as a participant.
+
+    A UNION of two lookups on ix_participant_student_id / ix_participant_lrn, for use as
+    `Parent.id.in_(...)`.
+    """
+    from models import Participant
+
+    return union(
+        select(Participant.parent_id).where(Participant.student_id == student_id,
+                                            Participant.parent_type == parent_type),
+        select(Participant.parent_id).where(Participant.lrn == lrn, Participant.parent_type == parent_type),
+    )
@@ -0,0 +1,39 @@
+import json
+
+from db import db
+
+DEFAULT_PREFERENCES = {
+    'theme': 'default',
+    'twoFactorEnabled': False,
+    'emailNotifications': True,
+    'smsNotifications': False,
+    'appointmentReminders': True,
+    'incidentAlerts': True,
+    'sessionTimeout': True,
+    'backupPath': '',
+    'retentionType': 'years',
+    'retentionValue': '7',
+}
+
+
+def load_preferences(user_id):
+    """Stored preferences of a user merged over the defaults."""
+    from models import Preference
+
+    row = db.session.get(Preference, user_id)
+    stored = json.loads(row.data) if row and row.data else {}
+    return {**DEFAULT_PREFERENCES, **stored, 'userId': user_id}
+
+
+def save_preferences(user_id, changes):
+    """Merge `changes` (known keys only) into the user's stored preferences; caller commits."""
+    from models import Preference
+
+    row = db.session.get(Preference, user_id)
+    if row is None:
+        row = Preference(user_id=user_id, data='{}')
+        db.session.add(row)
+    stored = json.loads(row.data or '{}')
+    stored.update({k: v for k, v in changes.items() if k in DEFAULT_PREFERENCES})
+    row.data = json.dumps(stored)
+    return {**DEFAULT_PREFERENCES, **stored, 'userId': user_id}
@@ -0,0 +1,76 @@
+"""Propagate incident/session status to the matching violations with one UPDATE.
+
+The functions only execute statements; the caller commits, so the parent update and
+the propagation land in the same transaction.
+"""
+from sqlalchemy import or_, select, tuple_, update
+
+from db import chunks, db
+from participants import SESSION
+
+
+def incident_status_update(incident_ids, status):
+    """UPDATE matching Violation (student_lrn, date) against Incident (reported_by_lrn, date).
+
+    Served by ix_violation_student_lrn_date.
+    """
+    from models import Incident, Violation
+
+    targets = select(Incident.reported_by_lrn, Incident.date).where(
+        Incident.id.in_(incident_ids), Incident.reported_by_lrn.isnot(None)
+    )
+    return (
+        update(Violation)
+        .where(tuple_(Violation.student_lrn, Violation.date).in_(targets))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def session_status_update(session_ids, status):
+    """UPDATE the violations of the session participants (by LRN or student id) on the session date.
+
+    Served by ix_violation_student_lrn_date / ix_violation_student_id_date.
+    """
+    from models import Participant, Session, Violation
+
+    participants = (
+        select(Participant.lrn, Participant.student_id, Session.date)
+        .join(Session, Session.id == Participant.parent_id)
+        .where(Participant.parent_type == SESSION, Participant.parent_id.in_(session_ids))
+    )
+    by_lrn = participants.with_only_columns(Participant.lrn, Session.date).where(Participant.lrn.isnot(None))
+    by_id = participants.with_only_columns(Participant.student_id, Session.date).where(
+        Participant.student_id.isnot(None)
+    )
+    return (
+        update(Violation)
+        .where(or_(
+            tuple_(Violation.student_lrn, Violation.date).in_(by_lrn),
+            tuple_(Violation.student_id, Violation.date).in_(by_id),
+        ))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def propagate_incident_status(incident_ids, status):
+    """Set `status` on violations of the reporting students on the incident dates.
+
+    Returns the number of violations updated.
+    """
+    count = 0
+    for chunk in chunks(incident_ids):
+        count += db.session.execute(incident_status_update(chunk, status)).rowcount
+    return count
+
+
+def propagate_session_status(session_ids, status):
+    """Set `status` on violations of the session participants on the session dates.
+
+    Returns the number of violations updated.
+    """
+    count = 0
+    for chunk in chunks(session_ids):
+        count += db.session.execute(session_status_update(chunk, status)).rowcount
+    return count
@@ -0,0 +1,116 @@
+"""EXPLAIN QUERY PLAN checks for the hot query paths.
+
+Run with `flask --app app check-indexes`; it exits non-zero if any query below stops
+using the index it was written for (e.g. after a model or migration change).
+"""
+from datetime import datetime
+
+from sqlalchemy import or_, select
+
+from db import db
+
+
+def hot_queries():
+    """(description, statement, expected index name) for every query we rely on being indexed."""
+    from models import Appointment, Incident, Participant, Session, Student, Violation
+    from participants import INCIDENT, SESSION, involving
+    from propagation import incident_status_update, session_status_update
+    from scheduling import overlapping
+
+    return [
+        ('list violations (date desc, id desc)',
+         select(Violation).order_by(Violation.date.desc(), Violation.id.desc()).limit(50),
+         'ix_violation_date'),
+        ('violations of a student',
+         select(Violation).where(Violation.student_id == 1)
+         .order_by(Violation.date.desc(), Violation.id.desc()),
+         'ix_violation_student_id_date'),
+        ('incident status propagation',
+         incident_status_update([1], 'Resolved'),
+         'ix_violation_student_lrn_date'),
+        ('session status propagation (by LRN)',
+         session_status_update([1], 'Resolved'),
+         'ix_violation_student_lrn_date'),
+        ('session status propagation (by student id)',
+         session_status_update([1], 'Resolved'),
+         'ix_violation_student_id_date'),
+        ('violations filtered by status',
+         select(Violation).where(db.func.upper(Violation.status) == 'PENDING'),
+         'ix_violation_status_upper'),
+        ('count students by status',
+         select(db.func.count()).select_from(Student).where(db.func.upper(Student.status) == 'ACTIVE'),
+         'ix_student_status_upper'),
+        ('students per grade level',
+         select(Student.grade_level, db.func.count()).group_by(Student.grade_level),
+         'ix_student_grade_level_section'),
+        ('students per status',
+         select(db.func.upper(Student.status), db.func.count()).group_by(db.func.upper(Student.status)),
+         'ix_student_status_upper'),
+        ('upcoming appointments',
+         select(Appointment).where(Appointment.date > '2025-01-01')
+         .order_by(Appointment.date, Appointment.time).limit(5),
+         'ix_appointment_date_time'),
+        ('upcoming sessions',
+         select(Session).where(Session.date >= '2025-01-01').order_by(Session.date, Session.id).limit(5),
+         'ix_session_date'),
+        ('list appointments (date desc, id desc)',
+         select(Appointment).order_by(Appointment.date.desc(), Appointment.id.desc()).limit(50),
+         'ix_appointment_date_time'),
+        ('appointments on a day',
+         select(Appointment).where(Appointment.date == '2025-01-01').order_by(Appointment.time),
+         'ix_appointment_date_time'),
+        ('appointments in a date range (calendar month)',
+         select(Appointment).where(Appointment.starts_at >= datetime(2025, 1, 1),
+                                   Appointment.starts_at < datetime(2025, 2, 1))
+         .order_by(Appointment.date.desc(), Appointment.id.desc()),
+         'ix_appointment_starts_at'),
+        ('appointment double-booking probe',
+         overlapping(datetime(2025, 1, 1, 9), datetime(2025, 1, 1, 9, 30)).statement,
+         'ix_appointment_starts_at'),
+        ('list incidents (date desc, id desc)',
+         select(Incident).order_by(Incident.date.desc(), Incident.id.desc()).limit(50),
+         'ix_incident_date'),
+        ('list sessions (date desc, id desc)',
+         select(Session).order_by(Session.date.desc(), Session.id.desc()).limit(50),
+         'ix_session_date'),
+        ('participants of a list page',
+         select(Participant.parent_id, Participant.data)
+         .where(Participant.parent_type == 'session', Participant.parent_id.in_([1, 2, 3]))
+         .order_by(Participant.parent_id, Participant.position),
+         'ix_participant_parent'),
+        ('sessions/incidents involving a student (by LRN)',
+         select(Participant.parent_id).where(Participant.lrn == '123456789012', Participant.parent_type == 'incident'),
+         'ix_participant_lrn'),
+        ('sessions/incidents involving a student (by id)',
+         select(Participant.parent_id).where(Participant.student_id == 1, Participant.parent_type == 'session'),
+         'ix_participant_student_id'),
+        ('student profile: appointments of a student',
+         select(Appointment).where(Appointment.participant_lrn == '123456789012')
+         .order_by(Appointment.date.desc(), Appointment.id.desc()).limit(20),
+         'ix_appointment_participant_lrn_date'),
+        ('student profile: incidents reported by or involving a student',
+         select(Incident).where(or_(Incident.reported_by_lrn == '123456789012',
+                                    Incident.id.in_(involving(INCIDENT, 1, '123456789012'))))
+         .order_by(Incident.date.desc(), Incident.id.desc()).limit(20),
+         'ix_incident_reported_by_lrn_date'),
+        ('student profile: sessions involving a student',
+         select(Session).where(Session.id.in_(involving(SESSION, 1, '123456789012')))
+         .order_by(Session.date.desc(), Session.id.desc()).limit(20),
+         'ix_participant_lrn'),
+    ]
+
+
+def explain(statement):
+    sql = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return [row[-1] for row in rows]
+
+
+def check_query_plans():
+    """Return a list of (description, expected index, plan lines) for queries that miss their index."""
+    failures = []
+    for description, statement, index in hot_queries():
+        plan = explain(statement)
+        if not any(index in line for line in plan):
+            failures.append((description, index, plan))
+    return failures
@@ -0,0 +1,1283 @@
+"""The API: every route and CLI command, on one blueprint registered by app.create_app()."""
+import click
+from flask import Blueprint, Response, g, jsonify, request, send_file
+from flask_cors import cross_origin
+from sqlalchemy import or_
+from db import db
+import heapq
+import os
+from datetime import date, datetime
+from itertools import islice
+from pagination import MAX_LIMIT, list_response
+from serializers import Serializer
+from search import search_students
+from participants import INCIDENT, SESSION, involving, load_participants, set_participants
+from propagation import propagate_incident_status, propagate_session_status
+from bulk_import import ImportFormatError, import_students
+from preferences import load_preferences, save_preferences
+import backup
+from versions import conditional, reset_versions
+from scheduling import (DAY_END, DAY_START, DEFAULT_DURATION, ScheduleError, find_conflicts, free_slots,
+                        is_cancelled, parse_bound, parse_duration, set_schedule)
+import certificates
+import auth
+import metrics
+import events
+import batch
+import archive
+import jobs
+import schema
+from analytics import AnalyticsError, rebuild_rollup, violation_counts
+from changes import ChangesError, change_feed, reset_changes, row_loader
+from models import Student, Appointment, User, Violation, Incident, Session, ViolationRollup
+
+# cli_group=None keeps the commands at the top level: flask --app app archive
+bp = Blueprint('api', __name__, cli_group=None)
+
+@bp.route("/")
+def index():
+    return jsonify({"status": "ok", "message": "GOMIS Flask backend running"})
+
+@bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.cli.command('check-indexes')
+def check_indexes():
+    """Assert with EXPLAIN QUERY PLAN that the hot queries use their indexes."""
+    from query_plans import check_query_plans
+    failures = check_query_plans()
+    for description, index, plan in failures:
+        click.echo(f'FAIL {description}: expected {index}, got {plan}', err=True)
+    if failures:
+        raise SystemExit(1)
+    click.echo('All hot queries use their indexes.')
+
+@bp.cli.command('rebuild-analytics')
+def rebuild_analytics():
+    """Recompute the violation rollup from the violation table (repairs drift)."""
+    click.echo(f'violation_rollup rebuilt: {rebuild_rollup()} rows')
+
+@bp.cli.command('archive')
+@click.option('--school-year', help='Archive this school year (e.g. 2023-2024) and every earlier one; '
+                                    'default: every closed school year.')
+@click.option('--retention-type', type=click.Choice(['days', 'months', 'years']),
+              help='Also purge rows older than the retention window.')
+@click.option('--retention-value', type=int)
+@click.option('--backup-dir', required=True,
+              help='Backup directory; its newest backup must include the archive (POST /api/backup).')
+def archive_command(school_year, retention_type, retention_value, backup_dir):
+    """Move closed school years into the archive database and purge expired rows."""
+    if not backup.latest_covers_archive(os.path.abspath(os.path.expanduser(backup_dir))):
+        raise click.ClickException(f'No backup in {backup_dir} covers the archive yet; make a backup first')
+    try:
+        boundary = archive.archive_boundary(school_year)
+        moved = archive.archive_closed_years(boundary)
+    except archive.ArchiveError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Archived records before {boundary}: ' + ', '.join(f'{t} {n}' for t, n in moved.items()))
+    purged = archive.purge_expired(backup.retention_cutoff(retention_type, retention_value))
+    for database, counts in purged.items():
+        click.echo(f'Purged from {database}: ' + ', '.join(f'{t} {n}' for t, n in counts.items()))
+
+# STUDENTS API
+@bp.route('/api/students', methods=['GET'])
+@conditional('student')
+def list_students():
+    return list_response(Student.query, [Student.id], STUDENT_SERIALIZER, descending=False)
+
+@bp.route('/api/students/<int:id>', methods=['GET'])
+@conditional('student')
+def get_student(id):
+    student = Student.query.get_or_404(id)
+    return jsonify(student_to_dict(student))
+
+@bp.route('/api/students', methods=['POST'])
+def create_student():
+    data = request.json
+    student = Student(
+        lrn=data['lrn'],
+        first_name=data['firstName'],
+        last_name=data['lastName'],
+        middle_name=data.get('middleName'),
+        grade_level=data.get('gradeLevel'),
+        section=data.get('section'),
+        track_strand=data.get('trackStrand'),
+        specialization=data.get('specialization'),
+        school_year=data.get('schoolYear'),
+        status=data.get('status', 'ACTIVE'),
+    )
+    db.session.add(student)
+    db.session.commit()
+    return jsonify(student_to_dict(student)), 201
+
+@bp.route('/api/students/<int:id>', methods=['PUT'])
+def update_student(id):
+    data = request.json
+    student = Student.query.get_or_404(id)
+    for k,v in data.items():
+        if hasattr(student, k):
+            setattr(student, k, v)
+    db.session.commit()
+    return jsonify(student_to_dict(student))
+
+@bp.route('/api/students/<int:id>', methods=['DELETE'])
+def delete_student(id):
+    student = Student.query.get_or_404(id)
+    db.session.delete(student)
+    db.session.commit()
+    return '', 204
+
+@bp.route('/api/students/bulk', methods=['POST'])
+def bulk_create_students():
+    # Streamed CSV (text/csv) or NDJSON (application/x-ndjson) upload, inserted in one
+    # transaction. Query args give defaults for missing columns, e.g. ?schoolYear=2025-2026
+    defaults = request.args.to_dict()
+    if defaults.pop('async', None) == 'true':
+        # Large files: saved, then imported on the job runner; 202 with the job to poll
+        job_id = jobs.new_id()
+        jobs.save_upload(job_id, request.stream)
+        job = jobs.enqueue('import-students', {'content_type': request.content_type, 'defaults': defaults},
+                           job_id=job_id)
+        return jsonify(job), 202
+    try:
+        report = import_students(request.stream, request.content_type, defaults)
+    except ImportFormatError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    return jsonify(report), 201 if report['inserted'] else 200
+
+@jobs.handler('import-students')
+def _import_students_job(job, content_type, defaults):
+    # One transaction, so only the read-only cancel check runs while it is open
+    with open(job.path(jobs.UPLOAD), 'rb') as f:
+        report = import_students(f, content_type, defaults, on_chunk=lambda report: job.check_cancelled())
+    db.session.commit()
+    return report
+
+@bp.route('/api/students/search/name', methods=['GET'])
+@conditional('student')
+def search_students_by_name():
+    # Ranked prefix search over first/last/middle name and LRN, e.g. ?name=dela cruz&limit=10
+    name = request.args.get('name', '')
+    limit = request.args.get('limit', 10, type=int)
+    return jsonify([student_to_dict(s) for s in search_students(name, limit)])
+
+STUDENT_FIELDS = {
+    'id': Student.id,
+    'lrn': Student.lrn,
+    'firstName': Student.first_name,
+    'lastName': Student.last_name,
+    'middleName': Student.middle_name,
+    'gradeLevel': Student.grade_level,
+    'section': Student.section,
+    'trackStrand': Student.track_strand,
+    'specialization': Student.specialization,
+    'schoolYear': Student.school_year,
+    'status': Student.status,
+    'createdAt': Student.created_at,
+    'updatedAt': Student.updated_at,
+}
+
+STUDENT_SERIALIZER = Serializer(STUDENT_FIELDS)
+student_to_dict = STUDENT_SERIALIZER.object
+
+# APPOINTMENTS API
+@bp.route('/api/appointments', methods=['GET'])
+@conditional('appointment')
+def list_appointments():
+    query = Appointment.query
+    try:
+        start = parse_bound(request.args.get('from'))
+        end = parse_bound(request.args.get('to'), end=True)
+    except ScheduleError as e:
+        return jsonify({'error': str(e)}), 400
+    # Range scan on ix_appointment_starts_at, e.g. the month shown by the calendar
+    if start is not None:
+        query = query.filter(Appointment.starts_at >= start)
+    if end is not None:
+        query = query.filter(Appointment.starts_at < end)
+    return list_response(query, [Appointment.date, Appointment.id], APPOINTMENT_SERIALIZER)
+
+@bp.route('/api/appointments/free-slots', methods=['GET'])
+@cross_origin()
+@conditional('appointment')
+def get_free_slots():
+    day = request.args.get('date')
+    if not day:
+        return jsonify({'error': 'date is required'}), 400
+    try:
+        duration = parse_duration(request.args.get('duration') or DEFAULT_DURATION)
+        slots = free_slots(day, duration, request.args.get('start') or DAY_START, request.args.get('end') or DAY_END)
+    except ScheduleError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'date': day,
+        'durationMinutes': duration,
+        'slots': [{'start': s.strftime('%H:%M'), 'end': e.strftime('%H:%M')} for s, e in slots],
+    })
+
+def schedule_or_conflict(appt, allow_overlap=False, reschedule=True):
+    """Normalize the appointment's times; return an error response if it cannot be booked."""
+    if reschedule:
+        try:
+            set_schedule(appt)
+        except ScheduleError as e:
+            return jsonify({'error': str(e)}), 400
+    if allow_overlap:
+        return None
+    conflicts = find_conflicts(appt)
+    if conflicts:
+        return jsonify({
+            'error': 'Appointment overlaps an existing appointment',
+            'conflicts': [appointment_to_dict(a) for a in conflicts],
+        }), 409
+    return None
+
+@bp.route('/api/appointments/<int:id>', methods=['GET'])
+@conditional('appointment')
+def get_appointment(id):
+    appt = Appointment.query.get_or_404(id)
+    return jsonify(appointment_to_dict(appt))
+
+@bp.route('/api/appointments', methods=['POST'])
+def create_appointment():
+    data = request.json
+    appt = Appointment(
+        title=data['title'],
+        participant_name=data['participantName'],
+        participant_lrn=data.get('participantLRN'),
+        participant_type=data.get('participantType'),
+        date=data['date'],
+        time=data['time'],
+        duration_minutes=data.get('durationMinutes'),
+        consultation_type=data['consultationType'],
+        notes=data.get('notes'),
+        status=data.get('status', 'SCHEDULED'),
+    )
+    error = schedule_or_conflict(appt, data.get('allowOverlap'))
+    if error:
+        return error
+    db.session.add(appt)
+    db.session.commit()
+    return jsonify(appointment_to_dict(appt)), 201
+
+@bp.route('/api/appointments/<int:id>', methods=['PUT'])
+def update_appointment(id):
+    data = request.json
+    appt = Appointment.query.get_or_404(id)
+    was_cancelled = is_cancelled(appt.status)
+    if 'durationMinutes' in data:
+        appt.duration_minutes = data['durationMinutes']
+    for k,v in data.items():
+        if hasattr(appt, k):
+            setattr(appt, k, v)
+    moved = bool(SCHEDULE_KEYS.intersection(data))
+    if moved or (was_cancelled and not is_cancelled(appt.status)):
+        error = schedule_or_conflict(appt, data.get('allowOverlap'), reschedule=moved)
+        if error:
+            db.session.rollback()
+            return error
+    db.session.commit()
+    return jsonify(appointment_to_dict(appt))
+
+@bp.route('/api/appointments/<int:id>', methods=['DELETE'])
+def delete_appointment(id):
+    appt = Appointment.query.get_or_404(id)
+    db.session.delete(appt)
+    db.session.commit()
+    return '', 204
+
+APPOINTMENT_FIELDS = {
+    'id': Appointment.id,
+    'title': Appointment.title,
+    'participantName': Appointment.participant_name,
+    'participantLRN': Appointment.participant_lrn,
+    'participantType': Appointment.participant_type,
+    'date': Appointment.date,
+    'time': Appointment.time,
+    'durationMinutes': Appointment.duration_minutes,
+    'consultationType': Appointment.consultation_type,
+    'notes': Appointment.notes,
+    'status': Appointment.status,
+    'createdAt': Appointment.created_at,
+    'updatedAt': Appointment.updated_at,
+}
+
+APPOINTMENT_SERIALIZER = Serializer(APPOINTMENT_FIELDS)
+appointment_to_dict = APPOINTMENT_SERIALIZER.object
+# Fields of an update that move the appointment (and so re-derive starts_at/ends_at)
+SCHEDULE_KEYS = {'date', 'time', 'durationMinutes', 'duration_minutes'}
+
+# USERS API
+@bp.route('/api/users', methods=['GET'])
+def list_users():
+    users = User.query.all()
+    return jsonify([user_to_dict(u) for u in users])
+
+@bp.route('/api/users/<int:id>', methods=['GET'])
+def get_user(id):
+    user = User.query.get_or_404(id)
+    return jsonify(user_to_dict(user))
+
+@bp.route('/api/users/email/<string:email>', methods=['GET'])
+def get_user_by_email(email):
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(user_to_dict(user))
+
+@bp.route('/api/users', methods=['POST'])
+def create_user():
+    data = request.json
+    if User.query.filter_by(email=data['email']).first():
+        return jsonify({'error': 'Email already exists'}), 409
+    user = User(
+        email=data['email'],
+        password=auth.hash_password(data['password']),
+        first_name=data['firstName'],
+        last_name=data['lastName'],
+        middle_name=data.get('middleName'),
+        suffix=data.get('suffix'),
+        gender=data['gender'],
+        position=data.get('position'),
+        work_position=data.get('workPosition'),
+        specialization=data.get('specialization'),
+        contact_no=data.get('contactNo'),
+        role=data.get('role', 'ADMIN'),
+    )
+    db.session.add(user)
+    db.session.commit()
+    return jsonify(user_to_dict(user)), 201
+
+@bp.route('/api/users/<int:id>', methods=['PUT'])
+def update_user(id):
+    data = request.json
+    user = User.query.get_or_404(id)
+    for key, value in data.items():
+        if key == 'password':
+            user.password = auth.hash_password(value)
+        elif hasattr(user, key):
+            setattr(user, key, value)
+    db.session.commit()
+    return jsonify(user_to_dict(user))
+
+@bp.route('/api/users/<int:id>', methods=['DELETE'])
+def delete_user(id):
+    user = User.query.get_or_404(id)
+    db.session.delete(user)
+    db.session.commit()
+    return '', 204
+
+@bp.route('/api/users/authenticate', methods=['POST'])
+def authenticate_user():
+    data = request.json
+    user = User.query.filter_by(email=data['email']).first()
+    if not auth.verify_password(user.password if user else None, data['password']):
+        return jsonify({'error': 'Unauthorized'}), 401
+    # Later requests send the token instead of the password (Authorization: Bearer <token>)
+    token, session = auth.create_session(user.id, load_preferences(user.id)['sessionTimeout'])
+    db.session.commit()
+    return jsonify({**user_to_dict(user), 'token': token,
+                    'sessionExpiresAt': auth.session_expires_at(session).isoformat()})
+
+@bp.route('/api/auth/session', methods=['GET'])
+@cross_origin()
+def current_session():
+    session = g.auth_session
+    if session is None:
+        return jsonify({'error': 'Unauthorized'}), 401
+    user = db.session.get(User, session.user_id)
+    if user is None:
+        return jsonify({'error': 'Unauthorized'}), 401
+    return jsonify({**user_to_dict(user), 'sessionExpiresAt': auth.session_expires_at(session).isoformat()})
+
+@bp.route('/api/auth/logout', methods=['POST'])
+@cross_origin()
+def logout():
+    session = g.auth_session
+    if session is not None:
+        db.session.delete(session)
+        db.session.commit()
+    return '', 204
+
+def user_to_dict(user):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'firstName': user.first_name,
+        'lastName': user.last_name,
+        'middleName': user.middle_name,
+        'suffix': user.suffix,
+        'gender': user.gender,
+        'position': user.position,
+        'workPosition': user.work_position,
+        'specialization': user.specialization,
+        'contactNo': user.contact_no,
+        'role': user.role,
+        'createdAt': user.created_at.isoformat() if user.created_at else None,
+        'updatedAt': user.updated_at.isoformat() if user.updated_at else None,
+    }
+
+# --- Preferences API ---
+@bp.route('/api/preferences/<int:user_id>', methods=['GET'])
+@cross_origin()
+def get_preferences(user_id):
+    return jsonify(load_preferences(user_id))
+
+@bp.route('/api/preferences/<int:user_id>', methods=['PUT'])
+@cross_origin()
+def update_preferences(user_id):
+    prefs = save_preferences(user_id, request.json or {})
+    db.session.commit()
+    return jsonify(prefs)
+
+# --- Student Count by Status ---
+@bp.route('/api/students/count/status/<status>', methods=['GET'])
+@cross_origin()
+@conditional('student')
+def count_students_by_status(status):
+    from models import Student
+    # SQLite is case-sensitive, so match with upper() for convenience
+    query = Student.query.filter(db.func.upper(Student.status) == status.upper())
+    try:
+        archived = archive.include_archived(request.args)
+    except archive.ArchiveError as e:
+        return jsonify({'error': str(e)}), 400
+    count = query.count()
+    if archived:
+        count += archive.from_archive(query).count()
+    return jsonify(count)
+
+# VIOLATIONS API
+@bp.route('/api/violations', methods=['GET'])
+@cross_origin()
+@conditional('violation')
+def list_violations():
+    # Optional filters: studentId, severity, status, date, q (student name contains)
+    student_id = request.args.get('studentId', type=int)
+    severity = request.args.get('severity')
+    status = request.args.get('status')
+    date = request.args.get('date')
+    q = request.args.get('q')
+
+    query = Violation.query
+    if student_id is not None:
+        query = query.filter(Violation.student_id == student_id)
+    if severity:
+        query = query.filter(db.func.upper(Violation.severity) == severity.upper())
+    if status:
+        query = query.filter(db.func.upper(Violation.status) == status.upper())
+    if date:
+        query = query.filter(Violation.date == date)
+    if q:
+        like = f"%{q}%"
+        query = query.filter(Violation.student_name.ilike(like))
+
+    return list_response(query, [Violation.date, Violation.id], VIOLATION_SERIALIZER)
+
+@bp.route('/api/violations', methods=['POST'])
+@cross_origin()
+def create_violation():
+    data = request.json
+    v = Violation(
+        student_id=data['studentId'],
+        student_name=data['studentName'],
+        student_lrn=data.get('studentLRN'),
+        violation_type=data['violationType'],
+        date=data['date'],
+        description=data.get('description'),
+        severity=data.get('severity', 'Minor'),
+        action_taken=data.get('actionTaken'),
+        status=data.get('status', 'Pending'),
+    )
+    db.session.add(v)
+    db.session.commit()
+    return jsonify(violation_to_dict(v)), 201
+
+@bp.route('/api/violations/<int:id>', methods=['GET'])
+@cross_origin()
+@conditional('violation')
+def get_violation(id):
+    v = Violation.query.get_or_404(id)
+    return jsonify(violation_to_dict(v))
+
+@bp.route('/api/violations/<int:id>', methods=['PUT'])
+@cross_origin()
+def update_violation(id):
+    v = Violation.query.get_or_404(id)
+    data = request.json
+    for k, val in data.items():
+        if k == 'studentId':
+            v.student_id = val
+        elif k == 'studentName':
+            v.student_name = val
+        elif k == 'studentLRN':
+            v.student_lrn = val
+        elif k == 'violationType':
+            v.violation_type = val
+        elif k == 'date':
+            v.date = val
+        elif k == 'description':
+            v.description = val
+        elif k == 'severity':
+            v.severity = val
+        elif k == 'actionTaken':
+            v.action_taken = val
+        elif k == 'status':
+            v.status = val
+    db.session.commit()
+    return jsonify(violation_to_dict(v))
+
+@bp.route('/api/violations/<int:id>', methods=['DELETE'])
+@cross_origin()
+def delete_violation(id):
+    v = Violation.query.get_or_404(id)
+    db.session.delete(v)
+    db.session.commit()
+    return '', 204
+
+@bp.route('/api/violations/student/<int:student_id>', methods=['GET'])
+@cross_origin()
+@conditional('violation')
+def list_violations_by_student(student_id):
+    rows = (Violation.query.with_entities(*VIOLATION_SERIALIZER.columns)
+            .filter(Violation.student_id == student_id)
+            .order_by(Violation.date.desc(), Violation.id.desc()).all())
+    return jsonify([VIOLATION_SERIALIZER.row(r) for r in rows])
+
+
+VIOLATION_FIELDS = {
+    'id': Violation.id,
+    'studentId': Violation.student_id,
+    'studentName': Violation.student_name,
+    'studentLRN': Violation.student_lrn,
+    'violationType': Violation.violation_type,
+    'date': Violation.date,
+    'description': Violation.description,
+    'severity': Violation.severity,
+    'actionTaken': Violation.action_taken,
+    'status': Violation.status,
+    'createdAt': Violation.created_at,
+    'updatedAt': Violation.updated_at,
+}
+
+VIOLATION_SERIALIZER = Serializer(VIOLATION_FIELDS)
+violation_to_dict = VIOLATION_SERIALIZER.object
+
+@bp.route('/api/violations/students', methods=['GET'])
+@cross_origin()
+@conditional('violation')
+def list_students_with_violations():
+    date = request.args.get('date')
+    query = db.session.query(Violation.student_id).distinct()
+    if date:
+      query = query.filter(Violation.date == date)
+    ids = [row[0] for row in query.all() if row[0] is not None]
+    return jsonify({ 'studentIds': ids })
+
+@bp.route('/api/students/meta', methods=['GET'])
+@cross_origin()
+@conditional('student')
+def get_student_meta():
+    # distinct grade levels, sections, trackStrands
+    grades = [row[0] for row in db.session.query(Student.grade_level).filter(Student.grade_level.isnot(None)).distinct().all()]
+    sections = [row[0] for row in db.session.query(Student.section).filter(Student.section.isnot(None)).distinct().all()]
+    tracks = [row[0] for row in db.session.query(Student.track_strand).filter(Student.track_strand.isnot(None)).distinct().all()]
+    return jsonify({
+        'gradeLevels': grades,
+        'sections': sections,
+        'trackStrands': tracks,
+    })
+
+# INCIDENTS API
+@bp.route('/api/incidents', methods=['GET'])
+@cross_origin()
+@conditional('incident')
+def list_incidents():
+    return list_response(Incident.query, [Incident.date, Incident.id], INCIDENT_SERIALIZER,
+                         batch_fields={'participants': lambda ids, archived=False: load_participants(INCIDENT, ids, archived)})
+
+@bp.route('/api/incidents', methods=['POST'])
+@cross_origin()
+def create_incident():
+    data = request.json
+    inc = Incident(
+        reported_by=data['reportedBy'],
+        reported_by_lrn=data.get('reportedByLRN'),
+        grade=data.get('grade'),
+        section=data.get('section'),
+        date=data['date'],
+        time=data['time'],
+        status=data.get('status', 'Pending'),
+        narrative_date=data.get('narrativeDate'),
+        narrative_time=data.get('narrativeTime'),
+        narrative_description=data.get('narrativeDescription'),
+        action_taken=data.get('actionTaken'),
+        recommendation=data.get('recommendation'),
+    )
+    db.session.add(inc)
+    db.session.flush()
+    set_participants(INCIDENT, inc.id, data.get('participants'))
+    db.session.commit()
+    return jsonify(incident_to_dict(inc)), 201
+
+@bp.route('/api/incidents/<int:id>', methods=['GET'])
+@cross_origin()
+@conditional('incident')
+def get_incident(id):
+    inc = Incident.query.get_or_404(id)
+    return jsonify(incident_to_dict(inc))
+
+@bp.route('/api/incidents/<int:id>', methods=['PUT'])
+@cross_origin()
+def update_incident(id):
+    inc = Incident.query.get_or_404(id)
+    data = request.json
+    # Map incoming fields to model
+    if 'reportedBy' in data: inc.reported_by = data['reportedBy']
+    if 'reportedByLRN' in data: inc.reported_by_lrn = data['reportedByLRN']
+    if 'grade' in data: inc.grade = data['grade']
+    if 'section' in data: inc.section = data['section']
+    if 'date' in data: inc.date = data['date']
+    if 'time' in data: inc.time = data['time']
+    if 'status' in data: inc.status = data['status']
+    if 'narrativeDate' in data: inc.narrative_date = data['narrativeDate']
+    if 'narrativeTime' in data: inc.narrative_time = data['narrativeTime']
+    if 'narrativeDescription' in data: inc.narrative_description = data['narrativeDescription']
+    if 'actionTaken' in data: inc.action_taken = data['actionTaken']
+    if 'recommendation' in data: inc.recommendation = data['recommendation']
+    if 'participants' in data: set_participants(INCIDENT, inc.id, data.get('participants'))
+
+    # Propagate status to related violations for the same student/date, in the same transaction
+    updated = 0
+    if inc.reported_by_lrn and inc.date and inc.status:
+        db.session.flush()
+        updated = propagate_incident_status([inc.id], inc.status)
+    db.session.commit()
+
+    return jsonify({**incident_to_dict(inc), 'violationsUpdated': updated})
+
+@bp.route('/api/incidents/status', methods=['PUT'])
+@cross_origin()
+def update_incidents_status():
+    # Batch close-out: {"ids": [...], "status": "Resolved"} -> one UPDATE for the incidents,
+    # one for their violations, one commit
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    ids = data.get('ids')
+    status = data.get('status')
+    if not ids or not status:
+        return jsonify({'error': 'ids and status are required'}), 400
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({'error': 'ids must be a list of integers'}), 400
+    updated = Incident.query.filter(Incident.id.in_(ids)).update({'status': status}, synchronize_session=False)
+    violations = propagate_incident_status(ids, status)
+    db.session.commit()
+    return jsonify({'updated': updated, 'violationsUpdated': violations})
+
+# SESSIONS API
+@bp.route('/api/sessions', methods=['GET'])
+@cross_origin()
+@conditional('session')
+def list_sessions():
+    return list_response(Session.query, [Session.date, Session.id], SESSION_SERIALIZER,
+                         batch_fields={'participants': lambda ids, archived=False: load_participants(SESSION, ids, archived)})
+
+@bp.route('/api/sessions', methods=['POST'])
+@cross_origin()
+def create_session():
+    data = request.json
+    sess = Session(
+        date=data['date'],
+        time=data['time'],
+        appointment_type=data.get('appointmentType'),
+        consultation_type=data.get('consultationType'),
+        status=data.get('status'),
+        notes=data.get('notes'),
+        summary=data.get('summary'),
+    )
+    db.session.add(sess)
+    db.session.flush()
+    set_participants(SESSION, sess.id, data.get('participants'))
+    db.session.commit()
+    return jsonify(session_to_dict(sess)), 201
+
+@bp.route('/api/sessions/<int:id>', methods=['GET'])
+@cross_origin()
+@conditional('session')
+def get_session(id):
+    sess = Session.query.get_or_404(id)
+    return jsonify(session_to_dict(sess))
+
+@bp.route('/api/sessions/<int:id>', methods=['PUT'])
+@cross_origin()
+def update_session_api(id):
+    sess = Session.query.get_or_404(id)
+    data = request.json
+    if 'date' in data: sess.date = data['date']
+    if 'time' in data: sess.time = data['time']
+    if 'appointmentType' in data: sess.appointment_type = data['appointmentType']
+    if 'consultationType' in data: sess.consultation_type = data['consultationType']
+    if 'status' in data: sess.status = data['status']
+    if 'notes' in data: sess.notes = data['notes']
+    if 'participants' in data: set_participants(SESSION, sess.id, data.get('participants'))
+    if 'summary' in data: sess.summary = data['summary']
+
+    # Propagate status to violations for participants on session date, in the same transaction
+    updated = 0
+    if sess.status and sess.date:
+        db.session.flush()
+        updated = propagate_session_status([sess.id], sess.status)
+    db.session.commit()
+
+    return jsonify({**session_to_dict(sess), 'violationsUpdated': updated})
+
+@bp.route('/api/sessions/status', methods=['PUT'])
+@cross_origin()
+def update_sessions_status():
+    # Batch close-out: {"ids": [...], "status": "Completed"} -> one UPDATE for the sessions,
+    # one for their participants' violations, one commit
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    ids = data.get('ids')
+    status = data.get('status')
+    if not ids or not status:
+        return jsonify({'error': 'ids and status are required'}), 400
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({'error': 'ids must be a list of integers'}), 400
+    updated = Session.query.filter(Session.id.in_(ids)).update({'status': status}, synchronize_session=False)
+    violations = propagate_session_status(ids, status)
+    db.session.commit()
+    return jsonify({'updated': updated, 'violationsUpdated': violations})
+
+
+INCIDENT_FIELDS = {
+    'id': Incident.id,
+    'reportedBy': Incident.reported_by,
+    'reportedByLRN': Incident.reported_by_lrn,
+    'grade': Incident.grade,
+    'section': Incident.section,
+    'date': Incident.date,
+    'time': Incident.time,
+    'status': Incident.status,
+    'narrativeDate': Incident.narrative_date,
+    'narrativeTime': Incident.narrative_time,
+    'narrativeDescription': Incident.narrative_description,
+    'actionTaken': Incident.action_taken,
+    'recommendation': Incident.recommendation,
+    'createdAt': Incident.created_at,
+    'updatedAt': Incident.updated_at,
+}
+
+SESSION_FIELDS = {
+    'id': Session.id,
+    'date': Session.date,
+    'time': Session.time,
+    'appointmentType': Session.appointment_type,
+    'consultationType': Session.consultation_type,
+    'status': Session.status,
+    'notes': Session.notes,
+    'summary': Session.summary,
+    'createdAt': Session.created_at,
+    'updatedAt': Session.updated_at,
+}
+
+INCIDENT_SERIALIZER = Serializer(INCIDENT_FIELDS)
+SESSION_SERIALIZER = Serializer(SESSION_FIELDS)
+
+def incident_to_dict(x: Incident, participants=None):
+    if participants is None:
+        participants = load_participants(INCIDENT, [x.id])[x.id]
+    return {**INCIDENT_SERIALIZER.object(x), 'participants': participants}
+
+def session_to_dict(x: Session, participants=None):
+    if participants is None:
+        participants = load_participants(SESSION, [x.id])[x.id]
+    return {**SESSION_SERIALIZER.object(x), 'participants': participants}
+
+# ANALYTICS API
+@bp.route('/api/analytics/violations', methods=['GET'])
+@cross_origin()
+@conditional('violation', 'student')
+def violation_analytics():
+    # Counts from the violation rollup, e.g. ?groupBy=month,severity&schoolYear=2024-2025,2025-2026
+    # or ?groupBy=gradeLevel,section&from=2025-06&to=2025-10&status=Pending
+    try:
+        return jsonify(violation_counts(request.args))
+    except (AnalyticsError, archive.ArchiveError) as e:
+        return jsonify({'error': str(e)}), 400
+
+# SYNC API
+CHANGE_LOADERS = {
+    'students': ('student', row_loader(Student, STUDENT_SERIALIZER)),
+    'appointments': ('appointment', row_loader(Appointment, APPOINTMENT_SERIALIZER)),
+    'violations': ('violation', row_loader(Violation, VIOLATION_SERIALIZER)),
+    'incidents': ('incident', row_loader(Incident, INCIDENT_SERIALIZER, INCIDENT)),
+    'sessions': ('session', row_loader(Session, SESSION_SERIALIZER, SESSION)),
+}
+
+@bp.route('/api/changes', methods=['GET'])
+@cross_origin()
+@conditional('student', 'appointment', 'violation', 'incident', 'session')
+def list_changes():
+    # Rows created, updated or deleted after `since` (the cursor of the previous call), e.g.
+    # ?since=<cursor>&tables=students,violations. Without `since`: just the current cursor.
+    try:
+        return jsonify(change_feed(request.args, CHANGE_LOADERS))
+    except ChangesError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/api/events', methods=['GET'])
+@cross_origin()
+def event_stream():
+    # Server-Sent Events: one `change` event {entity, id, op, version} per committed change,
+    # `resync` when the client missed some (sync with /api/changes), comments as keepalive
+    try:
+        client, version = events.broker.subscribe()
+    except events.TooManyClients:
+        response = jsonify({'error': 'Too many live update connections'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    return Response(events.stream(client, version), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# BATCH API
+def _prepare_appointment(appt, op, before):
+    # The scheduling rules of POST/PUT /api/appointments; `allowOverlap` goes on the operation
+    moved = before is None or bool(SCHEDULE_KEYS.intersection(op['data']))
+    if moved or (is_cancelled(before['status']) and not is_cancelled(appt.status)):
+        error = schedule_or_conflict(appt, op.get('allowOverlap'), reschedule=moved)
+        if error:
+            body = error[0].get_json()
+            raise batch.BatchError(body.pop('error'), error[1], **body)
+
+def _check_appointment_where(clauses, data):
+    if SCHEDULE_KEYS.intersection(data):
+        raise batch.BatchError('Move appointments by id, so each is checked for conflicts')
+    if 'status' in data and not is_cancelled(data['status']):
+        cancelled = Appointment.query.filter(*clauses, db.func.upper(Appointment.status) == 'CANCELLED')
+        if db.session.query(cancelled.exists()).scalar():
+            raise batch.BatchError('Reactivate cancelled appointments by id, so each is checked for conflicts')
+
+BATCH_ENTITIES = {
+    'students': batch.Entity(Student, STUDENT_SERIALIZER),
+    'appointments': batch.Entity(Appointment, APPOINTMENT_SERIALIZER, prepare=_prepare_appointment,
+                                 check_where=_check_appointment_where),
+    'violations': batch.Entity(Violation, VIOLATION_SERIALIZER),
+}
+
+@bp.route('/api/batch', methods=['POST'])
+@cross_origin()
+def apply_batch():
+    # Ordered operations in one transaction, e.g. {"operations": [
+    #   {"op": "update", "entity": "students", "where": {"gradeLevel": "12"}, "data": {"status": "GRADUATED"}},
+    #   {"op": "update", "entity": "violations", "id": 7, "data": {"status": "Resolved"}},
+    #   {"op": "create", "entity": "students", "data": {...}}, {"op": "delete", "entity": "violations", "id": 9}]}
+    try:
+        results = batch.apply_batch(request.get_json(silent=True), BATCH_ENTITIES)
+    except batch.BatchError as e:
+        return jsonify({'error': str(e), 'index': e.index, **e.extra}), e.status
+    return jsonify({'results': results})
+
+# DASHBOARD API
+def _group_counts(column):
+    return {key if key is not None else '': n for key, n in db.session.query(column, db.func.count()).group_by(column)}
+
+def _rollup_counts(column):
+    return {key: int(n) for key, n in db.session.query(column, db.func.sum(ViolationRollup.count)).group_by(column)}
+
+@bp.route('/api/dashboard/summary', methods=['GET'])
+@cross_origin()
+@conditional('student', 'appointment', 'violation', 'incident', 'session', extra=lambda: date.today().isoformat())
+def dashboard_summary():
+    # Everything the overview page needs in one round trip: GROUP BY counts plus the
+    # few rows it lists, each served by an index (?date=yyyy-MM-dd is the client's today)
+    today = request.args.get('date') or date.today().isoformat()
+    limit = max(1, min(request.args.get('limit', 5, type=int), 50))
+
+    student_status = _group_counts(db.func.upper(Student.status))
+    appointment_status = _group_counts(Appointment.status)
+    session_status = _group_counts(Session.status)
+    incident_status = _group_counts(Incident.status)
+    # From the rollup (one row per combination) instead of scanning every violation
+    violation_severity = _rollup_counts(ViolationRollup.severity)
+    violation_status = _rollup_counts(ViolationRollup.status)
+
+    todays_appointments = Appointment.query.filter(Appointment.date == today).order_by(Appointment.time).all()
+    upcoming_appointments = Appointment.query.filter(Appointment.date > today) \
+        .order_by(Appointment.date, Appointment.time).limit(limit).all()
+    recent_appointments = Appointment.query \
+        .order_by(Appointment.date.desc(), Appointment.time.desc()).limit(limit).all()
+    upcoming_sessions = Session.query.filter(Session.date >= today) \
+        .order_by(Session.date, Session.id).limit(limit).all()
+    recent_sessions = Session.query.order_by(Session.date.desc(), Session.id.desc()).limit(limit).all()
+    recent_incidents = Incident.query.order_by(Incident.date.desc(), Incident.id.desc()).limit(limit).all()
+    sessions = upcoming_sessions + recent_sessions
+    session_participants = load_participants(SESSION, [x.id for x in sessions])
+    incident_participants = load_participants(INCIDENT, [x.id for x in recent_incidents])
+
+    return jsonify({
+        'date': today,
+        'students': {
+            'total': sum(student_status.values()),
+            'byStatus': student_status,
+            'byGradeLevel': _group_counts(Student.grade_level),
+        },
+        'appointments': {
+            'total': sum(appointment_status.values()),
+            'byStatus': appointment_status,
+            'today': [appointment_to_dict(a) for a in todays_appointments],
+            'upcoming': [appointment_to_dict(a) for a in upcoming_appointments],
+            'recent': [appointment_to_dict(a) for a in recent_appointments],
+        },
+        'sessions': {
+            'total': sum(session_status.values()),
+            'byStatus': session_status,
+            'todayCount': Session.query.filter(Session.date == today).count(),
+            'upcoming': [session_to_dict(x, session_participants[x.id]) for x in upcoming_sessions],
+            'recent': [session_to_dict(x, session_participants[x.id]) for x in recent_sessions],
+        },
+        'incidents': {
+            'total': sum(incident_status.values()),
+            'byStatus': incident_status,
+            'todayCount': Incident.query.filter(Incident.date == today).count(),
+            'recent': [incident_to_dict(x, incident_participants[x.id]) for x in recent_incidents],
+        },
+        'violations': {
+            'total': sum(violation_severity.values()),
+            'bySeverity': violation_severity,
+            'byStatus': violation_status,
+        },
+    })
+
+# STUDENT PROFILE API
+PROFILE_SECTIONS = ('violations', 'appointments', 'incidents', 'sessions')
+PROFILE_LIMIT = 20
+
+def _profile_section(model, criterion, serializer, limit, archived, participants=None):
+    # The newest `limit` matching rows plus their counts per status, from the archive too
+    # when asked; `participants` is the parent type whose participants to attach
+    order = (model.date, model.id)
+    items = db.session.query(*serializer.columns, *order).filter(criterion) \
+        .order_by(model.date.desc(), model.id.desc()).limit(limit)
+    counts = db.session.query(model.status, db.func.count()).filter(criterion).group_by(model.status)
+    rows = items.all() if limit else []
+    counted = counts.all()
+    archived_ids = ()
+    if archived:
+        old = archive.from_archive(items).all() if limit else []
+        if old:
+            rows = list(islice(heapq.merge(rows, old, key=lambda row: tuple(row[-2:]), reverse=True), limit))
+            archived_ids = {row[-1] for row in old}
+        counted += archive.from_archive(counts).all()
+    by_status = {}
+    for status, n in counted:
+        key = status if status is not None else ''
+        by_status[key] = by_status.get(key, 0) + n
+    result = [serializer.row(row) for row in rows]
+    if participants:
+        ids = [row[-1] for row in rows]
+        found = load_participants(participants, [i for i in ids if i not in archived_ids])
+        if archived_ids:
+            found.update(load_participants(participants, [i for i in ids if i in archived_ids], archived=True))
+        for item, id_ in zip(result, ids):
+            item['participants'] = found[id_]
+    return {'total': sum(by_status.values()), 'byStatus': by_status, 'items': result}
+
+@bp.route('/api/students/<int:id>/profile', methods=['GET'])
+@cross_origin()
+@conditional('student', 'violation', 'appointment', 'incident', 'session')
+def get_student_profile(id):
+    # The student with their violations (by id), appointments (by participant LRN),
+    # incidents (reported by them or listing them) and sessions (listing them), each as
+    # {total, byStatus, items}: the newest ?limit= records (default 20, 0 for counts only;
+    # e.g. ?violationsLimit= per section). Every section is an index lookup on the
+    # student's id/LRN, so the cost follows their own records, not the table sizes.
+    try:
+        archived = archive.include_archived(request.args)
+    except archive.ArchiveError as e:
+        return jsonify({'error': str(e)}), 400
+    student = db.session.get(Student, id)
+    if student is None and archived:
+        student = archive.from_archive(Student.query.filter(Student.id == id)).first()
+    if student is None:
+        return jsonify({'error': 'Student not found'}), 404
+    default = request.args.get('limit', PROFILE_LIMIT, type=int)
+    limits = {name: max(0, min(request.args.get(name + 'Limit', default, type=int), MAX_LIMIT))
+              for name in PROFILE_SECTIONS}
+
+    reported_or_involved = or_(Incident.reported_by_lrn == student.lrn,
+                               Incident.id.in_(involving(INCIDENT, student.id, student.lrn)))
+    involved = Session.id.in_(involving(SESSION, student.id, student.lrn))
+    return jsonify({
+        'student': student_to_dict(student),
+        'violations': _profile_section(Violation, Violation.student_id == student.id, VIOLATION_SERIALIZER,
+                                       limits['violations'], archived),
+        'appointments': _profile_section(Appointment, Appointment.participant_lrn == student.lrn,
+                                         APPOINTMENT_SERIALIZER, limits['appointments'], archived),
+        'incidents': _profile_section(Incident, reported_or_involved, INCIDENT_SERIALIZER,
+                                      limits['incidents'], archived, participants=INCIDENT),
+        'sessions': _profile_section(Session, involved, SESSION_SERIALIZER,
+                                     limits['sessions'], archived, participants=SESSION),
+    })
+
+# --- Backups ---
+# Backups and restores run as jobs in the 'maintenance' lane, one at a time; the routes
+# return 202 with the job to poll at /api/jobs/<id>.
+def _backup_dir(data):
+    dest_dir = (data.get('destDir') or '').strip()
+    if not dest_dir:
+        raise backup.BackupError('destDir is required')
+    return os.path.abspath(os.path.expanduser(dest_dir))
+
+def _retention_cutoff(data):
+    # retentionType/retentionValue from the body, else from the preferences of userId
+    if data.get('userId') is not None:
+        prefs = load_preferences(int(data['userId']))
+    else:
+        prefs = {}
+    return backup.retention_cutoff(
+        data.get('retentionType', prefs.get('retentionType')),
+        data.get('retentionValue', prefs.get('retentionValue')),
+    )
+
+def _cutoff_param(cutoff):
+    return cutoff.isoformat() if cutoff else None
+
+def _parse_cutoff(cutoff):
+    return datetime.fromisoformat(cutoff) if cutoff else None
+
+@jobs.handler('backup', lane='maintenance')
+def _run_backup(job, db_path, dest_dir, full, cutoff, archive_path=None):
+    manifest = backup.create_backup(db_path, dest_dir, full=full, archive_path=archive_path)
+    manifest['pruned'] = backup.prune_backups(dest_dir, _parse_cutoff(cutoff))
+    return manifest
+
+@jobs.handler('restore', lane='maintenance')
+def _run_restore(job, db_path, dest_dir, backup_id, archive_path=None):
+    queue = jobs.snapshot()  # the job table is replaced along with everything else
+    manifest = backup.restore_backup(db_path, dest_dir, backup_id, archive_path=archive_path)
+    schema.prepare()  # an older backup may predate the latest migrations
+    jobs.replace_all(queue)
+    reset_versions()  # cached ETags refer to the replaced data
+    reset_changes()  # and sync cursors to the replaced change log
+    return manifest
+
+@bp.route('/api/backup', methods=['POST'])
+@cross_origin()
+def create_backup():
+    data = request.json or {}
+    try:
+        dest_dir = _backup_dir(data)
+        db_path = backup.sqlite_path(db.engine)
+    except backup.BackupError as e:
+        return jsonify({'error': str(e)}), 400
+    job = jobs.enqueue('backup', {'db_path': db_path, 'dest_dir': dest_dir, 'full': bool(data.get('full')),
+                                  'cutoff': _cutoff_param(_retention_cutoff(data)),
+                                  'archive_path': archive.archive_path(db.engine)})
+    return jsonify({**job, 'path': dest_dir}), 202
+
+@bp.route('/api/backup/restore', methods=['POST'])
+@cross_origin()
+def restore_backup():
+    data = request.json or {}
+    try:
+        dest_dir = _backup_dir(data)
+        db_path = backup.sqlite_path(db.engine)
+        manifest = backup.get_manifest(dest_dir, str(data.get('id') or ''))
+    except backup.BackupError as e:
+        return jsonify({'error': str(e)}), 400
+    archive_path = None
+    if backup.covers_archive(manifest):
+        archive_path = archive.archive_path(db.engine)
+    elif archive.enabled() and archive.has_archived_rows():
+        # Its live tables would bring back rows the archive still holds
+        return jsonify({'error': f"Backup {manifest['id']} has no copy of the archive, which holds records; "
+                                 'restore a backup made after the archive was created'}), 409
+    job = jobs.enqueue('restore', {'db_path': db_path, 'dest_dir': dest_dir, 'backup_id': manifest['id'],
+                                   'archive_path': archive_path})
+    return jsonify({**job, 'path': dest_dir}), 202
+
+@bp.route('/api/backup/tasks/<task_id>', methods=['GET'])
+@cross_origin()
+def backup_task(task_id):
+    # Older name of GET /api/jobs/<id>
+    return get_job(task_id)
+
+@bp.route('/api/backups', methods=['GET'])
+@cross_origin()
+def list_backups():
+    try:
+        dest_dir = _backup_dir(request.args)
+    except backup.BackupError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(backup.list_backups(dest_dir))
+
+# --- Archive ---
+# Closed school years move to the archive database in the 'maintenance' lane, so they never
+# run alongside a backup; the route returns 202 with the job to poll at /api/jobs/<id>.
+@jobs.handler('archive', lane='maintenance')
+def _run_archive(job, boundary, cutoff):
+    archived = archive.archive_closed_years(boundary, progress=job.progress)
+    job.progress(5, 5, 'Purging expired records', force=True)
+    return {
+        'before': boundary,
+        'archived': archived,
+        'purged': archive.purge_expired(_parse_cutoff(cutoff)),
+    }
+
+def _archive_backup_dir(data):
+    if not data.get('destDir') and data.get('userId') is not None:
+        data = {'destDir': load_preferences(int(data['userId'])).get('backupPath')}
+    return _backup_dir(data)
+
+@bp.route('/api/archive', methods=['GET'])
+@cross_origin()
+def archive_status():
+    try:
+        return jsonify(archive.archive_stats())
+    except archive.ArchiveError as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/api/archive', methods=['POST'])
+@cross_origin()
+def archive_school_years():
+    # Body: {schoolYear: '2023-2024'} archives that year and every earlier one (default: every
+    # closed year). retentionType/retentionValue (or the preferences of userId) also purge
+    # the rows older than the retention window from both databases.
+    # destDir (or the backupPath preference of userId) is the backup directory; its newest
+    # backup must hold a copy of the archive, so the moved rows can always be restored.
+    data = request.json or {}
+    try:
+        if not archive.enabled():
+            raise archive.ArchiveError('The archive needs a file-based SQLite database')
+        boundary = archive.archive_boundary(data.get('schoolYear'))
+        dest_dir = _archive_backup_dir(data)
+    except (archive.ArchiveError, backup.BackupError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not backup.latest_covers_archive(dest_dir):
+        return jsonify({'error': f'No backup in {dest_dir} covers the archive yet; make a backup first'}), 409
+    job = jobs.enqueue('archive', {'boundary': boundary, 'cutoff': _cutoff_param(_retention_cutoff(data))})
+    return jsonify({**job, 'before': boundary}), 202
+
+# --- Certificates ---
+@bp.route('/api/certificates/<kind>/batch', methods=['POST'])
+@cross_origin()
+def render_certificates(kind):
+    # Body: {studentIds: [...]} or {gradeLevel, section, schoolYear} to select the students, and
+    # fields: {purpose, formatDateGiven, certificateSigner, signerPosition, includeLRN, ...}
+    # shared by every document. Responds with a zip of one .docx per student, or with ?async=true
+    # 202 and a job whose zip is served at /api/jobs/<id>/file.
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    student_ids = data.get('studentIds')
+    if student_ids is not None and not (isinstance(student_ids, list)
+                                        and all(isinstance(i, int) for i in student_ids)):
+        return jsonify({'error': 'studentIds must be a list of integers'}), 400
+    fields = data.get('fields') or {}
+    if not isinstance(fields, dict):
+        return jsonify({'error': 'fields must be an object'}), 400
+    query = Student.query
+    if student_ids:
+        query = query.filter(Student.id.in_(student_ids))
+    elif data.get('gradeLevel') or data.get('section'):
+        if data.get('gradeLevel'):
+            query = query.filter(Student.grade_level == str(data['gradeLevel']))
+        if data.get('section'):
+            query = query.filter(Student.section == data['section'])
+        if data.get('schoolYear'):
+            query = query.filter(Student.school_year == data['schoolYear'])
+    else:
+        return jsonify({'error': 'studentIds or gradeLevel/section is required'}), 400
+    students = query.order_by(Student.last_name, Student.first_name, Student.id).all()
+    if not students:
+        return jsonify({'error': 'No matching students'}), 404
+
+    if request.args.get('async') == 'true':
+        try:
+            certificates.get_template(kind)
+        except certificates.TemplateError as e:
+            return jsonify({'error': str(e)}), 404 if kind not in certificates.TEMPLATES else 500
+        job = jobs.enqueue('certificates', {'kind': kind, 'student_ids': [s.id for s in students], 'fields': fields})
+        return jsonify(job), 202
+    try:
+        documents = certificates.render_documents(kind, [
+            (certificates.document_name(kind, s), certificates.student_values(kind, s, fields))
+            for s in students
+        ])
+        first = next(documents)  # surfaces template errors before the response starts
+    except certificates.TemplateError as e:
+        return jsonify({'error': str(e)}), 404 if kind not in certificates.TEMPLATES else 500
+
+    def all_documents():
+        yield first
+        yield from documents
+
+    response = Response(certificates.stream_zip(all_documents()), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="{kind}-certificates.zip"'
+    return response
+
+@jobs.handler('certificates')
+def _render_certificates_job(job, kind, student_ids, fields):
+    students = (Student.query.filter(Student.id.in_(student_ids))
+                .order_by(Student.last_name, Student.first_name, Student.id).all())
+    total = len(students)
+    documents = certificates.render_documents(kind, [
+        (certificates.document_name(kind, s), certificates.student_values(kind, s, fields))
+        for s in students
+    ])
+
+    def tracked():
+        for done, document in enumerate(documents, start=1):
+            job.progress(done, total)
+            yield document
+
+    with open(job.path(jobs.OUTPUT), 'wb') as f:
+        for chunk in certificates.stream_zip(tracked()):
+            f.write(chunk)
+    job.progress(total, total, force=True)
+    return {'filename': f'{kind}-certificates.zip', 'documents': total}
+
+# --- Jobs ---
+@bp.route('/api/jobs', methods=['GET'])
+@cross_origin()
+def list_jobs():
+    # Newest first, e.g. ?status=running&kind=backup&limit=20
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number'}), 400
+    return jsonify(jobs.list_jobs(request.args.get('status'), request.args.get('kind'), limit))
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+@cross_origin()
+def get_job(job_id):
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job)
+
+@bp.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@cross_origin()
+def cancel_job(job_id):
+    # A queued job is cancelled at once (200); a running one stops at its next progress check (202)
+    job = jobs.cancel_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job['status'] in ('done', 'failed'):
+        return jsonify({'error': 'The job already finished', 'status': job['status']}), 409
+    return jsonify(job), 202 if job['status'] == 'running' else 200
+
+@bp.route('/api/jobs/<job_id>/file', methods=['GET'])
+@cross_origin()
+def job_file(job_id):
+    job = jobs.get_job(job_id)
+    path = jobs.job_path(job_id, jobs.OUTPUT)
+    if job is None or job['status'] != 'done' or not os.path.exists(path):
+        return jsonify({'error': 'The job has no file'}), 404
+    return send_file(path, as_attachment=True, download_name=job['result'].get('filename') or f'{job_id}.out')
@@ -0,0 +1,124 @@
+"""Appointment times as real datetimes: range filters, conflict checks and free slots.
+
+`date` and `time` stay the strings the client sends. `starts_at` and `ends_at` are derived
+from them (plus `duration_minutes`) on every write and indexed together, so a month of the
+calendar is a range scan. Durations are capped at MAX_DURATION, so an appointment
+overlapping [start, end) must start in [start - MAX_DURATION, end). The double-booking
+check is one bounded probe of that index instead of a table scan.
+"""
+from datetime import datetime, timedelta
+
+from db import db
+
+DEFAULT_DURATION = 30  # minutes; the booking dialog offers half-hour slots
+MAX_DURATION = 8 * 60
+DAY_START = '08:00'  # office hours searched by the free-slot finder
+DAY_END = '17:00'
+
+_TIME_FORMATS = ('%H:%M:%S', '%H:%M', '%I:%M %p', '%I:%M:%S %p')
+
+
+class ScheduleError(ValueError):
+    """Raised when an appointment's date, time or duration cannot be used."""
+
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ScheduleError(f'Invalid date: {value!r} (expected yyyy-MM-dd)')
+
+
+def parse_time(value):
+    for fmt in _TIME_FORMATS:
+        try:
+            t = datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+        return timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
+    raise ScheduleError(f'Invalid time: {value!r} (expected HH:mm)')
+
+
+def parse_duration(value):
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        raise ScheduleError(f'Invalid duration: {value!r}')
+    if not 1 <= minutes <= MAX_DURATION:
+        raise ScheduleError(f'Duration must be between 1 and {MAX_DURATION} minutes')
+    return minutes
+
+
+def parse_bound(value, end=False):
+    """A `from`/`to` query value (yyyy-MM-dd or ISO datetime) as a datetime.
+
+    A plain date used as the upper bound means the end of that day, so `from` and `to`
+    can both be the first and last day of the month.
+    """
+    if value is None:
+        return None
+    if len(value) == 10:
+        day = parse_day(value)
+        return day + timedelta(days=1) if end else day
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ScheduleError(f'Invalid date/time: {value!r}')
+
+
+def set_schedule(appt):
+    """Derive starts_at/ends_at from the appointment's date, time and duration."""
+    duration = parse_duration(appt.duration_minutes or DEFAULT_DURATION)
+    appt.duration_minutes = duration
+    appt.starts_at = parse_day(appt.date) + parse_time(appt.time)
+    appt.ends_at = appt.starts_at + timedelta(minutes=duration)
+
+
+def is_cancelled(status):
+    return (status or '').upper() == 'CANCELLED'
+
+
+def overlapping(starts_at, ends_at):
+    """Query for the live appointments overlapping [starts_at, ends_at)."""
+    from models import Appointment
+
+    return Appointment.query.filter(
+        Appointment.starts_at > starts_at - timedelta(minutes=MAX_DURATION),
+        Appointment.starts_at < ends_at,
+        Appointment.ends_at > starts_at,
+        db.func.upper(Appointment.status) != 'CANCELLED',
+    )
+
+
+def find_conflicts(appt):
+    """Other live appointments overlapping `appt` (none if it is cancelled)."""
+    from models import Appointment
+
+    if is_cancelled(appt.status) or appt.starts_at is None:
+        return []
+    query = overlapping(appt.starts_at, appt.ends_at)
+    if appt.id is not None:
+        query = query.filter(Appointment.id != appt.id)
+    with db.session.no_autoflush:
+        return query.order_by(Appointment.starts_at).all()
+
+
+def free_slots(day, duration=DEFAULT_DURATION, day_start=DAY_START, day_end=DAY_END):
+    """Free [start, end) intervals of at least `duration` minutes on `day` within office hours."""
+    from models import Appointment
+
+    start = parse_day(day) + parse_time(day_start)
+    end = parse_day(day) + parse_time(day_end)
+    if end <= start:
+        raise ScheduleError('The end of the day must be after its start')
+    busy = overlapping(start, end).with_entities(Appointment.starts_at, Appointment.ends_at) \
+        .order_by(Appointment.starts_at).all()
+    slots = []
+    cursor = start
+    for busy_start, busy_end in busy + [(end, end)]:
+        if busy_start - cursor >= timedelta(minutes=duration):
+            slots.append((cursor, min(busy_start, end)))
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            break
+    return slots
@@ -0,0 +1,75 @@
+"""Database preparation: migrations, then the triggers and tables the subsystems keep up to date.
+
+prepare() runs once per backend start: in create_app(), or in the launcher before the
+server workers fork (serve.py). Alembic is only imported when the database is behind.
+The current revision is one SELECT, and the newest one is read from the `revision` and
+`down_revision` lines of the migration files. Importing Alembic and loading the
+migration scripts would otherwise cost about 200 ms of every cold start.
+"""
+import glob
+import os
+import re
+
+from flask import current_app
+from sqlalchemy import inspect, text
+
+import archive
+from analytics import init_analytics
+from changes import init_changes
+from db import db
+from search import init_search
+from versions import init_versions
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+_REVISION = re.compile(r"^(revision|down_revision) = '(\w+)'", re.M)
+
+
+def head_revision():
+    """The newest migration, or None if the history branches (Alembic then decides)."""
+    revisions, parents = set(), set()
+    for path in glob.glob(os.path.join(MIGRATIONS_DIR, 'versions', '*.py')):
+        with open(path, encoding='utf-8') as f:
+            fields = dict(_REVISION.findall(f.read()))
+        if 'revision' in fields:
+            revisions.add(fields['revision'])
+        if 'down_revision' in fields:
+            parents.add(fields['down_revision'])
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+def current_revision():
+    with db.engine.connect() as conn:
+        if not inspect(conn).has_table('alembic_version'):
+            return None
+        return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def init_migrate(app):
+    """Register Flask-Migrate (the `flask db` commands, and upgrade())."""
+    from flask_migrate import Migrate
+
+    Migrate(app, db, directory=MIGRATIONS_DIR)
+
+
+def migrate():
+    """Upgrade the schema to the newest revision; a no-op without Alembic when it already is."""
+    head = head_revision()
+    if head is not None and current_revision() == head:
+        return
+    from flask_migrate import upgrade
+
+    if 'migrate' not in current_app.extensions:
+        init_migrate(current_app)
+    upgrade()
+
+
+def prepare():
+    """Migrate, then create the triggers and derived tables if missing (inside an app context)."""
+    migrate()  # creates the tables on first run
+    init_search()  # Full-text index for /api/students/search/name
+    init_versions()  # Change counters behind the ETags of the read routes
+    init_analytics()  # Triggers keeping the violation rollup up to date
+    init_changes()  # Change log behind /api/changes
+    archive.init_archive()  # Archive tables matching the live schema
@@ -0,0 +1,139 @@
+import re
+
+from sqlalchemy import or_, text
+
+from db import db
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# External-content FTS5 index over the student table. The triggers keep it in step with
+# every insert/update/delete on `student` inside the writing transaction, so the
+# create/update/delete routes (and any bulk writer) never have to touch it themselves.
+FTS_TABLE = """
+CREATE VIRTUAL TABLE student_search USING fts5(
+    first_name, last_name, middle_name, lrn,
+    content='student', content_rowid='id',
+    prefix='2 3 4',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS student_search_ai AFTER INSERT ON student BEGIN
+        INSERT INTO student_search(rowid, first_name, last_name, middle_name, lrn)
+        VALUES (new.id, new.first_name, new.last_name, new.middle_name, new.lrn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_search_ad AFTER DELETE ON student BEGIN
+        INSERT INTO student_search(student_search, rowid, first_name, last_name, middle_name, lrn)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.middle_name, old.lrn);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_search_au
+    AFTER UPDATE OF first_name, last_name, middle_name, lrn ON student BEGIN
+        INSERT INTO student_search(student_search, rowid, first_name, last_name, middle_name, lrn)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.middle_name, old.lrn);
+        INSERT INTO student_search(rowid, first_name, last_name, middle_name, lrn)
+        VALUES (new.id, new.first_name, new.last_name, new.middle_name, new.lrn);
+    END
+    """,
+]
+
+# Column weights for bm25(): names and LRN matter more than the middle name.
+RANK = 'bm25(student_search, 10.0, 10.0, 2.0, 10.0)'
+
+# Whole-word matches are few, so ranking them with bm25 is cheap. Prefix matches on a one
+# or two letter term can hit a large share of the table, and scoring all of them would
+# blow the type-ahead budget, so they only fill the remaining slots in index order.
+RANKED_SQL = f"""
+SELECT rowid
+FROM student_search
+WHERE student_search MATCH :match
+ORDER BY {RANK}, rowid
+LIMIT :limit
+"""
+
+PREFIX_SQL = """
+SELECT rowid
+FROM student_search
+WHERE student_search MATCH :match
+LIMIT :limit
+"""
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_available():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def init_search():
+    """Create the FTS index and its triggers if missing; backfill it on first creation."""
+    if not fts_available():
+        return
+    with db.engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'student_search'"
+        )).first()
+        if not exists:
+            conn.execute(text(FTS_TABLE))
+            conn.execute(text("INSERT INTO student_search(student_search) VALUES ('rebuild')"))
+        for trigger in FTS_TRIGGERS:
+            conn.execute(text(trigger))
+
+
+def rebuild_search():
+    if fts_available():
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO student_search(student_search) VALUES ('rebuild')"))
+
+
+def match_expression(term, prefix=True):
+    """Build an FTS5 query where every token of `term` must (prefix-)match some column."""
+    tokens = _TOKEN.findall(term or '')
+    return ' '.join(('"%s"*' if prefix else '"%s"') % t for t in tokens)
+
+
+def search_students(term, limit=DEFAULT_LIMIT):
+    """Return matching Student rows, best match first.
+
+    Order: exact LRN, then whole-word matches by bm25 rank, then prefix-only matches.
+    """
+    from models import Student
+
+    limit = max(1, min(limit, MAX_LIMIT))
+    term = (term or '').strip()
+    match = match_expression(term)
+    if not match:
+        return []
+
+    if fts_available():
+        # An exact LRN is a single probe on the unique index and always ranks first.
+        exact = Student.query.with_entities(Student.id).filter(Student.lrn == term).first()
+        ids = [exact[0]] if exact else []
+        for sql, expr in ((RANKED_SQL, match_expression(term, prefix=False)), (PREFIX_SQL, match)):
+            if len(ids) >= limit:
+                break
+            rows = db.session.execute(text(sql), {'match': expr, 'limit': limit + len(ids)})
+            ids += [row[0] for row in rows if row[0] not in ids]
+        ids = ids[:limit]
+        if not ids:
+            return []
+        by_id = {s.id: s for s in Student.query.filter(Student.id.in_(ids)).all()}
+        return [by_id[i] for i in ids if i in by_id]
+
+    # Other databases: prefix match every token against the indexed name/LRN columns.
+    query = Student.query
+    for token in _TOKEN.findall(term):
+        like = f'{token}%'
+        query = query.filter(or_(
+            Student.first_name.ilike(like),
+            Student.last_name.ilike(like),
+            Student.middle_name.ilike(like),
+            Student.lrn.like(like),
+        ))
+    return query.order_by((Student.lrn == term).desc(), Student.last_name, Student.first_name).limit(limit).all()
@@ -0,0 +1,96 @@
+"""Row serializers compiled from the camelCase field maps, and a fast JSON provider.
+
+`Serializer(field_map)` generates its functions once per model: `row(values)` builds the
+API dict straight from a Core result row (the field map's columns, in order), `values(row)`
+the same values as a list (for the keys-once `format=columns` list layout), and
+`object(instance)` the dict from an ORM instance for the single-item routes.
+Datetimes are left as they are; the JSON provider writes them as ISO 8601 in the same
+pass that encodes everything else (natively with orjson when installed).
+"""
+import json
+from datetime import date, datetime
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is the fallback
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _column(spec):
+    return spec[0] if isinstance(spec, tuple) else spec
+
+
+def _compile(keys, specs, access, as_list=False):
+    """exec() a function returning {key: access(i, spec), ...} (or the list of values) for the given keys."""
+    env = {}
+    items = []
+    for i, (key, spec) in enumerate(zip(keys, specs)):
+        value = access(i, _column(spec))
+        if isinstance(spec, tuple):
+            env[f'_convert{i}'] = spec[1]
+            value = f'_convert{i}({value})'
+        items.append(value if as_list else f'{key!r}: {value}')
+    body = ('[%s]' if as_list else '{%s}') % ', '.join(items)
+    source = 'def serialize(o):\n    return %s\n' % body
+    exec(compile(source, '<serializer>', 'exec'), env)
+    return env['serialize']
+
+
+class Serializer:
+    """Compiled row -> dict functions for a camelCase field map.
+
+    `field_map` maps keys to model columns or `(column, converter)` tuples.
+    """
+
+    def __init__(self, field_map):
+        self.field_map = field_map
+        self.keys = list(field_map)
+        specs = [field_map[k] for k in self.keys]
+        self.columns = [_column(s) for s in specs]
+        self.row = _compile(self.keys, specs, lambda i, column: f'o[{i}]')
+        self.values = _compile(self.keys, specs, lambda i, column: f'o[{i}]', as_list=True)
+        self.object = _compile(self.keys, specs, lambda i, column: f'o.{column.key}')
+        self._projections = {}
+
+    def project(self, keys):
+        """A Serializer for a subset of the keys (for `fields=`), cached per key tuple."""
+        keys = tuple(keys)
+        if keys not in self._projections:
+            self._projections[keys] = Serializer({k: self.field_map[k] for k in keys})
+        return self._projections[keys]
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(obj):
+    """Encode `obj` to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider (jsonify, request.json) backed by orjson when available."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return json.dumps(obj, default=_default, **kwargs)
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype='application/json')
@@ -0,0 +1,118 @@
+"""Production launcher: prepares the database once, then serves the API with a WSGI server.
+
+    python serve.py [--host 127.0.0.1] [--port 5000] [--threads 16] [--workers 1]
+
+One worker (the default, and the only choice on Windows) is served by waitress with
+--threads threads. With --workers N on Linux/macOS, gunicorn runs N processes of
+--threads threads each, if it is installed. The app is built and the database prepared
+(migrations, triggers) once, before the workers fork, so the workers skip that work.
+Without waitress, Werkzeug's threaded server is used.
+
+Every open /api/events stream holds a thread until it closes. Each process therefore
+accepts at most --threads minus 4 streams (and at most GOMIS_EVENT_CLIENTS). Past that,
+/api/events answers 503 and the other requests still get a thread. Raise --threads for
+more connected clients. Once the port accepts connections, one line is printed:
+`GOMIS backend ready on http://127.0.0.1:5000 (startup 640 ms)`. The Electron shell can
+wait for that line instead of polling. bench_startup.py measures the cold start.
+
+GOMIS_HOST / GOMIS_PORT / GOMIS_THREADS / GOMIS_WORKERS  defaults for the options
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse  # noqa: E402
+import logging  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+from importlib.util import find_spec  # noqa: E402
+
+logger = logging.getLogger('gomis.serve')
+
+
+def ready(host, port):
+    print(f'GOMIS backend ready on http://{host}:{port} '
+          f'(startup {(time.perf_counter() - STARTED) * 1000:.0f} ms)', flush=True)
+
+
+def serve_waitress(app, args):
+    import waitress
+
+    server = waitress.create_server(app, host=args.host, port=args.port, threads=args.threads)
+    ready(args.host, args.port)
+    server.run()
+
+
+def serve_werkzeug(app, args):
+    from werkzeug.serving import make_server
+
+    logger.warning('waitress is not installed; serving with the Werkzeug threaded server')
+    server = make_server(args.host, args.port, app, threaded=True)
+    ready(args.host, args.port)
+    server.serve_forever()
+
+
+def serve_gunicorn(app, args):
+    from gunicorn.app.base import BaseApplication
+
+    from db import db
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{args.host}:{args.port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('timeout', 0)  # event streams stay open; jobs run off the request
+            self.cfg.set('graceful_timeout', 5)  # ...so shutdown does not wait for them to end
+            self.cfg.set('when_ready', lambda arbiter: ready(args.host, args.port))
+            self.cfg.set('post_fork', lambda arbiter, worker: dispose())
+
+        def load(self):
+            return app
+
+    def dispose():
+        # Connections opened while preparing belong to the parent; never share them
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+    Server().run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=os.environ.get('GOMIS_HOST') or '127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('GOMIS_PORT') or 5000))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('GOMIS_THREADS') or 16))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('GOMIS_WORKERS') or 1))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    logging.getLogger('alembic').setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)  # a first-run migration resets the root level to WARN
+
+    if args.workers > 1 and os.name == 'nt':
+        parser.error('--workers needs Linux or macOS; use --threads on Windows')
+    if args.workers > 1 and find_spec('gunicorn') is None:
+        parser.error('--workers needs gunicorn (pip install gunicorn)')
+
+    from app import create_app
+    import events
+    app = create_app()  # the only place the database is prepared
+
+    if args.workers > 1 or find_spec('waitress') is not None:
+        # Fixed thread pools (waitress, gunicorn gthread); inherited by forked workers
+        streams = events.limit_clients(args.threads)
+        logger.info('at most %d live update streams per process (--threads %d)', streams, args.threads)
+        if not streams:
+            logger.warning('--threads %d leaves no thread for /api/events; live updates are off', args.threads)
+
+    if args.workers > 1:
+        serve_gunicorn(app, args)
+    elif find_spec('waitress') is None:
+        serve_werkzeug(app, args)
+    else:
+        serve_waitress(app, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
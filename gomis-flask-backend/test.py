@@ -1,3 +1,4 @@
+import json
 import requests
 import random
 
@@ -38,14 +39,21 @@ def make_student(existing_lrns):
 def main():
     count = 10  # Number of students to create
     existing_lrns = set()
+    students = []
     for _ in range(count):
         student = make_student(existing_lrns)
         existing_lrns.add(student["lrn"])
-        resp = requests.post(API_URL, json=student)
-        if resp.ok:
-            print("Created:", student["firstName"], student["lastName"], "| LRN:", student["lrn"])
-        else:
-            print("Failed:", resp.status_code, resp.text)
+        students.append(student)
+    # One NDJSON upload instead of a POST per student
+    body = "\n".join(json.dumps(s) for s in students)
+    resp = requests.post(API_URL + "/bulk", data=body.encode(), headers={"Content-Type": "application/x-ndjson"})
+    if resp.ok:
+        report = resp.json()
+        print("Created:", report["inserted"], "| Skipped:", report["skipped"])
+        for error in report["errors"]:
+            print("Failed row", error["row"], error["lrn"], error["error"])
+    else:
+        print("Failed:", resp.status_code, resp.text)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""Fixtures for the backend tests: one app per session on a scratch SQLite database.
+
+The subsystems keep process-wide state (see app.py), so the app is built once. The
+environment is set before the first import: the database, the archive and the job files
+live in a temporary directory, and no job dispatcher runs, so tests claim and run jobs
+themselves.
+"""
+import itertools
+import os
+import tempfile
+
+import pytest
+
+TMP = tempfile.mkdtemp(prefix='gomis-tests-')
+os.environ.update({
+    'GOMIS_DATABASE_URL': f"sqlite:///{os.path.join(TMP, 'gomis.db')}",
+    'GOMIS_JOB_DIR': os.path.join(TMP, 'jobs'),
+    'GOMIS_JOB_WORKERS': '0',
+    'GOMIS_SECRET_KEY': 'tests',
+})
+
+_lrns = itertools.count(100000000000)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_student(client):
+    """POST a student (a new LRN each time) and return it."""
+    def make(**fields):
+        data = {'lrn': str(next(_lrns)), 'firstName': 'Test', 'lastName': 'Student', 'gradeLevel': '11',
+                'section': 'A', 'schoolYear': '2025-2026', **fields}
+        response = client.post('/api/students', json=data)
+        assert response.status_code == 201, response.json
+        return response.json
+    return make
+
+
+@pytest.fixture
+def make_violation(client):
+    """POST a violation of `student` and return it."""
+    def make(student, **fields):
+        data = {'studentId': student['id'], 'studentName': student['lastName'], 'studentLRN': student['lrn'],
+                'violationType': 'Tardiness', 'date': '2025-09-15', **fields}
+        response = client.post('/api/violations', json=data)
+        assert response.status_code == 201, response.json
+        return response.json
+    return make
@@ -0,0 +1,96 @@
+"""The violation rollup kept by the triggers equals a rebuild from the violation table
+after every kind of write."""
+import pytest
+from sqlalchemy import text
+
+from analytics import KEY, rebuild_rollup
+from db import db
+
+
+def _rollup():
+    with db.engine.connect() as conn:
+        return {tuple(row[:-1]): row[-1] for row in conn.execute(text(f'SELECT {KEY}, count FROM violation_rollup'))}
+
+
+@pytest.fixture
+def assert_rollup_current(app):
+    def check():
+        with app.app_context():
+            kept = _rollup()
+            rebuild_rollup()
+            assert kept == _rollup()
+            assert kept  # not vacuous
+    return check
+
+
+def test_violation_updates(client, make_student, make_violation, assert_rollup_current):
+    student = make_student()
+    first = make_violation(student)
+    second = make_violation(student, severity='Major')
+    assert_rollup_current()
+
+    for data in ({'status': 'Resolved'}, {'severity': 'Severe'}, {'violationType': 'Cutting Class'},
+                 {'date': '2025-11-02'}, {'date': '2026-01-05', 'status': 'Appealed'}):
+        assert client.put(f"/api/violations/{first['id']}", json=data).status_code == 200
+        assert_rollup_current()
+
+    assert client.delete(f"/api/violations/{second['id']}").status_code == 204
+    assert_rollup_current()
+
+
+def test_student_moves(client, make_student, make_violation, assert_rollup_current):
+    student = make_student(gradeLevel='11', section='A')
+    other = make_student(gradeLevel='12', section='B')
+    violation = make_violation(student)
+    make_violation(student, date='2025-10-01')
+
+    # The student's violations move to their new grade level and section
+    assert client.put(f"/api/students/{student['id']}", json={'grade_level': '12', 'section': 'C'}).status_code == 200
+    assert_rollup_current()
+
+    # A violation moves to another student
+    assert client.put(f"/api/violations/{violation['id']}", json={'studentId': other['id']}).status_code == 200
+    assert_rollup_current()
+
+    # ...and to a student that does not exist
+    assert client.put(f"/api/violations/{violation['id']}", json={'studentId': 10 ** 9}).status_code == 200
+    assert_rollup_current()
+
+    assert client.delete(f"/api/students/{other['id']}").status_code == 204
+    assert_rollup_current()
+
+
+def test_status_propagation(client, make_student, make_violation, assert_rollup_current):
+    student = make_student()
+    make_violation(student, date='2025-09-20')
+    incident = client.post('/api/incidents', json={'reportedBy': 'Teacher', 'reportedByLRN': student['lrn'],
+                                                   'date': '2025-09-20', 'time': '08:00:00'}).json
+
+    response = client.put(f"/api/incidents/{incident['id']}", json={'status': 'Resolved'})
+    assert response.json['violationsUpdated'] == 1
+    assert_rollup_current()
+
+    response = client.put('/api/incidents/status', json={'ids': [incident['id']], 'status': 'Appealed'})
+    assert response.json['violationsUpdated'] == 1
+    assert_rollup_current()
+
+
+def test_batch_where_updates(client, make_student, make_violation, assert_rollup_current):
+    students = [make_student(gradeLevel='9', section='Batch') for _ in range(3)]
+    for student in students:
+        make_violation(student, violationType='Batch', status='Pending')
+        make_violation(student, violationType='Batch', status='Pending', date='2025-12-01')
+    assert_rollup_current()
+
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'update', 'entity': 'violations', 'where': {'violationType': 'Batch'}, 'data': {'status': 'Resolved'}},
+        {'op': 'update', 'entity': 'students', 'where': {'section': 'Batch'}, 'data': {'gradeLevel': '10'}},
+    ]})
+    assert [r['count'] for r in response.json['results']] == [6, 3]
+    assert_rollup_current()
+
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'delete', 'entity': 'violations', 'where': {'violationType': 'Batch', 'date': '2025-12-01'}},
+    ]})
+    assert response.json['results'][0]['count'] == 3
+    assert_rollup_current()
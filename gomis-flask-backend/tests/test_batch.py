@@ -0,0 +1,62 @@
+"""POST /api/batch: operations apply in order in one transaction, or not at all."""
+import pytest
+
+import batch
+
+
+def _batch(client, *operations):
+    return client.post('/api/batch', json={'operations': list(operations)})
+
+
+def test_operations_apply_in_order(client, make_student, make_violation):
+    student = make_student()
+    violation = make_violation(student)
+    response = _batch(
+        client,
+        {'op': 'create', 'entity': 'students', 'data': {'lrn': '900000000001', 'firstName': 'New', 'lastName': 'One'}},
+        {'op': 'update', 'entity': 'violations', 'id': violation['id'], 'data': {'status': 'Resolved'}},
+        {'op': 'delete', 'entity': 'violations', 'id': violation['id']},
+    )
+    assert response.status_code == 200
+    created, updated, deleted = response.json['results']
+    assert (created['status'], updated['status'], deleted['status']) == (201, 200, 204)
+    assert updated['row']['status'] == 'Resolved'
+    assert client.get(f"/api/students/{created['id']}").json['lrn'] == '900000000001'
+    assert client.get(f"/api/violations/{violation['id']}").status_code == 404
+
+
+def test_failure_rolls_back_the_whole_batch(client, make_student):
+    student = make_student()
+    response = _batch(
+        client,
+        {'op': 'update', 'entity': 'students', 'id': student['id'], 'data': {'section': 'Rolled back'}},
+        {'op': 'create', 'entity': 'students', 'data': {'lrn': student['lrn'], 'firstName': 'Dup', 'lastName': 'Dup'}},
+    )
+    assert response.status_code == 409 and response.json['index'] == 1
+    assert client.get(f"/api/students/{student['id']}").json['section'] == student['section']
+
+
+@pytest.mark.parametrize('operation, status', [
+    ({'op': 'update', 'entity': 'students', 'id': 10 ** 9, 'data': {'section': 'X'}}, 404),
+    ({'op': 'update', 'entity': 'students', 'id': '1', 'data': {'section': 'X'}}, 400),
+    ({'op': 'update', 'entity': 'students', 'id': 1, 'data': {'id': 2}}, 400),
+    ({'op': 'update', 'entity': 'students', 'id': 1, 'data': {'password': 'x'}}, 400),
+    ({'op': 'update', 'entity': 'students', 'where': {'password': 'x'}, 'data': {'section': 'X'}}, 400),
+    ({'op': 'update', 'entity': 'students', 'where': {'section': []}, 'data': {'section': 'X'}}, 400),
+    ({'op': 'create', 'entity': 'students', 'data': {'firstName': 'No LRN'}}, 400),
+    ({'op': 'upsert', 'entity': 'students', 'data': {}}, 400),
+    ({'op': 'delete', 'entity': 'users', 'id': 1}, 400),
+    ('delete', 400),
+])
+def test_invalid_operation(client, operation, status):
+    response = _batch(client, operation)
+    assert response.status_code == status
+    assert response.json['index'] == 0 and response.json['error']
+
+
+@pytest.mark.parametrize('body', [None, [], {'operations': []}, {'operations': {}},
+                                  {'operations': [{'op': 'delete', 'entity': 'students', 'id': 1}] * (batch.MAX_OPERATIONS + 1)}])
+def test_invalid_body(client, body):
+    response = client.post('/api/batch', json=body)
+    assert response.status_code == 400
+    assert response.json['index'] is None
@@ -0,0 +1,51 @@
+"""/api/changes keeps a tombstone for every deleted row, whichever way it was deleted."""
+
+
+def _cursor(client):
+    return client.get('/api/changes').json['cursor']
+
+
+def _changes(client, since):
+    response = client.get('/api/changes', query_string={'since': since})
+    assert response.status_code == 200
+    assert not response.json['reset']
+    return {(c['table'], c['id']): c for c in response.json['changes']}
+
+
+def test_delete_leaves_tombstone(client, make_student, make_violation):
+    student = make_student()
+    violation = make_violation(student)
+    since = _cursor(client)
+
+    assert client.delete(f"/api/violations/{violation['id']}").status_code == 204
+    assert client.delete(f"/api/students/{student['id']}").status_code == 204
+
+    changes = _changes(client, since)
+    assert changes[('violations', violation['id'])]['op'] == 'delete'
+    assert changes[('students', student['id'])]['op'] == 'delete'
+    assert all('row' not in c for c in changes.values())
+
+
+def test_created_then_deleted_is_one_tombstone(client, make_student):
+    since = _cursor(client)
+    student = make_student()
+    client.delete(f"/api/students/{student['id']}")
+
+    changes = _changes(client, since)
+    assert [(key, c['op']) for key, c in changes.items()] == [(('students', student['id']), 'delete')]
+
+
+def test_batch_where_delete_leaves_tombstones(client, make_student, make_violation):
+    student = make_student()
+    violations = [make_violation(student, violationType='Tombstone') for _ in range(3)]
+    kept = make_violation(student, violationType='Kept')
+    since = _cursor(client)
+
+    response = client.post('/api/batch', json={'operations': [
+        {'op': 'delete', 'entity': 'violations', 'where': {'violationType': 'Tombstone'}},
+    ]})
+    assert response.json['results'][0]['count'] == 3
+
+    changes = _changes(client, since)
+    assert {key: c['op'] for key, c in changes.items()} == {('violations', v['id']): 'delete' for v in violations}
+    assert client.get(f"/api/violations/{kept['id']}").status_code == 200
@@ -0,0 +1,91 @@
+"""The job table as a queue: stalled jobs are requeued until MAX_ATTEMPTS, and a lane
+runs one job at a time however many claims race for it."""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+from db import db
+
+
+@jobs.handler('test-lane', lane='test')
+def _lane_job(job):
+    return None
+
+
+@jobs.handler('test-free')
+def _free_job(job):
+    return None
+
+
+@pytest.fixture(autouse=True)
+def ctx(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(jobs._table().delete())
+        yield
+
+
+def _stale():
+    return datetime.utcnow() + timedelta(seconds=jobs.STALE_SECONDS + 1)
+
+
+def test_stale_job_is_requeued_then_failed():
+    job_id = jobs.enqueue('test-lane')['id']
+    for attempt in range(1, jobs.MAX_ATTEMPTS + 1):
+        row = jobs.claim(f'worker-{attempt}')
+        assert row.id == job_id and row.attempts == attempt
+
+        jobs.requeue_stale()  # the heartbeat is fresh
+        assert jobs.get_job(job_id)['status'] == 'running'
+
+        jobs.requeue_stale(_stale())
+        job = jobs.get_job(job_id)
+        if attempt < jobs.MAX_ATTEMPTS:
+            assert job['status'] == 'queued'
+        else:
+            assert job['status'] == 'failed'
+            assert job['error'] == 'Interrupted too many times'
+    assert jobs.claim('worker-last') is None
+
+
+def test_requeued_job_ignores_its_stalled_run():
+    job_id = jobs.enqueue('test-lane')['id']
+    jobs.claim('stalled')
+    jobs.requeue_stale(_stale())
+    jobs.claim('second')
+
+    jobs._finish(job_id, 'stalled', 'failed', error='late')
+    assert jobs.get_job(job_id)['status'] == 'running'
+
+
+def test_claim_runs_one_job_per_lane():
+    first = jobs.enqueue('test-lane')['id']
+    jobs.enqueue('test-lane')
+    free = jobs.enqueue('test-free')['id']
+
+    assert jobs.claim('a').id == first
+    assert jobs.claim('b').id == free  # the lane is busy; a job without one is not held up
+    assert jobs.claim('c') is None
+
+
+def test_concurrent_claims_in_a_lane(app):
+    for _ in range(5):
+        jobs.enqueue('test-lane')
+    barrier = threading.Barrier(8)
+    claimed = []
+
+    def claim(worker):
+        with app.app_context():
+            barrier.wait()
+            row = jobs.claim(worker)
+            if row is not None:
+                claimed.append(row.id)
+
+    threads = [threading.Thread(target=claim, args=(f'worker-{i}',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == 1
@@ -0,0 +1,62 @@
+"""Keyset pagination, field projection and cursor validation on the list endpoints."""
+import pytest
+
+from pagination import encode_cursor
+
+
+def _walk(client, url, **args):
+    items, cursor = [], None
+    while True:
+        query = {**args, 'limit': 3, **({'cursor': cursor} if cursor else {})}
+        page = client.get(url, query_string=query).json
+        items += page['items']
+        cursor = page['nextCursor']
+        if not cursor:
+            return items
+
+
+@pytest.mark.parametrize('url', ['/api/students', '/api/violations'])
+def test_walk_returns_every_row_once_in_order(client, make_student, make_violation, url):
+    student = make_student()
+    # Equal dates, so the id breaks the ties
+    for date in ('2025-09-01', '2025-09-03', '2025-09-03', '2025-09-03', '2025-08-30', '2025-09-02', '2025-09-03'):
+        make_violation(student, date=date)
+
+    walked = _walk(client, url)
+    assert walked == client.get(url).json
+    assert len({row['id'] for row in walked}) == len(walked)
+    if url == '/api/violations':
+        keys = [(row['date'], row['id']) for row in walked]
+        assert keys == sorted(keys, reverse=True)
+
+
+def test_fields_projection(client, make_student, make_violation):
+    make_violation(make_student(), status='Resolved')
+
+    page = client.get('/api/violations', query_string={'fields': 'status,id', 'limit': 2}).json
+    assert page['items'] and all(list(item) == ['status', 'id'] for item in page['items'])
+    walked = _walk(client, '/api/violations', fields='id')
+    assert walked == [{'id': row['id']} for row in client.get('/api/violations').json]
+
+    columns = client.get('/api/violations', query_string={'fields': 'id,date', 'format': 'columns'}).json
+    assert columns['columns'] == ['id', 'date'] and all(len(row) == 2 for row in columns['rows'])
+
+    response = client.get('/api/violations', query_string={'fields': 'id,password'})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('url, cursor', [
+    ('/api/students', 'not a cursor'),
+    ('/api/students', encode_cursor([{'a': 1}])),
+    ('/api/students', encode_cursor([[1, 2]])),
+    ('/api/students', encode_cursor([None])),
+    ('/api/students', encode_cursor([True])),
+    ('/api/students', encode_cursor([1, 2])),
+    ('/api/violations', encode_cursor([{'a': 1}, 2])),
+    ('/api/violations', encode_cursor(['2025-09-01', 1.5])),
+    ('/api/violations', encode_cursor([1])),
+])
+def test_malformed_cursor_is_400(client, url, cursor):
+    response = client.get(url, query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
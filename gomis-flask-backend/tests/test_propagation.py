@@ -0,0 +1,58 @@
+"""Incident and session status reaches the matching violations, and the batch close-outs
+reject malformed ids."""
+import pytest
+
+
+def _status(client, violation):
+    return client.get(f"/api/violations/{violation['id']}").json['status']
+
+
+def test_incident_status_reaches_violations_of_that_day(client, make_student, make_violation):
+    student = make_student()
+    same_day = make_violation(student, date='2025-10-06')
+    other_day = make_violation(student, date='2025-10-07')
+    incident = client.post('/api/incidents', json={'reportedBy': 'Teacher', 'reportedByLRN': student['lrn'],
+                                                   'date': '2025-10-06', 'time': '08:00:00'}).json
+
+    response = client.put('/api/incidents/status', json={'ids': [incident['id']], 'status': 'Resolved'})
+    assert response.json == {'updated': 1, 'violationsUpdated': 1}
+    assert _status(client, same_day) == 'Resolved'
+    assert _status(client, other_day) == 'Pending'
+
+
+def test_session_status_reaches_participants_violations(client, make_student, make_violation):
+    by_id, by_lrn, absent = make_student(), make_student(), make_student()
+    violations = [make_violation(s, date='2025-10-08') for s in (by_id, by_lrn, absent)]
+    session = client.post('/api/sessions', json={'date': '2025-10-08', 'time': '09:00:00', 'participants': [
+        {'id': by_id['id'], 'lrn': by_id['lrn']}, {'studentLRN': by_lrn['lrn']},
+    ]}).json
+
+    response = client.put(f"/api/sessions/{session['id']}", json={'status': 'Completed'})
+    assert response.json['violationsUpdated'] == 2
+    assert [_status(client, v) for v in violations] == ['Completed', 'Completed', 'Pending']
+
+
+@pytest.mark.parametrize('body', [
+    {'ids': ['a'], 'status': 'Resolved'},
+    {'ids': 5, 'status': 'Resolved'},
+    {'ids': [True], 'status': 'Resolved'},
+    {'ids': [1]},
+    [1, 2],
+])
+def test_incidents_status_rejects_malformed_body(client, body):
+    response = client.put('/api/incidents/status', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.json
+
+
+@pytest.mark.parametrize('body', [
+    {'ids': ['a'], 'status': 'Completed'},
+    {'ids': {'id': 1}, 'status': 'Completed'},
+    {'ids': [1.5], 'status': 'Completed'},
+    {'status': 'Completed'},
+    'Completed',
+])
+def test_sessions_status_rejects_malformed_body(client, body):
+    response = client.put('/api/sessions/status', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.json
@@ -0,0 +1,65 @@
+"""Conditional GET: the ETag holds until a write to a table the route reads, whichever way
+the write happens."""
+
+
+def _get(client, url, etag=None, **headers):
+    if etag:
+        headers['If-None-Match'] = etag
+    return client.get(url, headers=headers)
+
+
+def test_unchanged_list_is_304(client, make_student, make_violation):
+    make_violation(make_student())
+    first = _get(client, '/api/violations')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'no-cache'
+
+    again = _get(client, '/api/violations', etag)
+    assert again.status_code == 304 and again.data == b'' and again.headers['ETag'] == etag
+    # The tag covers the URL, and writes to tables the route does not read
+    assert _get(client, '/api/violations?limit=1', etag).status_code == 200
+    client.post('/api/appointments', json={'title': 't', 'participantName': 'p', 'consultationType': 'c',
+                                           'date': '2025-09-01', 'time': '09:00:00', 'allowOverlap': True})
+    assert _get(client, '/api/violations', etag).status_code == 304
+
+
+def test_writes_invalidate_the_tag(client, make_student, make_violation):
+    student = make_student()
+    violation = make_violation(student, date='2025-10-10')
+    incident = client.post('/api/incidents', json={'reportedBy': 'T', 'reportedByLRN': student['lrn'],
+                                                   'date': '2025-10-10', 'time': '08:00:00'}).json
+    writes = [
+        lambda: client.put(f"/api/violations/{violation['id']}", json={'severity': 'Major'}),
+        # Propagation and set-based batch updates are single Core statements
+        lambda: client.put('/api/incidents/status', json={'ids': [incident['id']], 'status': 'Resolved'}),
+        lambda: client.post('/api/batch', json={'operations': [
+            {'op': 'update', 'entity': 'violations', 'where': {'id': [violation['id']]}, 'data': {'status': 'Pending'}},
+        ]}),
+        lambda: client.delete(f"/api/violations/{violation['id']}"),
+    ]
+    for write in writes:
+        etag = _get(client, '/api/violations').headers['ETag']
+        assert write().status_code < 300
+        response = _get(client, '/api/violations', etag)
+        assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+def test_participants_invalidate_their_parent(client, make_student):
+    session = client.post('/api/sessions', json={'date': '2025-10-11', 'time': '09:00:00', 'participants': []}).json
+    url = f"/api/sessions/{session['id']}"
+    etag = _get(client, url).headers['ETag']
+
+    student = make_student()
+    client.put(url, json={'participants': [{'id': student['id'], 'lrn': student['lrn']}]})
+    assert _get(client, url, etag).status_code == 200
+
+
+def test_compressed_response_has_weak_tag(client, make_student, make_violation):
+    student = make_student()
+    for _ in range(20):
+        make_violation(student)
+    response = _get(client, '/api/violations', **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert _get(client, '/api/violations', etag, **{'Accept-Encoding': 'gzip'}).status_code == 304
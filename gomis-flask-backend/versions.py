@@ -0,0 +1,145 @@
+"""Per-table change counters and conditional GET (ETag / If-None-Match) for the read routes.
+
+Triggers bump `table_version.version` in the writing transaction on every insert, update
+and delete, so the counters also see Core bulk statements, propagation UPDATEs and other
+server processes. A GET decorated with @conditional reads the counters it depends on (one
+primary-key lookup) and answers 304 before the view runs when the client's ETag matches.
+"""
+import functools
+import hashlib
+import random
+
+from flask import make_response, request
+from sqlalchemy import bindparam, text
+
+from db import db
+
+VERSIONED_TABLES = ('student', 'appointment', 'violation', 'incident', 'session')
+
+# participant rows are part of the incident/session payloads, so they bump their parent
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS version_bump_{table}_{suffix} AFTER {event} ON "{table}" BEGIN
+        UPDATE table_version SET version = version + 1 WHERE name = '{table}';
+    END
+    """
+    for table in VERSIONED_TABLES
+    for suffix, event in (('ai', 'INSERT'), ('au', 'UPDATE'), ('ad', 'DELETE'))
+] + [
+    """
+    CREATE TRIGGER IF NOT EXISTS version_bump_participant_ai AFTER INSERT ON participant BEGIN
+        UPDATE table_version SET version = version + 1 WHERE name = new.parent_type;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS version_bump_participant_au AFTER UPDATE ON participant BEGIN
+        UPDATE table_version SET version = version + 1 WHERE name IN (old.parent_type, new.parent_type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS version_bump_participant_ad AFTER DELETE ON participant BEGIN
+        UPDATE table_version SET version = version + 1 WHERE name = old.parent_type;
+    END
+    """,
+]
+
+# PostgreSQL: one statement-level trigger per table; the names to bump are the trigger
+# arguments (participant bumps both parents) or the table itself.
+POSTGRES_FUNCTION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_NARGS > 0 THEN
+        UPDATE table_version SET version = version + 1 WHERE name = ANY(TG_ARGV);
+    ELSE
+        UPDATE table_version SET version = version + 1 WHERE name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+POSTGRES_TRIGGERS = [
+    f"""
+    CREATE OR REPLACE TRIGGER version_bump_{table} AFTER INSERT OR UPDATE OR DELETE ON "{table}"
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version({args})
+    """
+    for table, args in [(t, '') for t in VERSIONED_TABLES] + [('participant', "'incident', 'session'")]
+]
+
+
+def _start():
+    # Counters start at a random value so a recreated or restored database never hands
+    # out an ETag that a client cached for different data.
+    return random.getrandbits(40)
+
+
+def init_versions():
+    """Seed the counters and create the triggers if missing."""
+    dialect = db.engine.dialect.name
+    with db.engine.begin() as conn:
+        existing = set(conn.execute(text('SELECT name FROM table_version')).scalars())
+        for table in VERSIONED_TABLES:
+            if table not in existing:
+                conn.execute(text('INSERT INTO table_version (name, version) VALUES (:name, :version)'),
+                             {'name': table, 'version': _start()})
+        if dialect == 'sqlite':
+            for trigger in SQLITE_TRIGGERS:
+                conn.execute(text(trigger))
+        elif dialect == 'postgresql':
+            conn.execute(text(POSTGRES_FUNCTION))
+            for trigger in POSTGRES_TRIGGERS:
+                conn.execute(text(trigger))
+
+
+def reset_versions():
+    """Move every counter to a fresh random start (after a restore replaced the data)."""
+    with db.engine.begin() as conn:
+        for table in VERSIONED_TABLES:
+            conn.execute(text('UPDATE table_version SET version = :version WHERE name = :name'),
+                         {'name': table, 'version': _start()})
+
+
+def bump_versions(tables):
+    """Invalidate the ETags over `tables` after a change the triggers do not see (e.g. in the archive)."""
+    with db.engine.begin() as conn:
+        conn.execute(text('UPDATE table_version SET version = version + 1 WHERE name IN :names')
+                     .bindparams(bindparam('names', expanding=True)), {'names': list(tables)})
+
+
+def table_versions(tables):
+    from models import TableVersion
+
+    rows = db.session.query(TableVersion.name, TableVersion.version).filter(TableVersion.name.in_(tables))
+    return dict(rows.all())
+
+
+def make_etag(tables, extra=''):
+    versions = table_versions(tables)
+    key = '|'.join([f'{t}={versions.get(t)}' for t in tables] + [request.full_path, extra])
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def conditional(*tables, extra=None):
+    """Serve a GET route with a strong ETag over `tables`; 304 without running the view on a match.
+
+    `extra` returns anything else the response depends on (e.g. today's date).
+    The counters are read before the view queries its rows, so a concurrent write can only
+    make the tag older than the body (the next request refetches), never newer.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = make_etag(tables, extra() if extra else '')
+            # Weak comparison: compressed responses carry the tag as W/"..." (see compression.py)
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let browsers keep the body but revalidate on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator